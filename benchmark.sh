@@ -0,0 +1,5 @@
+#!/usr/bin/env sh
+
+# Load test the service on local storage and on the S3 and Pinata
+# stand-ins, see `python -m benchmark.service --help` for the options
+python -m benchmark.service "$@"
@@ -0,0 +1,16 @@
+"""Benchmark scripts for the metadata service. Run them as modules from
+the project directory, e.g. `python -m benchmark.middleware`. Required
+environment variables get a throwaway default, so the scripts work
+without any configuration.
+
+"""
+
+import os
+
+for key, value in {"MAX_TOKEN_ID": "10000",
+                   "SECRET_KEY": "benchmark",
+                   "STORAGE_TYPE": "local",
+                   "S3_BUCKET_NAME": "benchmark",
+                   "STORAGE_ACCESS_KEY": "benchmark",
+                   "STORAGE_SECRET_KEY": "benchmark"}.items():
+    os.environ.setdefault(key, value)
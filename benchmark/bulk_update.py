@@ -0,0 +1,78 @@
+"""Benchmark updating the metadata of many tokens on local storage.
+
+It compares calling `internal_metadata.put` once per token, as a client
+of `PUT /internal/update/metadata/{token}` does, with a single
+`internal_metadata.put_many` call behind `PUT /internal/update/metadata`.
+Both variants parse the request body, so the numbers include the
+validation cost of each endpoint.
+
+    python -m benchmark.bulk_update --tokens 10000
+
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from pydantic import parse_obj_as
+
+from benchmark.utils import print_table
+from controller import internal_metadata
+from module.env import Env
+from module.logger import logger
+from module.schema.metadata import MetadataRequestBody, MetadataUpdate
+
+VARIANTS = ("per-token", "bulk")
+METADATA = {
+    "name": "Benchmark",
+    "image_url": "https://example.com/image.png",
+    "attributes": [{"trait_type": f"Trait {index}", "value": index} for index in range(16)]
+}
+PATCH = {"name": "Revealed", "attributes": [{"trait_type": "Trait 0", "value": "revealed"}]}
+
+
+async def run(variant: str, tokens: int) -> float:
+    if variant == "per-token":
+        for token in range(1, tokens + 1):
+            response, status = await internal_metadata.put(token, MetadataRequestBody.parse_obj(PATCH))
+            assert status == 200, response
+    else:
+        updates = parse_obj_as(list[MetadataUpdate], [{"token": token, "patch": PATCH}
+                                                      for token in range(1, tokens + 1)])
+        response, status = await internal_metadata.put_many(updates)
+        assert status == 200 and all(result["status"] == 200 for result in response.values()), response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=10000)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    content = json.dumps(METADATA).encode("utf-8")
+    results = {}
+    for variant in VARIANTS:
+        with tempfile.TemporaryDirectory() as directory:
+            folder = os.path.join(directory, "metadata")
+            os.mkdir(folder)
+            for token in range(1, args.tokens + 1):
+                with open(os.path.join(folder, f"{token}.json"), "wb") as file:
+                    file.write(content)
+
+            with patch.object(Env, "METADATA_FOLDER", folder), patch.object(Env, "MAX_TOKEN_ID", args.tokens):
+                started = time.perf_counter()
+                asyncio.run(run(variant, args.tokens))
+                elapsed = time.perf_counter() - started
+            results[variant] = {"wall_s": round(elapsed, 3),
+                                "tokens_per_s": round(args.tokens / elapsed, 2),
+                                "backup_files": sum(len(files) for *_, files in os.walk(os.path.join(directory, "backup")))}
+    print_table(results, ["wall_s", "tokens_per_s", "backup_files"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Microbenchmark the JSON engines of `module.codec` on large metadata
+documents, the size of our largest collections' metadata.
+
+It times parsing a document as `get_metadata` does, serializing the
+patched dict as the backup of `internal_metadata.put` does, and
+serializing a `Metadata` model as `save_metadata` does. The previous
+`Metadata.json` serialization is measured as a baseline.
+
+    python -m benchmark.json_codec --attributes 1000 --calls 1000
+
+"""
+
+import argparse
+import time
+from typing import Callable
+
+from benchmark.utils import print_table
+from module import codec
+from module.schema.metadata import Metadata
+
+
+def per_call(function: Callable, calls: int) -> float:
+    """Call a function `calls` times and return the mean time per call in microseconds"""
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return round((time.perf_counter() - started) / calls * 1e6, 2)
+
+
+def make_metadata(attributes: int) -> Metadata:
+    return Metadata(
+        name="Mölér #1",
+        description="Ein Drache, der über die Berge fliegt. 山を越えて飛ぶドラゴン。 " * 50,
+        image_url="https://example.com/images/1.png",
+        external_url="https://example.com/tokens/1",
+        attributes=[{"trait_type": f"Trait {index}", "value": index if index % 3 else f"Wert {index} ✓"}
+                    for index in range(attributes)],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attributes", type=int, default=1000, help="attributes per document")
+    parser.add_argument("--calls", type=int, default=1000)
+    args = parser.parse_args()
+
+    metadata = make_metadata(args.attributes)
+    document = metadata.dict(exclude_none=True)
+    engines = [codec.STDLIB] + ([codec.ORJSON] if codec.ORJSON else [])
+    content = codec.STDLIB.dumps(document)
+
+    results = {"Metadata.json": {
+        "size_kb": round(len(metadata.json(exclude_none=True).encode("utf-8")) / 1024, 1),
+        "save_us": per_call(lambda: metadata.json(exclude_none=True).encode("utf-8"), args.calls),
+    }}
+    for engine in engines:
+        results[engine.name] = {
+            "size_kb": round(len(engine.dumps(document)) / 1024, 1),
+            "loads_us": per_call(lambda: engine.loads(content), args.calls),
+            "dumps_us": per_call(lambda: engine.dumps(document), args.calls),
+            "save_us": per_call(lambda: engine.dumps(metadata.dict(exclude_none=True)), args.calls),
+        }
+    print_table(results, ["size_kb", "loads_us", "dumps_us", "save_us"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark the throughput of GET /metadata/{token} with each logging
+setup. The metadata cache is disabled, so every request logs the lines
+of a storage read.
+
+It compares logging disabled, the previous synchronous StreamHandler,
+and the queue handler with text, JSON and sampled JSON records. Logs
+are written to a pipe drained by the parent process, as in a container.
+Each variant runs in its own interpreter since the log settings are
+read when the logger is imported.
+
+    python -m benchmark.logger --requests 5000 --concurrency 32
+
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+from benchmark.utils import print_table, run_isolated, summarize
+
+VARIANTS = {
+    "off": {},
+    "sync text": {"LOG_FORMAT": "text"},
+    "queue text": {"LOG_FORMAT": "text"},
+    "queue json": {"LOG_FORMAT": "json"},
+    "queue json, 10% sampled": {"LOG_FORMAT": "json", "LOG_SAMPLE_RATE": "0.1"},
+}
+TOKENS = 100
+METADATA = {
+    "name": "Benchmark",
+    "image_url": "https://example.com/image.png",
+    "attributes": [{"trait_type": f"Trait {index}", "value": index} for index in range(16)]
+}
+
+
+async def measure(variant: str, requests: int, concurrency: int) -> dict:
+    import httpx
+
+    from main import app
+    from module.logger import formatter, logger
+
+    if variant == "off":
+        logger.setLevel(logging.WARNING)
+    elif variant == "sync text":
+        handler = logging.StreamHandler()
+        handler.setFormatter(formatter)
+        logger.handlers = [handler]
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+        async def get(token: int):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(f"/metadata/{token}", headers={"Accept-Encoding": "identity"})
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*(get(index % TOKENS + 1) for index in range(requests)))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(asyncio.run(measure(args.variant, args.requests, args.concurrency))))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        for token in range(1, TOKENS + 1):
+            with open(os.path.join(directory, f"{token}.json"), "w") as file:
+                json.dump(METADATA, file)
+        env = {**os.environ,
+               "MAX_TOKEN_ID": str(TOKENS),
+               "METADATA_FOLDER": directory,
+               "METADATA_CACHE_MAX_SIZE": "0",
+               "STORAGE_TYPE": "local",
+               "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark")}
+        results = {variant: run_isolated("benchmark.logger",
+                                         "--variant", variant,
+                                         "--requests", str(args.requests),
+                                         "--concurrency", str(args.concurrency),
+                                         env={**env, **settings})
+                   for variant, settings in VARIANTS.items()}
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark the correlation ID middleware on large metadata documents.
+
+It compares the previous implementation, which drained the response
+body into memory and rebuilt a second response, with the pure ASGI
+middleware in `module.middleware`. Each variant runs in its own
+interpreter so the peak RSS is measured separately.
+
+    python -m benchmark.middleware --requests 200 --attributes 50000
+
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+
+from benchmark.utils import print_table, run_isolated, summarize
+from module.constant import CORRELATION_ID
+from module.middleware import CorrelationIdMiddleware
+
+VARIANTS = ("buffered", "streaming")
+CHUNK_SIZE = 64 * 1024
+
+
+def build_document(attributes: int) -> bytes:
+    document = {
+        "name": "Benchmark",
+        "image_url": "https://example.com/image.png",
+        "attributes": [{"trait_type": f"Trait {index}", "value": index} for index in range(attributes)]
+    }
+    return json.dumps(document).encode("utf-8")
+
+
+def build_app(variant: str, document: bytes) -> FastAPI:
+    app = FastAPI()
+
+    if variant == "buffered":
+        @app.middleware("http")
+        async def set_correlation_id(request: Request, call_next):
+            CORRELATION_ID.set(uuid.uuid4())
+            response = await call_next(request)
+            content = b""
+            async for chunk in response.body_iterator:
+                content += chunk
+
+            response.headers["correlation-id"] = f"{CORRELATION_ID.get()}"
+            return Response(content=content,
+                            headers=response.headers,
+                            media_type=response.media_type,
+                            status_code=response.status_code)
+    else:
+        app.add_middleware(CorrelationIdMiddleware)
+
+    @app.get("/metadata")
+    async def metadata():
+        async def chunks():
+            for start in range(0, len(document), CHUNK_SIZE):
+                yield document[start:start + CHUNK_SIZE]
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    return app
+
+
+async def run(variant: str, requests: int, attributes: int) -> dict:
+    document = build_document(attributes)
+    app = build_app(variant, document)
+    latencies = []
+    async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+        for _ in range(requests):
+            request_started = time.perf_counter()
+            response = await client.get("/metadata")
+            latencies.append(time.perf_counter() - request_started)
+            assert response.headers["correlation-id"]
+            del response
+            gc.collect()  # the in-process transport keeps bodies in reference cycles
+    elapsed = sum(latencies)
+    result = summarize(latencies, elapsed)
+    result["document_bytes"] = len(document)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variant", choices=VARIANTS, help="run a single variant in this process")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--attributes", type=int, default=50000)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(asyncio.run(run(args.variant, args.requests, args.attributes))))
+        return
+
+    results = {variant: run_isolated("benchmark.middleware",
+                                     "--variant", variant,
+                                     "--requests", str(args.requests),
+                                     "--attributes", str(args.attributes))
+               for variant in VARIANTS}
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
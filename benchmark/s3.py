@@ -0,0 +1,57 @@
+"""Benchmark S3Storage against a local S3 stand-in server.
+
+It compares a client created per operation (the storage is used
+without calling `connect`) with the long-lived pooled client opened
+by `connect` at application startup.
+
+    python -m benchmark.s3 --requests 500 --concurrency 50
+
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from unittest.mock import patch
+
+from benchmark.utils import gather_bounded, print_table, start_stand_in, summarize, timed
+from module.env import Env
+from module.logger import logger
+from module.storage.s3 import S3Storage
+
+VARIANTS = ("per-call", "pooled")
+
+
+async def run(variant: str, url: str, requests: int, concurrency: int) -> dict:
+    with patch.object(Env, "S3_ENDPOINT_URL", url), patch.object(S3Storage, "bucket", "benchmark"):
+        storage = S3Storage(logger, config={"access_key": "benchmark", "secret_key": "benchmark"})
+        await storage.put("metadata/1.json", b'{"name": "benchmark"}', overwrite=True)
+        if variant == "pooled":
+            await storage.connect()
+
+        started = time.perf_counter()
+        latencies = await gather_bounded((timed(storage.get("metadata/1.json")) for _ in range(requests)),
+                                         concurrency)
+        elapsed = time.perf_counter() - started
+        await storage.close()
+    return summarize(latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    server, url = start_stand_in("s3")
+    try:
+        results = {variant: asyncio.run(run(variant, url, args.requests, args.concurrency))
+                   for variant in VARIANTS}
+    finally:
+        server.terminate()
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Load test the HTTP service on each storage backend.
+
+The FastAPI app runs in-process behind an httpx client, on local storage
+and on the S3 and Pinata stand-ins of `tests.stand_in`. Each backend runs
+in its own interpreter, so its peak RSS is measured separately. The
+metadata cache is disabled unless `--cache` is set, so every request
+reaches the storage.
+
+    sh benchmark.sh --requests 2000 --concurrency 32 --output benchmark.json
+    sh benchmark.sh --backends local --baseline benchmark.json
+
+The results are written to a JSON file and compared with `--baseline`,
+the output of a previous run, to spot regressions. Pinata can't store
+the backup written by PUT in a folder, so its PUT requests fail and are
+reported as errors.
+
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmark.utils import print_table, run_isolated, start_stand_in, summarize
+
+BACKENDS = ("local", "s3", "pinata")
+SCENARIOS = ("get", "put")
+SECRET_KEY = "benchmark-secret-key-with-32-bytes"
+METADATA = {
+    "name": "Benchmark",
+    "image_url": "https://example.com/image.png",
+    "attributes": [{"trait_type": f"Trait {index}", "value": index} for index in range(16)]
+}
+
+
+async def measure(backend: str, url: str, requests: int, concurrency: int) -> dict:
+    import logging
+
+    import httpx
+    import jwt
+
+    from config import storage
+    from main import app
+    from module.env import Env
+    from module.logger import logger
+
+    logger.setLevel(logging.WARNING)
+    if backend == "pinata":
+        storage.storage.api_host = f"{url}/"
+        storage.storage.host = f"{url}/ipfs/"
+    await storage.connect()
+    content = json.dumps(METADATA).encode("utf-8")
+    for token in range(1, Env.MAX_TOKEN_ID + 1):
+        await storage.put(os.path.join(Env.METADATA_FOLDER, f"{token}.json"), content, overwrite=True)
+
+    headers = {"Accept-Encoding": "identity", "Authorization": jwt.encode({}, SECRET_KEY, algorithm="HS256")}
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {}
+    async with httpx.AsyncClient(app=app, base_url="http://benchmark", timeout=60) as client:
+        for scenario in SCENARIOS:
+            latencies = []
+            errors = 0
+
+            async def send(index: int):
+                nonlocal errors
+                token = index % Env.MAX_TOKEN_ID + 1
+                async with semaphore:
+                    started = time.perf_counter()
+                    if scenario == "get":
+                        response = await client.get(f"/metadata/{token}", headers=headers)
+                    else:
+                        response = await client.put(f"/internal/update/metadata/{token}",
+                                                    json={"name": f"Update {index}"},
+                                                    headers=headers)
+                    latencies.append(time.perf_counter() - started)
+                    errors += response.status_code != 200
+
+            started = time.perf_counter()
+            await asyncio.gather(*(send(index) for index in range(requests)))
+            results[scenario] = {**summarize(latencies, time.perf_counter() - started), "errors": errors}
+    await storage.close()
+    return results
+
+
+def worker_env(backend: str, url: str, folder: str, tokens: int, cache: bool) -> dict:
+    env = {**os.environ,
+           "MAX_TOKEN_ID": str(tokens),
+           "SECRET_KEY": SECRET_KEY,
+           "STORAGE_TYPE": backend,
+           "METADATA_FOLDER": folder,
+           "STORAGE_ACCESS_KEY": "benchmark",
+           "STORAGE_SECRET_KEY": "benchmark"}
+    if not cache:
+        env["METADATA_CACHE_MAX_SIZE"] = "0"
+    if backend == "s3":
+        env.update(S3_ENDPOINT_URL=url, S3_BUCKET_NAME="benchmark", METADATA_FOLDER="metadata")
+    elif backend == "pinata":
+        env["METADATA_FOLDER"] = ""  # Pinata can only overwrite files in the root directory
+    return env
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    """Compute the change of throughput and p99 latency of each backend
+    and scenario from a previous run, in percent
+
+    """
+
+    changes = {}
+    for backend, scenarios in results.items():
+        for scenario, result in scenarios.items():
+            previous = baseline.get("results", {}).get(backend, {}).get(scenario)
+            if not previous:
+                continue
+            changes[f"{backend} {scenario}"] = {
+                column: f"{(result[column] - previous[column]) / previous[column] * 100:+.1f}%"
+                for column in ("rps", "p99_ms") if previous[column]
+            }
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="comma separated backends")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--cache", action="store_true", help="enable the metadata cache")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--baseline", help="results of a previous run to compare with")
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--url", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(measure(args.worker, args.url, args.requests, args.concurrency))))
+        return
+
+    results = {}
+    for backend in args.backends.split(","):
+        server, url = start_stand_in(backend) if backend != "local" else (None, "")
+        try:
+            with tempfile.TemporaryDirectory() as folder:
+                results[backend] = run_isolated("benchmark.service",
+                                                "--worker", backend,
+                                                "--url", url,
+                                                "--requests", str(args.requests),
+                                                "--concurrency", str(args.concurrency),
+                                                env=worker_env(backend, url, folder, args.tokens, args.cache))
+        finally:
+            if server:
+                server.terminate()
+
+    report = {
+        "meta": {
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "tokens": args.tokens,
+            "cache": args.cache,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    print_table({f"{backend} {scenario}": result
+                 for backend, scenarios in results.items()
+                 for scenario, result in scenarios.items()},
+                ["rps", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb", "errors"])
+    if args.baseline:
+        with open(args.baseline) as file:
+            print()
+            print_table(compare(results, json.load(file)), ["rps", "p99_ms"])
+    print(f"\nResults written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Helpers shared by the benchmark scripts"""
+
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Get the nearest-rank percentile of a list of samples
+
+    Args:
+        samples (list[float]): measured values
+        pct (float): percentile between 0 and 100
+
+    Returns:
+        float: percentile value, 0 if there is no sample
+
+    """
+
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss() -> int:
+    """Get the peak resident set size of the current process in bytes"""
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    """Summarize request latencies
+
+    Args:
+        latencies (list[float]): latency of each request in seconds
+        elapsed (float): wall time of the whole run in seconds
+
+    Returns:
+        dict: throughput, latency percentiles in milliseconds and peak RSS
+
+    """
+
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mb": round(peak_rss() / 1024 / 1024, 2),
+    }
+
+
+def run_isolated(module: str, *args: str, env: dict = None) -> dict:
+    """Run a benchmark module in a fresh interpreter, so that the peak
+    RSS of one variant doesn't leak into the others. The module must
+    print its result as a JSON object on the last line of stdout.
+
+    Args:
+        module (str): module to run with `python -m`
+        *args (str): command line arguments for the module
+        env (dict, optional): environment variables for the child process
+
+    Returns:
+        dict: decoded result of the child process
+
+    """
+
+    output = subprocess.run([sys.executable, "-m", module, *args],
+                            check=True,
+                            capture_output=True,
+                            text=True,
+                            env=env)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def print_table(results: dict[str, dict], columns: list[str] = None) -> None:
+    """Print benchmark results of several variants side by side"""
+
+    columns = columns or ["rps", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb"]
+    print(f"{'variant':<24}" + "".join(f"{column:>14}" for column in columns))
+    for variant, result in results.items():
+        print(f"{variant:<24}" + "".join(f"{result.get(column, ''):>14}" for column in columns))
+
+
+async def gather_bounded(coroutines, concurrency: int) -> list:
+    """Await coroutines with at most `concurrency` of them running at once
+
+    Args:
+        coroutines: iterable of coroutines
+        concurrency (int): maximum number of running coroutines
+
+    Returns:
+        list: results in the same order as the coroutines
+
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(bounded(coroutine) for coroutine in coroutines))
+
+
+async def timed(coroutine) -> float:
+    """Await a coroutine and return how long it took in seconds"""
+
+    started = time.perf_counter()
+    await coroutine
+    return time.perf_counter() - started
+
+
+def start_stand_in(server: str) -> tuple[subprocess.Popen, str]:
+    """Start a stand-in storage server from `tests.stand_in` in a
+    separate process, so it doesn't compete with the benchmarked
+    code for the event loop
+
+    Args:
+        server (str): server name, e.g. "s3"
+
+    Returns:
+        tuple[subprocess.Popen, str]: server process and its base URL
+
+    """
+
+    process = subprocess.Popen([sys.executable, "-m", "tests.stand_in", server],
+                               stdout=subprocess.PIPE,
+                               text=True)
+    return process, process.stdout.readline().strip()
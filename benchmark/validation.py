@@ -0,0 +1,96 @@
+"""Microbenchmark the argument validation overhead of each layer of a
+metadata read on local storage.
+
+It compares the development mode, where every internal call validates
+its arguments with `pydantic.validate_arguments`, with the default mode
+where requests are only validated at the edge. The mode is chosen when
+the modules are imported, so each mode runs in its own interpreter.
+
+    python -m benchmark.validation --calls 5000
+
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from benchmark.utils import print_table, run_isolated
+
+MODES = {"validated": "true", "edge": "false"}
+PAYLOAD_SIZE = 256 * 1024
+
+
+async def per_call(make_coroutine, calls: int) -> float:
+    """Await a coroutine `calls` times and return the mean time per call in microseconds"""
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        await make_coroutine()
+    return round((time.perf_counter() - started) / calls * 1e6, 2)
+
+
+async def measure(calls: int) -> dict:
+    from config import metadata_cache, storage
+    from module.env import Env
+    from module.logger import logger
+    from module.utils import get_raw_metadata
+    from module.validation import validate_internal_arguments
+
+    logger.setLevel(logging.WARNING)
+
+    @validate_internal_arguments
+    async def noop(path: str, content: bytes, overwrite=False):
+        return path, content, overwrite
+
+    metadata = {
+        "name": "Benchmark",
+        "image_url": "https://example.com/image.png",
+        "attributes": [{"trait_type": f"Trait {index}", "value": index} for index in range(50)]
+    }
+    payload = os.urandom(PAYLOAD_SIZE)
+    with tempfile.TemporaryDirectory() as folder, patch.object(Env, "METADATA_FOLDER", folder):
+        path = os.path.join(folder, "1.json")
+        with open(path, "w") as file:
+            json.dump(metadata, file)
+
+        def cache_miss():
+            metadata_cache.clear()
+            return get_raw_metadata(1)
+
+        results = {
+            "decorator, 256KiB bytes": await per_call(lambda: noop(path, payload), calls),
+            "backend.get": await per_call(lambda: storage.storage.get(path), calls),
+            "Storage.get": await per_call(lambda: storage.get(path), calls),
+            "metadata cache hit": await per_call(lambda: get_raw_metadata(1), calls),
+            "metadata cache miss": await per_call(cache_miss, calls),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(measure(args.calls))))
+        return
+
+    results = {mode: run_isolated("benchmark.validation", "--worker", "--calls", str(args.calls),
+                                  env={**os.environ, "VALIDATE_INTERNAL_CALLS": value})
+               for mode, value in MODES.items()}
+    table = {layer: {"validated_us": results["validated"][layer],
+                     "edge_us": results["edge"][layer],
+                     "saved_us": round(results["validated"][layer] - results["edge"][layer], 2)}
+             for layer in results["validated"]}
+    print_table(table, ["validated_us", "edge_us", "saved_us"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""Command line tools to maintain the metadata in the storage. Run
+`python cli.py --help` to list the commands.
+
+    python cli.py scan
+    python cli.py pack --output metadata.pack
+    python cli.py audit --processes 8
+
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from itertools import chain
+from typing import Awaitable, Callable, Optional
+
+from pydantic import ValidationError
+
+from config import metadata_manifest, storage
+from module.env import Env
+from module.logger import logger
+from module.schema.metadata import Metadata
+from module.schema.storage import StorageType
+from module.storage.main import Storage
+from module.storage.pack import PackWriter
+from module.utils import validate_metadata
+
+
+async def for_each_token(concurrency: int, function: Callable[[int], Awaitable[None]]) -> None:
+    """Call an async function with every token ID from 1 to MAX_TOKEN_ID,
+    `concurrency` calls at once. Only `concurrency` coroutines exist at a
+    time, whatever the number of tokens.
+
+    Args:
+        concurrency (int): number of calls at once
+        function (Callable[[int], Awaitable[None]]): called with each token ID
+
+    """
+
+    tokens = iter(range(1, Env.MAX_TOKEN_ID + 1))
+
+    async def run():
+        for token in tokens:
+            await function(token)
+
+    await asyncio.gather(*(run() for _ in range(concurrency)))
+
+
+async def walk(source: Storage, concurrency: int, handle: Callable[[int, bytes], None]) -> dict[str, list[int]]:
+    """Load and validate the metadata of every token from 1 to
+    MAX_TOKEN_ID and pass the valid ones to a handler
+
+    Args:
+        source (Storage): storage to load the metadata from
+        concurrency (int): number of files loaded at once
+        handle (Callable[[int, bytes], None]): called with the token ID and the content of valid metadata
+
+    Returns:
+        dict[str, list[int]]: token IDs grouped by result, i.e. "valid",
+            "invalid", "missing" and "failed"
+
+    """
+
+    results = {"valid": [], "invalid": [], "missing": [], "failed": []}
+
+    async def walk_token(token: int):
+        path = os.path.join(Env.METADATA_FOLDER, f"{token}.json")
+        content, status = await source.get(path)
+        if status == HTTPStatus.NOT_FOUND:
+            results["missing"].append(token)
+            return
+        if status != HTTPStatus.OK:
+            results["failed"].append(token)
+            return
+        content = bytes(content)
+        _, status = validate_metadata(content)
+        if status != HTTPStatus.OK:
+            results["invalid"].append(token)
+            return
+        handle(token, content)
+        results["valid"].append(token)
+
+    await source.connect()
+    try:
+        await for_each_token(concurrency, walk_token)
+    finally:
+        await source.close()
+    return {result: sorted(tokens) for result, tokens in results.items()}
+
+
+def open_storage(storage_type: StorageType) -> Storage:
+    """Create a storage of any type with the credentials from the environment
+
+    Args:
+        storage_type (StorageType): storage type
+
+    Returns:
+        Storage: storage object
+
+    """
+
+    return Storage(logger=logger,
+                   storage=storage_type,
+                   config={
+                       "access_key": Env.STORAGE_ACCESS_KEY,
+                       "secret_key": Env.STORAGE_SECRET_KEY
+                   })
+
+
+async def scan(concurrency: int) -> dict[str, list[int]]:
+    """Validate the existing metadata and record the digest of the
+    valid ones in the metadata manifest
+
+    Args:
+        concurrency (int): number of files loaded at once
+
+    Returns:
+        dict[str, list[int]]: token IDs grouped by result, see `walk`
+
+    """
+
+    return await walk(storage, concurrency, metadata_manifest.stamp)
+
+
+async def pack(output: str, source: StorageType, concurrency: int) -> dict[str, list[int]]:
+    """Build a metadata pack for pack storage from the valid metadata
+    in METADATA_FOLDER. The digests of the packed metadata are also
+    recorded in the metadata manifest.
+
+    Args:
+        output (str): path of the pack file
+        source (StorageType): storage to load the metadata from
+        concurrency (int): number of files loaded at once
+
+    Returns:
+        dict[str, list[int]]: token IDs grouped by result, see `walk`
+
+    """
+
+    source_storage = open_storage(source)
+
+    def add(token: int, content: bytes):
+        writer.add(token, content)
+        metadata_manifest.stamp(token, content)
+
+    with PackWriter(output, Env.MAX_TOKEN_ID) as writer:
+        return await walk(source_storage, concurrency, add)
+
+
+def validate_batch(batch: list[tuple[int, bytes]]) -> list[tuple[int, Optional[list[dict]]]]:
+    """Validate a batch of metadata against the Metadata schema. It runs
+    in the worker processes of `audit`, so it doesn't log anything.
+
+    Args:
+        batch (list[tuple[int, bytes]]): token IDs and metadata content
+
+    Returns:
+        list[tuple[int, Optional[list[dict]]]]: token IDs and validation errors, None if the metadata is valid
+
+    """
+
+    results = []
+    for token, content in batch:
+        try:
+            Metadata.parse_raw(content)
+            results.append((token, None))
+        except ValidationError as err:
+            results.append((token, err.errors()))
+    return results
+
+
+async def audit(source: StorageType,
+                concurrency: int,
+                processes: Optional[int] = None,
+                batch_size: int = 500) -> tuple[dict[str, list[int]], dict[int, list[dict]], dict[str, float]]:
+    """Validate the metadata of every token from 1 to MAX_TOKEN_ID.
+    The metadata is loaded by the event loop and validated in batches
+    by a pool of processes, so the validation uses every CPU core. At
+    most two batches per process are in flight, loading waits for the
+    validation when the processes fall behind, so the memory stays flat
+    whatever the number of tokens.
+
+    Args:
+        source (StorageType): storage to load the metadata from
+        concurrency (int): number of files loaded at once
+        processes (Optional[int], optional): number of worker processes. Defaults to the number of CPUs
+        batch_size (int, optional): number of metadata sent to a worker at once. Defaults to 500
+
+    Returns:
+        tuple[dict[str, list[int]], dict[int, list[dict]], dict[str, float]]: token IDs grouped
+            by result (see `walk`), validation errors of the invalid metadata and throughput
+            statistics
+
+    """
+
+    source_storage = open_storage(source)
+    loop = asyncio.get_running_loop()
+    results = {"valid": [], "invalid": [], "missing": [], "failed": []}
+    errors = {}
+    loaded = {"files": 0, "bytes": 0}
+    batch = []
+    validations = []
+    in_flight = asyncio.Semaphore(2 * (processes or os.cpu_count() or 1))
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(processes) as executor:
+        async def submit():
+            items = batch.copy()
+            batch.clear()
+            await in_flight.acquire()
+            validation = loop.run_in_executor(executor, validate_batch, items)
+            validation.add_done_callback(lambda _: in_flight.release())
+            validations.append(validation)
+
+        async def load_token(token: int):
+            path = os.path.join(Env.METADATA_FOLDER, f"{token}.json")
+            content, status = await source_storage.get(path)
+            if status == HTTPStatus.NOT_FOUND:
+                results["missing"].append(token)
+                return
+            if status != HTTPStatus.OK:
+                results["failed"].append(token)
+                return
+            loaded["files"] += 1
+            loaded["bytes"] += len(content)
+            batch.append((token, bytes(content)))
+            if len(batch) >= batch_size:
+                await submit()
+
+        await source_storage.connect()
+        try:
+            await for_each_token(concurrency, load_token)
+        finally:
+            await source_storage.close()
+        if batch:
+            await submit()
+        for token, error in chain.from_iterable(await asyncio.gather(*validations)):
+            if error is None:
+                results["valid"].append(token)
+            else:
+                results["invalid"].append(token)
+                errors[token] = error
+
+    elapsed = time.perf_counter() - started
+    statistics = {
+        "tokens": Env.MAX_TOKEN_ID,
+        "files": loaded["files"],
+        "bytes": loaded["bytes"],
+        "seconds": round(elapsed, 3),
+        "tokens_per_second": round(Env.MAX_TOKEN_ID / elapsed, 1),
+        "megabytes_per_second": round(loaded["bytes"] / elapsed / 1e6, 2)
+    }
+    return {result: sorted(tokens) for result, tokens in results.items()}, errors, statistics
+
+
+def print_errors(errors: dict[int, list[dict]]) -> None:
+    for token, token_errors in sorted(errors.items()):
+        for error in token_errors:
+            print(f"token {token}: {'.'.join(str(loc) for loc in error['loc']) or '<root>'}: {error['msg']}")
+
+
+def print_statistics(statistics: dict[str, float]) -> None:
+    print(f"Audited {statistics['tokens']} tokens ({statistics['files']} files, {statistics['bytes']} bytes) "
+          f"in {statistics['seconds']}s: {statistics['tokens_per_second']} tokens/s, "
+          f"{statistics['megabytes_per_second']} MB/s")
+
+
+def print_results(results: dict[str, list[int]]) -> None:
+    for result, tokens in results.items():
+        print(f"{len(tokens)} {result} metadata" + (f": {tokens}" if tokens and result != "valid" else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    scan_parser = commands.add_parser("scan",
+                                      help="validate existing metadata and record their digests "
+                                           "in the METADATA_MANIFEST file")
+    scan_parser.add_argument("--concurrency", type=int, default=Env.BULK_CONCURRENCY)
+    pack_parser = commands.add_parser("pack", help="build a metadata pack for pack storage from METADATA_FOLDER")
+    pack_parser.add_argument("--output", default=Env.METADATA_PACK, help="defaults to METADATA_PACK")
+    pack_parser.add_argument("--source",
+                             type=StorageType,
+                             choices=[storage_type.value for storage_type in StorageType
+                                      if storage_type != StorageType.Pack],
+                             default=StorageType.Local if Env.STORAGE_TYPE == StorageType.Pack else Env.STORAGE_TYPE,
+                             help="storage to load the metadata from, defaults to STORAGE_TYPE or local")
+    pack_parser.add_argument("--concurrency", type=int, default=Env.BULK_CONCURRENCY)
+    audit_parser = commands.add_parser("audit",
+                                       help="validate the metadata of every token in METADATA_FOLDER "
+                                            "with a pool of processes and report the invalid ones")
+    audit_parser.add_argument("--source",
+                              type=StorageType,
+                              choices=[storage_type.value for storage_type in StorageType],
+                              default=Env.STORAGE_TYPE,
+                              help="storage to load the metadata from, defaults to STORAGE_TYPE")
+    audit_parser.add_argument("--concurrency", type=int, default=Env.BULK_CONCURRENCY)
+    audit_parser.add_argument("--processes",
+                              type=int,
+                              help="number of worker processes, defaults to the number of CPUs")
+    audit_parser.add_argument("--batch-size", type=int, default=500, help="number of metadata sent to a worker at once")
+    args = parser.parse_args()
+
+    if args.command == "scan":
+        if not metadata_manifest.enabled:
+            parser.error("METADATA_MANIFEST environment variable is required")
+        print_results(asyncio.run(scan(args.concurrency)))
+        metadata_manifest.save()
+    elif args.command == "pack":
+        print_results(asyncio.run(pack(args.output, args.source, args.concurrency)))
+        metadata_manifest.save()
+    elif args.command == "audit":
+        results, errors, statistics = asyncio.run(audit(args.source, args.concurrency, args.processes, args.batch_size))
+        print_errors(errors)
+        print_results(results)
+        print_statistics(statistics)
+        if results["invalid"] or results["failed"]:
+            parser.exit(1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
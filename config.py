@@ -1,17 +1,43 @@
+from module.cache import LRUCache
 from module.env import Env
+from module.limit import ConcurrencyLimit
 from module.logger import logger
+from module.manifest import Manifest
+from module.metrics import register_cache, register_flight
+from module.pending import PendingTasks
 from module.schema.storage import StorageType
+from module.shared_cache import SharedCache
+from module.singleflight import SingleFlight
 from module.storage.local import LocalStorage
 from module.storage.main import Storage
+from module.storage.pack import PackStorage
 from module.storage.s3 import S3Storage
 from module.storage.pinata import PinataStorage
+from module.storage.tiered import TieredStorage
 
 Storage.register(StorageType.S3, S3Storage)
 Storage.register(StorageType.Local, LocalStorage)
 Storage.register(StorageType.Pinata, PinataStorage)
+Storage.register(StorageType.Pack, PackStorage)
+Storage.register(StorageType.Tiered, TieredStorage)
 storage = Storage(logger=logger,
                   storage=Env.STORAGE_TYPE,
                   config={
                       "access_key": Env.STORAGE_ACCESS_KEY,
                       "secret_key": Env.STORAGE_SECRET_KEY
                   })
+metadata_cache = LRUCache(max_size=Env.METADATA_CACHE_MAX_SIZE, ttl=Env.METADATA_CACHE_TTL)
+metadata_manifest = Manifest(Env.METADATA_MANIFEST, logger)
+shared_metadata_cache = SharedCache(Env.SHARED_CACHE_PATH,
+                                    Env.MAX_TOKEN_ID,
+                                    Env.SHARED_CACHE_SIZE,
+                                    logger,
+                                    ttl=Env.METADATA_CACHE_TTL)
+metadata_flight = SingleFlight()
+storage_writes = PendingTasks()
+bulk_loads = ConcurrencyLimit(Env.BULK_CONCURRENCY)
+
+register_cache("metadata", metadata_cache)
+register_flight("metadata", metadata_flight)
+if shared_metadata_cache.enabled:
+    register_cache("shared_metadata", shared_metadata_cache)
@@ -0,0 +1,95 @@
+"""Health controller module contains the logic behind the health check
+endpoints. Liveness only tells that the process is running, readiness
+also probes the storage, so a replica that can't reach its storage, or
+reaches it too slowly, stops receiving requests until it recovers.
+
+"""
+
+import asyncio
+import os
+import time
+from http import HTTPStatus
+from typing import Optional
+
+from config import storage
+from module.env import Env
+from module.logger import logger
+from module.singleflight import SingleFlight
+from module.warmup import cache_warm_up
+
+probe_flight = SingleFlight()
+last_probe: dict = {}
+
+
+def probe_path() -> str:
+    """Get the path checked by the storage probe, HEALTH_PROBE_PATH or
+    the metadata of token ID 1
+
+    Returns:
+        str: path of the probed file
+
+    """
+
+    return Env.HEALTH_PROBE_PATH or os.path.join(Env.METADATA_FOLDER, "1.json")
+
+
+async def probe_storage() -> dict:
+    """Check that the storage answers `ping` on the probe path within
+    HEALTH_PROBE_MAX_LATENCY. A ping skips the storage caches, e.g. the
+    disk cache of tiered storage, and a missing file still proves that
+    the storage is reachable. The result is reused for
+    HEALTH_PROBE_INTERVAL seconds, so the probe costs at most one
+    storage call per interval whatever the number of health checks.
+
+    Returns:
+        dict: "ready", "latency_ms" and "detail" of the probe
+
+    """
+
+    if last_probe and time.monotonic() - last_probe["checked_at"] < Env.HEALTH_PROBE_INTERVAL:
+        return last_probe["result"]
+    return await probe_flight.do("storage", _probe_storage)
+
+
+async def _probe_storage() -> dict:
+    path = probe_path()
+    started = time.perf_counter()
+    failure: Optional[str] = None
+    try:
+        response, status = await asyncio.wait_for(storage.ping(path), Env.HEALTH_PROBE_TIMEOUT)
+    except asyncio.TimeoutError:
+        failure = f"storage didn't answer within {Env.HEALTH_PROBE_TIMEOUT}s"
+    except Exception as err:
+        failure = f"storage probe failed: {err}"
+    latency = round((time.perf_counter() - started) * 1000, 1)
+
+    detail: Optional[str] = None
+    if failure:
+        detail = failure
+    elif status not in (HTTPStatus.OK, HTTPStatus.NOT_FOUND):
+        detail = "storage operation failed"
+    elif latency > Env.HEALTH_PROBE_MAX_LATENCY:
+        detail = f"storage latency is above {Env.HEALTH_PROBE_MAX_LATENCY}ms"
+    if detail:
+        logger.warning("Storage probe on %s failed in %sms: %s", path, latency, detail)
+
+    result = {"ready": detail is None, "latency_ms": latency, "detail": detail or "ok"}
+    last_probe.update(result=result, checked_at=time.monotonic())
+    return result
+
+
+async def ready() -> tuple[dict, HTTPStatus]:
+    """Check if the service is ready to serve requests. It's not ready
+    while the cache warms up, if WARM_UP_BLOCK_HEALTH is enabled, or if
+    the storage probe fails.
+
+    Returns:
+        tuple[dict, HTTPStatus]: Probe results and HTTP status code
+
+    """
+
+    if cache_warm_up.warming and Env.WARM_UP_BLOCK_HEALTH:
+        return {"ready": False, "detail": "warming up"}, HTTPStatus.SERVICE_UNAVAILABLE
+    probe = await probe_storage()
+    content = {"ready": probe["ready"], "storage": probe}
+    return content, HTTPStatus.OK if probe["ready"] else HTTPStatus.SERVICE_UNAVAILABLE
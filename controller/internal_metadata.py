@@ -5,14 +5,14 @@ endpoint.
 """
 
 import asyncio
-import json
-from copy import deepcopy
 from http import HTTPStatus
 
+from config import storage_writes
+from module import codec
 from module.env import Env
 from module.response import Response
-from module.schema.metadata import MetadataRequestBody
-from module.utils import get_metadata, update_metadata, save_metadata, create_backup
+from module.schema.metadata import MetadataRequestBody, MetadataUpdate
+from module.utils import get_metadata, get_raw_metadata, update_metadata, save_metadata, create_backup
 
 
 async def put(token: int, new_metadata: MetadataRequestBody) -> (dict, HTTPStatus):
@@ -34,7 +34,7 @@ async def put(token: int, new_metadata: MetadataRequestBody) -> (dict, HTTPStatu
     response, status = await get_metadata(token)
     if status != HTTPStatus.OK:
         return response, status
-    original_metadata = deepcopy(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+    original_metadata = codec.dumps(response)
     response, status = update_metadata(response, new_metadata, overwrite=True)
     if status != HTTPStatus.OK:
         return response, status
@@ -51,3 +51,80 @@ async def put(token: int, new_metadata: MetadataRequestBody) -> (dict, HTTPStatu
             return upload_response
 
     return response, status
+
+
+async def put_many(updates: list[MetadataUpdate]) -> (dict, HTTPStatus):
+    """Update metadata of many tokens controller. The updates run in
+    three phases: all tokens are loaded and patched, the original
+    metadata of every patched token is written to a single backup
+    file, then the patched metadata is saved. The storage operations
+    of the first and last phases run with at most BULK_CONCURRENCY
+    of them at once. Nothing is saved if the backup fails. The backup
+    and the saves run in one task that completes even if the request
+    is cancelled.
+
+    Args:
+        updates (list[MetadataUpdate]): Token IDs and metadata values to be updated.
+
+    Returns:
+        response (dict): Token ID to {"status": 200} or to the error
+            and HTTP status code, e.g. {"error": {"detail": "not found"}, "status": 404}
+        status (HTTPStatus): HTTP status code
+
+    """
+
+    if not updates:
+        return Response.VALUE_REQUIRED
+    if len(updates) > Env.BULK_UPDATE_MAX_TOKENS:
+        return Response.TOO_MANY_TOKENS
+    tokens = [update.token for update in updates]
+    if max(tokens) > Env.MAX_TOKEN_ID:
+        return Response.INVALID_TOKEN_ID
+    if len(set(tokens)) != len(tokens):
+        return Response.DUPLICATED_TOKEN_ID
+
+    semaphore = asyncio.Semaphore(Env.BULK_CONCURRENCY)
+    results = dict.fromkeys(tokens)
+    originals = {}
+    patched = {}
+
+    async def patch(update: MetadataUpdate):
+        new_metadata = update.patch.dict(exclude_unset=True)
+        if not new_metadata:
+            results[update.token] = _error(*Response.VALUE_REQUIRED)
+            return
+        async with semaphore:
+            response, status = await get_raw_metadata(update.token)
+        if status != HTTPStatus.OK:
+            results[update.token] = _error(response, status)
+            return
+        original_metadata = response
+        response, status = update_metadata(codec.loads(response), new_metadata, overwrite=True)
+        if status != HTTPStatus.OK:
+            results[update.token] = _error(response, status)
+            return
+        originals[update.token] = original_metadata
+        patched[update.token] = response
+
+    async def save(token: int):
+        async with semaphore:
+            response, status = await save_metadata(token, patched[token], overwrite=True)
+        results[token] = {"status": status} if status == HTTPStatus.OK else _error(response, status)
+
+    async def backup_and_save():
+        backup = b"{" + b",".join(b'"%d":%s' % (token, originals[token]) for token in patched) + b"}"
+        response, status = await create_backup(Env.METADATA_FOLDER, backup)
+        if status != HTTPStatus.OK:
+            for token in patched:
+                results[token] = _error(response, status)
+            return
+        await asyncio.gather(*(save(token) for token in patched))
+
+    await asyncio.gather(*(patch(update) for update in updates))
+    if patched:
+        await storage_writes.run(backup_and_save())
+    return results, HTTPStatus.OK
+
+
+def _error(response: dict, status: HTTPStatus) -> dict:
+    return {"error": response, "status": status}
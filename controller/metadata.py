@@ -3,20 +3,171 @@ It will be the logic behind the metadata endpoint
 
 """
 
+import asyncio
+from collections import deque
 from http import HTTPStatus
+from typing import AsyncIterator, Optional, Union
 
-from module.utils import get_metadata
+from config import bulk_loads
+from module import codec
+from module.cache import CachedDocument
+from module.compression import choose_encoding
+from module.env import Env
+from module.response import Response
+from module.timing import Span
+from module.utils import encode_document, get_metadata_document, get_raw_metadata
 
 
-async def get(token: int) -> tuple[dict, HTTPStatus]:
-    """Get metadata for a given token.
+async def get(token: int, if_none_match: Optional[str] = None) -> tuple[Union[CachedDocument, dict], HTTPStatus]:
+    """Get metadata for a given token. The metadata is returned
+    as the serialized JSON bytes that are kept in the storage, so
+    it can be sent to the client without encoding it again, along
+    with its ETag. The status is 304 Not Modified if the ETag
+    matches the If-None-Match header of the client.
 
     Args:
         token (int): Token to get metadata for.
+        if_none_match (Optional[str], optional): If-None-Match header value. Defaults to None.
 
     Returns:
-        tuple[dict, HTTPStatus]: Response data and HTTP status code.
+        tuple[Union[CachedDocument, dict], HTTPStatus]: Response data and HTTP status code.
 
     """
 
-    return await get_metadata(token)
+    return await get_metadata_document(token, if_none_match)
+
+
+def negotiate(document: CachedDocument, accept_encoding: Optional[str]) -> Optional[str]:
+    """Choose the content coding of a metadata document. Documents
+    smaller than COMPRESSION_MIN_SIZE are not compressed. The size of
+    a document whose content wasn't loaded is unknown, so it's not
+    compressed either.
+
+    Args:
+        document (CachedDocument): Metadata document.
+        accept_encoding (Optional[str]): Accept-Encoding header value.
+
+    Returns:
+        Optional[str]: Content coding, None to send the document as is.
+
+    """
+
+    if document.content is None or len(document.content) < Env.COMPRESSION_MIN_SIZE:
+        return None
+    return choose_encoding(accept_encoding)
+
+
+def is_weak_etag(document: CachedDocument, encoding: Optional[str], if_none_match: Optional[str]) -> bool:
+    """Check if the ETag of a response is weak, as it is for a compressed
+    body. A 304 for a document whose content wasn't loaded doesn't know
+    whether the body would be compressed, so it answers with the form of
+    the ETag the client sent, the one it got with its 200 response.
+
+    Args:
+        document (CachedDocument): Metadata document.
+        encoding (Optional[str]): Content coding from `negotiate`.
+        if_none_match (Optional[str]): If-None-Match header value.
+
+    Returns:
+        bool: True if the ETag is weak.
+
+    """
+
+    if encoding:
+        return True
+    if document.content is None and if_none_match:
+        return any(tag.strip() == f"W/{document.etag}" for tag in if_none_match.split(","))
+    return False
+
+
+def encode(token: int, document: CachedDocument, encoding: Optional[str]) -> bytes:
+    """Get the content of a metadata document in a content coding
+
+    Args:
+        token (int): Token of the metadata.
+        document (CachedDocument): Metadata document.
+        encoding (Optional[str]): Content coding from `negotiate`.
+
+    Returns:
+        bytes: Response body.
+
+    """
+
+    if encoding is None:
+        return document.content
+    with Span("encode"):
+        return encode_document(token, document, encoding)
+
+
+def parse_token_ids(ids: str) -> Union[tuple[list[int], HTTPStatus], Response]:
+    """Parse comma separated token IDs, e.g. "1,2,3". Duplicated
+    token IDs are removed and the order is kept.
+
+    Args:
+        ids (str): Comma separated token IDs.
+
+    Returns:
+        Union[tuple[list[int], HTTPStatus], Response]: Token IDs and HTTP status code.
+
+    """
+
+    tokens = {}
+    for token in ids.split(","):
+        try:
+            token = int(token.strip())
+        except ValueError:
+            return Response.INVALID_TOKEN_ID
+        if not 0 < token <= Env.MAX_TOKEN_ID:
+            return Response.INVALID_TOKEN_ID
+        tokens[token] = None
+
+    if len(tokens) > Env.BULK_READ_MAX_TOKENS:
+        return Response.TOO_MANY_TOKENS
+    return list(tokens), HTTPStatus.OK
+
+
+async def get_many(tokens: list[int]) -> AsyncIterator[bytes]:
+    """Get metadata for many tokens. At most BULK_CONCURRENCY tokens
+    are loaded from the storage at once by all the bulk requests of the
+    worker, and the result is streamed as a JSON object of token ID to
+    metadata in the requested order. A request keeps at most
+    BULK_CONCURRENCY loads ahead of the stream, so the memory stays flat
+    regardless of the number of tokens.
+    A token that fails to load is mapped to its error and HTTP
+    status code instead, e.g. {"error": {"detail": "not found"}, "status": 404}.
+
+    Args:
+        tokens (list[int]): Tokens to get metadata for.
+
+    Yields:
+        bytes: Chunks of the JSON object.
+
+    """
+
+    window = deque()
+    separator = b"{"
+    try:
+        for token in tokens:
+            window.append((token, asyncio.ensure_future(bulk_loads.run(get_raw_metadata, token))))
+            if len(window) < Env.BULK_CONCURRENCY:
+                continue
+            token, task = window.popleft()
+            yield separator + _encode_item(token, *await task)
+            separator = b","
+
+        while window:
+            token, task = window.popleft()
+            yield separator + _encode_item(token, *await task)
+            separator = b","
+    finally:
+        for _, task in window:  # The client went away before the end of the stream
+            task.cancel()
+
+    yield b"{}" if separator == b"{" else b"}"
+
+
+def _encode_item(token: int, response: Union[bytes, dict, list], status: HTTPStatus) -> bytes:
+    if status == HTTPStatus.OK:
+        return b'"%d":%s' % (token, response)
+    error = {"error": response, "status": status}
+    return b'"%d":%s' % (token, codec.dumps(error))
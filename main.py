@@ -1,29 +1,64 @@
-import uuid
-
 import uvicorn
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 
-from module.constant import CORRELATION_ID
+from config import metadata_manifest, storage, storage_writes
+from module import metrics
+from module.codec import JSONResponse
 from module.env import Env
+from module.logger import logger
+from module.middleware import CorrelationIdMiddleware, MetricsMiddleware, TimingMiddleware
+from module.warmup import cache_warm_up
 from routers.router import router
 
-app = FastAPI()
+app = FastAPI(default_response_class=JSONResponse)
+app.add_middleware(TimingMiddleware)
+app.add_middleware(CorrelationIdMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.on_event("startup")
+async def open_storage():
+    await storage.connect()
+
+
+@app.on_event("startup")
+async def start_manifest_saves():
+    metadata_manifest.start()
+
+
+@app.on_event("startup")
+async def warm_up_cache():
+    if Env.WARM_UP_CACHE:
+        cache_warm_up.start()
+
+
+@app.on_event("shutdown")
+async def stop_cache_warm_up():
+    await cache_warm_up.stop()
+
+
+@app.on_event("shutdown")
+async def complete_storage_writes():
+    if len(storage_writes):
+        logger.info("Wait for %s storage writes to complete", len(storage_writes))
+    pending = await storage_writes.drain(Env.SHUTDOWN_TIMEOUT)
+    if pending:
+        logger.error("%s storage writes didn't complete within %ss", pending, Env.SHUTDOWN_TIMEOUT)
+
+
+@app.on_event("shutdown")
+async def close_storage():
+    await storage.close()
+
 
+@app.on_event("shutdown")
+async def save_manifest():
+    await metadata_manifest.stop()
 
-@app.middleware("http")
-async def set_correlation_id(request: Request, call_next):
-    CORRELATION_ID.set(uuid.uuid4())
-    response = await call_next(request)
-    content = b""
-    async for chunk in response.body_iterator:
-        content += chunk
 
-    response.headers["correlation-id"] = f"{CORRELATION_ID.get()}"
-    return Response(content=content,
-                    headers=response.headers,
-                    media_type=response.media_type,
-                    status_code=response.status_code
-                    )
+@app.on_event("shutdown")
+async def close_metrics():
+    metrics.close()
 
 
 router(app)
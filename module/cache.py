@@ -0,0 +1,192 @@
+"""Cache module contains in-process caches that sit in front of the
+storage, so hot files are not fetched from the storage on every request.
+
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """Least recently used cache with a time-to-live. The capacity is
+    measured with the `sizeof` function (the length of the value in bytes
+    by default), so a few large entries can't blow the memory budget
+    the same way a fixed number of entries would.
+
+    """
+
+    def __init__(self, max_size: int, ttl: float = 0, sizeof: Callable[[Any], int] = len):
+        """Initialize the cache
+
+        Args:
+            max_size (int): maximum total size of the entries, 0 disables the cache
+            ttl (float, optional): seconds before an entry expires, 0 means never. Defaults to 0
+            sizeof (Callable[[Any], int], optional): function to measure an entry. Defaults to len
+
+        """
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0  # Bumped on every invalidation, see `delete`
+        self._entries: OrderedDict[Hashable, tuple[Any, int, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value from the cache and mark it as recently used
+
+        Args:
+            key (Hashable): cache key
+            default (Any, optional): value to return on a miss. Defaults to None
+
+        Returns:
+            Any: cached value or default
+
+        """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, _, expires_at = entry
+        if expires_at and expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float = None) -> bool:
+        """Put a value to the cache, evicting the least recently used
+        entries until it fits
+
+        Args:
+            key (Hashable): cache key
+            value (Any): value to cache
+            ttl (float, optional): override the default time-to-live. Defaults to None
+
+        Returns:
+            bool: False if the value is larger than the cache capacity
+
+        """
+
+        if key in self._entries:
+            self._remove(key)
+
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return False
+
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else 0
+        self._entries[key] = (value, size, expires_at)
+        self.size += size
+
+        while self.size > self.max_size:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+        return True
+
+    def delete(self, key: Hashable) -> None:
+        """Invalidate a cache entry. It also bumps the cache generation,
+        so a reader that fetched the value before the invalidation can
+        tell that it must not put the (possibly stale) value back.
+
+        Args:
+            key (Hashable): cache key
+
+        """
+
+        self.generation += 1
+        if key in self._entries:
+            self._remove(key)
+
+    def resize(self, key: Hashable) -> None:
+        """Measure an entry again after its value grew or shrank in
+        place, evicting the least recently used entries if the cache
+        doesn't fit anymore
+
+        Args:
+            key (Hashable): cache key
+
+        """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        value, size, expires_at = entry
+        new_size = self.sizeof(value)
+        if new_size > self.max_size:
+            self._remove(key)
+            return
+        self._entries[key] = (value, new_size, expires_at)
+        self.size += new_size - size
+        while self.size > self.max_size:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries from the cache"""
+
+        self.generation += 1
+        self._entries.clear()
+        self.size = 0
+
+    @property
+    def stats(self) -> dict:
+        """Cache counters"""
+
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
+
+
+class CachedDocument:
+    """Serialized document kept in a cache together with the ETag of
+    the storage version it was read from and its compressed variants.
+    Its length is the size of the content and of the variants, so it
+    can be measured by the default `sizeof` of `LRUCache`.
+
+    """
+
+    __slots__ = ("content", "etag", "stamp", "encodings")
+
+    def __init__(self, content: Optional[bytes], etag: str, stamp: int = 0):
+        """Initialize the document
+
+        Args:
+            content (Optional[bytes]): document content, None if it wasn't loaded. A document
+                that isn't cached may hold a view of the metadata pack instead
+            etag (str): quoted strong ETag of the content
+            stamp (int, optional): stamp of the shared cache entry, see `module.shared_cache`. Defaults to 0
+
+        """
+
+        self.content = content
+        self.etag = etag
+        self.stamp = stamp
+        self.encodings: dict[str, bytes] = {}  # Content coding to compressed content
+
+    def __len__(self) -> int:
+        return len(self.content or b"") + sum(len(content) for content in self.encodings.values())
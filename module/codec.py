@@ -0,0 +1,103 @@
+"""Codec module serializes and parses JSON for the utils, controllers
+and responses, so the whole service uses the same JSON engine. It uses
+the optional `orjson` package when it's installed and the standard
+`json` module otherwise.
+
+Both engines write non-ASCII characters as UTF-8 like
+`json.dumps(..., ensure_ascii=False)`, keep the key order of dicts and
+leave no whitespace between the items.
+
+orjson only handles integers within 64 bits, it parses larger ones as
+floats and refuses to serialize them, while the metadata schema accepts
+any integer. Documents with such integers fall back to the `json`
+module, so their values are kept exactly.
+
+"""
+
+import json
+import re
+from typing import Any, Callable, NamedTuple, Union
+
+from pydantic.json import pydantic_encoder
+from starlette.responses import JSONResponse as StarletteJSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JSONCodec(NamedTuple):
+    name: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[Union[bytes, str, memoryview]], Any]
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=pydantic_encoder).encode("utf-8")
+
+
+# A run of 19 digits may be an integer beyond 64 bits, e.g. in a number or
+# in a string. Either way the json module parses the document correctly.
+LONG_DIGITS = re.compile(rb"\d{19}")
+LONG_DIGITS_STR = re.compile(r"\d{19}")
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    try:
+        # Non-string keys, e.g. token IDs, are converted to strings like the json module does
+        return orjson.dumps(obj, default=pydantic_encoder, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:  # e.g. an integer beyond 64 bits
+        return _json_dumps(obj)
+
+
+def _json_loads(content: Union[bytes, str, memoryview]) -> Any:
+    # The json module doesn't read views, e.g. of the metadata pack
+    return json.loads(bytes(content) if isinstance(content, memoryview) else content)
+
+
+def _orjson_loads(content: Union[bytes, str, memoryview]) -> Any:
+    if (LONG_DIGITS_STR if isinstance(content, str) else LONG_DIGITS).search(content):
+        return _json_loads(content)
+    return orjson.loads(content)
+
+
+STDLIB = JSONCodec("json", _json_dumps, _json_loads)
+ORJSON = JSONCodec("orjson", _orjson_dumps, _orjson_loads) if orjson else None
+CODEC = ORJSON or STDLIB
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize an object to JSON. Pydantic models and the types
+    they support, e.g. datetime, are serialized like `BaseModel.json`.
+
+    Args:
+        obj (Any): object to serialize
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+
+    """
+
+    return CODEC.dumps(obj)
+
+
+def loads(content: Union[bytes, str, memoryview]) -> Any:
+    """Parse a JSON document
+
+    Args:
+        content (Union[bytes, str, memoryview]): UTF-8 encoded JSON
+
+    Returns:
+        Any: parsed object
+
+    """
+
+    return CODEC.loads(content)
+
+
+class JSONResponse(StarletteJSONResponse):
+    """JSON response rendered with the codec of the service"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,109 @@
+"""Compression module negotiates the content coding of a response with
+the Accept-Encoding header of the client and compresses the content.
+Gzip is always supported, Brotli is supported when the optional
+`brotli` package is installed.
+
+"""
+
+import gzip
+import zlib
+from typing import AsyncIterator, Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+GZIP = "gzip"
+BROTLI = "br"
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 9  # Compressed variants are cached, so a slower and denser quality pays off
+BROTLI_STREAM_QUALITY = 5  # Streams are compressed on every request
+
+ENCODINGS = (BROTLI, GZIP) if brotli else (GZIP,)  # In order of preference
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Choose the supported content coding that's the most preferred
+    by the client, e.g. "gzip, br;q=0.8" chooses "gzip".
+
+    Args:
+        accept_encoding (Optional[str]): Accept-Encoding header value
+
+    Returns:
+        Optional[str]: content coding, None to send the content as is
+
+    """
+
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for coding in accept_encoding.split(","):
+        coding, _, parameters = coding.partition(";")
+        weight = 1.0
+        parameter, _, value = parameters.partition("=")
+        if parameter.strip().lower() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    default = weights.get("*", 0.0)
+    chosen, chosen_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, default)
+        if weight > chosen_weight:
+            chosen, chosen_weight = encoding, weight
+    return chosen
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    """Compress content with a content coding
+
+    Args:
+        content (bytes): content to compress
+        encoding (str): content coding from `ENCODINGS`
+
+    Returns:
+        bytes: compressed content
+
+    """
+
+    if encoding == BROTLI:
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+async def compress_stream(chunks: AsyncIterator[bytes], encoding: Optional[str]) -> AsyncIterator[bytes]:
+    """Compress a stream of chunks without loading the whole content.
+    The compressor decides when to emit data, so small chunks are
+    coalesced instead of being flushed one by one.
+
+    Args:
+        chunks (AsyncIterator[bytes]): content to compress
+        encoding (Optional[str]): content coding from `ENCODINGS`, None to pass the chunks as is
+
+    Yields:
+        bytes: compressed chunks
+
+    """
+
+    if encoding is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    if encoding == BROTLI:
+        compressor = brotli.Compressor(quality=BROTLI_STREAM_QUALITY)
+        compress_chunk, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compress_chunk, finish = compressor.compress, compressor.flush
+
+    async for chunk in chunks:
+        compressed = compress_chunk(chunk)
+        if compressed:
+            yield compressed
+    yield finish()
@@ -5,7 +5,7 @@ Any environment variable should be stored here, so it's easy to keep track of it
 
 from typing import Optional, Literal
 
-from pydantic import BaseSettings, conint
+from pydantic import BaseSettings, confloat, conint
 
 from module.schema.storage import StorageType
 
@@ -16,16 +16,59 @@ class Settings(BaseSettings):
 
     """
 
+    BULK_CONCURRENCY: conint(gt=0) = 32  # Storage loads of the bulk reads of a worker, and operations of a bulk update, at once
+    BULK_READ_MAX_TOKENS: conint(gt=0) = 1000
+    BULK_UPDATE_MAX_TOKENS: conint(gt=0) = 10000
+    COMPRESSION_MIN_SIZE: conint(ge=0) = 1024  # In bytes, smaller metadata is sent uncompressed
+    HEALTH_PROBE_INTERVAL: conint(ge=0) = 5  # In seconds a storage probe result is reused by GET /health/ready
+    HEALTH_PROBE_MAX_LATENCY: conint(gt=0) = 500  # In milliseconds, a slower storage probe marks the service not ready
+    HEALTH_PROBE_PATH: Optional[str]  # File checked by the storage probe, defaults to the metadata of token ID 1
+    HEALTH_PROBE_TIMEOUT: conint(gt=0) = 2  # In seconds
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    LOG_SAMPLE_RATE: confloat(ge=0, le=1) = 1  # Fraction of INFO logs that are written, warnings are always written
     LOGGING_LEVEL: Optional[str]
     MAX_TOKEN_ID: conint(gt=0)
+    METADATA_CACHE_CONTROL: str = "public, max-age=60"  # Cache-Control of GET /metadata/{token}, empty to omit
+    METADATA_CACHE_MAX_SIZE: conint(ge=0) = 64 * 1024 * 1024  # In bytes, 0 disables the cache
+    METADATA_CACHE_TTL: conint(ge=0) = 60  # In seconds, 0 means entries never expire
     METADATA_FOLDER: Optional[str]
+    METADATA_MANIFEST: Optional[str]  # Path of the digest manifest, enables serving metadata without parsing it
+    METADATA_PACK: str = "metadata.pack"  # Path of the pack file read by pack storage
+    PINATA_CID_CACHE_SIZE: conint(ge=0) = 10000  # In entries, 0 disables the cache
+    PINATA_CID_CACHE_TTL: conint(ge=0) = 60  # In seconds, 0 means entries never expire
+    PINATA_CID_NEGATIVE_CACHE_TTL: conint(ge=0) = 30  # In seconds, 0 disables caching missing files
+    PINATA_CONNECTION_LIMIT: conint(ge=0) = 100  # 0 means no limit
+    PINATA_CONNECTION_LIMIT_PER_HOST: conint(ge=0) = 50  # 0 means no limit
+    PINATA_DNS_CACHE_TTL: conint(gt=0) = 300  # In seconds
     PINATA_GATEWAY: Optional[str]
+    PINATA_KEEPALIVE_TIMEOUT: conint(gt=0) = 30  # In seconds
     PRODUCTION: Optional[Literal["true"]]
+    PROFILE_DIR: str = "profiles"  # Directory of the profiles of slow requests
+    PROFILE_SAMPLE_RATE: confloat(ge=0, le=1) = 0.01  # Fraction of requests profiled when PROFILE_SLOW_REQUESTS is set
+    PROFILE_SLOW_REQUESTS: conint(ge=0) = 0  # In milliseconds, save the profile of slower requests, 0 disables it
     S3_BUCKET_NAME: Optional[str]
+    S3_ENDPOINT_URL: Optional[str]
+    S3_MAX_POOL_CONNECTIONS: conint(gt=0) = 50
     SECRET_KEY: str
+    SERVER_BACKLOG: conint(gt=0) = 2048  # Connections waiting to be accepted, capped by net.core.somaxconn
+    SERVER_KEEP_ALIVE_TIMEOUT: conint(gt=0) = 5  # In seconds an idle keep-alive connection stays open
+    SERVER_LIMIT_CONCURRENCY: Optional[conint(gt=0)]  # Connections per worker before responding 503, no limit if unset
+    SERVER_TIMING: bool = False  # Send the time spent in each step of a request in the Server-Timing header
+    SERVER_WORKERS: Optional[conint(gt=0)]  # Worker processes of serve.py, defaults to the CPU count
+    SHARED_CACHE_PATH: Optional[str]  # Memory mapped metadata cache shared by the workers, disabled if unset
+    SHARED_CACHE_SIZE: conint(gt=0) = 256 * 1024 * 1024  # In bytes of metadata in the shared cache
+    SHUTDOWN_TIMEOUT: conint(ge=0) = 30  # In seconds to wait for storage writes in progress on shutdown
     STORAGE_ACCESS_KEY: Optional[str] = ""
     STORAGE_SECRET_KEY: Optional[str] = ""
     STORAGE_TYPE: StorageType
+    TIERED_CACHE_DIR: str = ".tiered-cache"  # Directory of the local disk cache of tiered storage
+    TIERED_CACHE_MAX_AGE: conint(ge=0) = 300  # In seconds before a cached file is revalidated, 0 always revalidates
+    TIERED_CACHE_MAX_SIZE: conint(gt=0) = 1024 * 1024 * 1024  # In bytes
+    TIERED_REMOTE_STORAGE: StorageType = StorageType.S3  # Storage behind the disk cache of tiered storage
+    VALIDATE_INTERNAL_CALLS: bool = False  # Validate arguments of internal calls, not only requests
+    WARM_UP_BLOCK_HEALTH: bool = True  # GET /health is unavailable until the cache warm-up is done
+    WARM_UP_CACHE: bool = False  # Load every token into the metadata cache on startup
+    WARM_UP_CONCURRENCY: conint(gt=0) = 32  # Tokens loaded at once during the cache warm-up
     PORT: Optional[int] = 3000
 
 
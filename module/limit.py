@@ -0,0 +1,49 @@
+"""Limit module bounds the calls running at once across every request
+of a worker, e.g. the storage loads of the bulk read endpoint, so many
+concurrent bulk requests don't overload the storage backend.
+
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+
+class ConcurrencyLimit:
+    """At most `limit` calls run at once, the others wait for a slot in
+    the order they arrived. `in_flight` counts the calls running.
+
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def run(self, function: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """Call `function` with `args` once a slot is free and return its result
+
+        Args:
+            function (Callable[..., Awaitable[Any]]): function returning the awaitable to run
+            *args (Any): arguments of the function
+
+        Returns:
+            Any: result of the call
+
+        """
+
+        async with self._get_semaphore():
+            self.in_flight += 1
+            try:
+                return await function(*args)
+            finally:
+                self.in_flight -= 1
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # On Python 3.9 a semaphore is bound to the event loop it's created in,
+        # so it's created in the running loop instead of when the module is imported
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.limit)
+            self._loop = loop
+        return self._semaphore
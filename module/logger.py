@@ -2,11 +2,22 @@
 https://dddinpython.com/index.php/2021/09/02/request-logging-how-to/ as
 an attempt to create a traceable log in Python using correlation ID.
 
+Records are put on a queue by the event loop and written by a listener
+thread, so a slow stderr doesn't block the requests. INFO records can be
+sampled with LOG_SAMPLE_RATE, warnings and errors are always kept.
+
 """
 
+import atexit
+import json
 import logging
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 
 from module.constant import CORRELATION_ID
+from module.env import Env
 
 
 class ContextFilter(logging.Filter):
@@ -15,14 +26,49 @@ class ContextFilter(logging.Filter):
         return True
 
 
+class SamplingFilter(logging.Filter):
+    """Keep a random fraction of the records at INFO level or below"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.INFO or self.rate >= 1 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as a JSON object on a single line"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "correlation_id": str(record.correlation_id),
+            "location": f"{record.filename}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
 logger = logging.getLogger("app")
 logger.setLevel(logging.INFO)
 
-formatter = logging.Formatter(
-    "%(asctime)s %(levelname)-8s %(correlation_id)s [%(filename)s:%(lineno)d] %(message)s"
-)
+if Env.LOG_FORMAT == "json":
+    formatter = JsonFormatter()
+else:
+    formatter = logging.Formatter(
+        "%(asctime)s %(levelname)-8s %(correlation_id)s [%(filename)s:%(lineno)d] %(message)s"
+    )
 
 handler = logging.StreamHandler()
 handler.setFormatter(formatter)
-logger.addHandler(handler)
+listener = QueueListener(queue.SimpleQueue(), handler)
+listener.start()
+atexit.register(listener.stop)  # Write the records left in the queue
+
+logger.addHandler(QueueHandler(listener.queue))
+logger.addFilter(SamplingFilter(Env.LOG_SAMPLE_RATE))
 logger.addFilter(ContextFilter())
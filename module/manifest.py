@@ -0,0 +1,199 @@
+"""Manifest module keeps the digest of every metadata file that's known
+to be valid, so a file whose content still matches its digest can be
+served without parsing it again. The digests are stamped when metadata
+is saved and by the offline `python cli.py scan` command for files that
+already exist in the storage.
+
+The manifest is stamped with the version of the metadata schema. When
+the schema changes, `SCHEMA_VERSION` must be bumped, which makes every
+digest of an older manifest untrusted until the files are scanned again.
+
+The workers of `serve.py` share the manifest file. A worker saves the
+digests it stamped every SAVE_INTERVAL seconds and on shutdown, merged
+with the file under a lock, so it doesn't overwrite the digests saved by
+the other workers and picks them up.
+
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from module.schema.metadata import SCHEMA_VERSION
+
+
+class Manifest:
+    """Digests of validated metadata keyed by token ID. A manifest
+    without a path is disabled and never trusts any content.
+
+    """
+
+    SAVE_INTERVAL = 60  # Seconds between saves of the stamped digests
+
+    def __init__(self, path: Optional[str], logger: logging.Logger, schema_version: int = SCHEMA_VERSION):
+        """Initialize the manifest and load it from the path if the file exists
+
+        Args:
+            path (Optional[str]): path of the manifest file, None disables the manifest
+            logger (logging.Logger): logger object
+            schema_version (int, optional): current metadata schema version. Defaults to SCHEMA_VERSION
+
+        """
+
+        self.path = path
+        self.logger = logger
+        self.schema_version = schema_version
+        self.digests: dict[int, str] = {}
+        self.changed: set[int] = set()  # Tokens stamped since the manifest was saved
+        self.task: Optional[asyncio.Task] = None
+        if path and os.path.isfile(path):
+            self.load()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    @staticmethod
+    def digest(content: bytes) -> str:
+        """Get the digest of a metadata content
+
+        Args:
+            content (bytes): metadata content
+
+        Returns:
+            str: hex digest
+
+        """
+
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    def is_trusted(self, token: int, content: bytes) -> bool:
+        """Check if a metadata content was validated before
+
+        Args:
+            token (int): token ID
+            content (bytes): metadata content
+
+        Returns:
+            bool: True if the content matches the digest stamped for the token
+
+        """
+
+        digest = self.digests.get(token)
+        return digest is not None and digest == self.digest(content)
+
+    def stamp(self, token: int, content: bytes) -> None:
+        """Record the digest of a validated metadata content
+
+        Args:
+            token (int): token ID
+            content (bytes): validated metadata content
+
+        """
+
+        if self.enabled:
+            self.digests[token] = self.digest(content)
+            self.changed.add(token)
+
+    def load(self) -> None:
+        """Load the manifest file. A manifest of another schema version is ignored"""
+
+        digests = self._read()
+        if digests is None:
+            return
+        self.digests = digests
+        self.logger.info("Loaded %s digests from metadata manifest %s", len(self.digests), self.path)
+
+    def _read(self) -> Optional[dict[int, str]]:
+        try:
+            with open(self.path) as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as err:
+            self.logger.error("Failed to load metadata manifest %s. Error: %s", self.path, str(err))
+            return None
+
+        if manifest.get("schema_version") != self.schema_version:
+            self.logger.warning("Ignore metadata manifest %s of schema version %s, the current version is %s",
+                                self.path,
+                                manifest.get("schema_version"),
+                                self.schema_version)
+            return None
+        return {int(token): digest for token, digest in manifest.get("digests", {}).items()}
+
+    def save(self) -> None:
+        """Write the digests stamped since the last save to the manifest
+        file, merged with the digests saved by other processes, e.g. the
+        other workers of `serve.py`. The merge runs under a lock and the
+        file is replaced atomically, so a reader never sees a partially
+        written manifest.
+
+        """
+
+        if not self.enabled:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        temporary_path = None
+        try:
+            with self._lock():
+                digests = self._read() or {}
+                digests.update((token, self.digests[token]) for token in self.changed)
+                manifest = {"schema_version": self.schema_version,
+                            "digests": {str(token): digest for token, digest in sorted(digests.items())}}
+                with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False) as file:
+                    temporary_path = file.name
+                    json.dump(manifest, file)
+                os.replace(temporary_path, self.path)
+        except OSError as err:
+            self.logger.error("Failed to save metadata manifest %s. Error: %s", self.path, str(err))
+            if temporary_path and os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+        self.digests = digests
+        self.changed.clear()
+        self.logger.info("Saved %s digests to metadata manifest %s", len(self.digests), self.path)
+
+    def start(self) -> None:
+        """Save the stamped digests every SAVE_INTERVAL seconds in the background"""
+
+        if self.enabled:
+            self.task = asyncio.ensure_future(self._save_periodically())
+
+    async def stop(self) -> None:
+        """Stop the periodic saves and save the digests stamped since the last one"""
+
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.changed:
+            self.save()
+
+    async def _save_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.SAVE_INTERVAL)
+            if self.changed:
+                self.save()
+
+    @contextlib.contextmanager
+    def _lock(self) -> Iterator[None]:
+        if fcntl is None:  # pragma: no cover
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
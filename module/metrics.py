@@ -0,0 +1,232 @@
+"""Metrics module defines the Prometheus metrics exposed by GET /metrics.
+
+Request and storage operation latencies are observed when they happen.
+Cache and single-flight counters are already kept by the caches and
+`SingleFlight`, so they are read when the metrics are scraped instead of
+being updated on every request.
+
+When PROMETHEUS_MULTIPROC_DIR is set, as `serve.py` does, every worker
+writes its metrics to files in that directory and a scrape sums those
+of all the workers. The cache and single-flight counters are copied to
+the files at most once per SYNC_INTERVAL, after a request. The gauges
+of the caches, e.g. their entries, are reported per worker with a `pid`
+label.
+
+"""
+
+import functools
+import os
+import time
+from http import HTTPStatus
+from typing import Callable, Iterator, Union
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from module.cache import LRUCache
+from module.shared_cache import SharedCache
+from module.singleflight import SingleFlight
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+SYNC_INTERVAL = 1  # Seconds between copies of the cache counters in multiprocess mode
+
+registry = CollectorRegistry(auto_describe=True)
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds",
+                            "Latency of HTTP requests",
+                            ["method", "route", "status"],
+                            registry=registry)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight",
+                           "Number of HTTP requests being served",
+                           multiprocess_mode="livesum",
+                           registry=registry)
+STORAGE_LATENCY = Histogram("storage_operation_duration_seconds",
+                            "Latency of storage operations",
+                            ["backend", "operation"],
+                            buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10),
+                            registry=registry)
+STORAGE_ERRORS = Counter("storage_operation_errors",
+                         "Number of storage operations that failed",
+                         ["backend", "operation"],
+                         registry=registry)
+
+
+def timed_storage_operation(backend: str, operation: str) -> Callable:
+    """Decorator that observes the latency of an async storage operation
+    returning a (response, status) tuple. An operation that raises an
+    exception or returns a 5xx status is counted as an error, a missing
+    file isn't.
+
+    Args:
+        backend (str): storage type, e.g. "s3"
+        operation (str): operation name, e.g. "get"
+
+    Returns:
+        Callable: decorator
+
+    """
+
+    def decorator(function: Callable) -> Callable:
+        latency = STORAGE_LATENCY.labels(backend, operation)
+        errors = STORAGE_ERRORS.labels(backend, operation)
+
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                response = await function(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                latency.observe(time.perf_counter() - started)
+            if response[1] >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                errors.inc()
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+class StateCollector(Collector):
+    """Collect the counters of the registered caches and single-flight
+    groups when the metrics are scraped
+
+    """
+
+    def __init__(self):
+        self.caches: dict[str, Union[LRUCache, SharedCache]] = {}
+        self.flights: dict[str, SingleFlight] = {}
+        self.metrics: dict[str, Union[Counter, Gauge]] = {}  # Copies of the metrics in multiprocess mode
+        self.synced: dict[tuple, float] = {}  # Counter values already copied
+        self.synced_at = 0.0
+
+    def collect(self) -> Iterator:
+        hits = CounterMetricFamily("cache_hits", "Number of cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Number of cache misses", labels=["cache"])
+        evictions = CounterMetricFamily("cache_evictions", "Number of evicted cache entries", labels=["cache"])
+        entries = GaugeMetricFamily("cache_entries", "Number of cache entries", labels=["cache"])
+        size = GaugeMetricFamily("cache_size", "Size of the cache entries, in bytes for the metadata cache",
+                                 labels=["cache"])
+        hit_ratio = GaugeMetricFamily("cache_hit_ratio", "Ratio of cache hits since the service started",
+                                      labels=["cache"])
+        for name, cache in self.caches.items():
+            lookups = cache.hits + cache.misses
+            hit_ratio.add_metric([name], cache.hits / lookups if lookups else 0)
+            hits.add_metric([name], cache.hits)
+            misses.add_metric([name], cache.misses)
+            evictions.add_metric([name], cache.evictions)
+            entries.add_metric([name], len(cache))
+            size.add_metric([name], cache.size)
+        yield from (hits, misses, evictions, entries, size, hit_ratio)
+
+        calls = CounterMetricFamily("singleflight_calls", "Number of calls made", labels=["flight"])
+        coalesced = CounterMetricFamily("singleflight_coalesced",
+                                        "Number of calls that shared the result of a call in flight",
+                                        labels=["flight"])
+        for name, flight in self.flights.items():
+            calls.add_metric([name], flight.calls)
+            coalesced.add_metric([name], flight.coalesced)
+        yield from (calls, coalesced)
+
+    def sync(self, force: bool = False) -> None:
+        """Copy the collected metrics to the multiprocess metrics files,
+        a counter is increased by its change since the previous copy
+
+        Args:
+            force (bool, optional): copy even if the previous copy is less
+                than SYNC_INTERVAL old. Defaults to False
+
+        """
+
+        now = time.monotonic()
+        if not force and now - self.synced_at < SYNC_INTERVAL:
+            return
+        self.synced_at = now
+        for family in self.collect():
+            for sample in family.samples:
+                labels = tuple(sample.labels.values())
+                if family.name not in self.metrics:
+                    if family.type == "counter":
+                        metric = Counter(family.name, family.documentation, list(sample.labels), registry=None)
+                    else:
+                        metric = Gauge(family.name, family.documentation, list(sample.labels),
+                                       multiprocess_mode="liveall", registry=None)
+                    self.metrics[family.name] = metric
+                metric = self.metrics[family.name].labels(*labels)
+                if family.type == "counter":
+                    previous = self.synced.get((family.name, labels), 0)
+                    metric.inc(sample.value - previous)
+                    self.synced[family.name, labels] = sample.value
+                else:
+                    metric.set(sample.value)
+
+
+state_collector = StateCollector()
+if not MULTIPROCESS:
+    registry.register(state_collector)
+
+
+def sync_state() -> None:
+    """Copy the cache and single-flight counters to the multiprocess
+    metrics files, at most once per SYNC_INTERVAL. It does nothing when
+    the service runs in a single process.
+
+    """
+
+    if MULTIPROCESS:
+        state_collector.sync()
+
+
+def scrape_registry() -> CollectorRegistry:
+    """Get the registry to expose, in multiprocess mode it collects the
+    metrics of every worker from PROMETHEUS_MULTIPROC_DIR
+
+    Returns:
+        CollectorRegistry: registry of the metrics
+
+    """
+
+    if not MULTIPROCESS:
+        return registry
+    state_collector.sync(force=True)
+    collected = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected)
+    return collected
+
+
+def close() -> None:
+    """Copy the last counters of the worker and drop its live gauges on
+    shutdown in multiprocess mode
+
+    """
+
+    if MULTIPROCESS:
+        state_collector.sync(force=True)
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def register_cache(name: str, cache: Union[LRUCache, SharedCache]) -> None:
+    """Expose the counters of a cache, e.g. hits and misses
+
+    Args:
+        name (str): value of the "cache" label
+        cache (Union[LRUCache, SharedCache]): cache object
+
+    """
+
+    state_collector.caches[name] = cache
+
+
+def register_flight(name: str, flight: SingleFlight) -> None:
+    """Expose the counters of a single-flight group
+
+    Args:
+        name (str): value of the "flight" label
+        flight (SingleFlight): single-flight object
+
+    """
+
+    state_collector.flights[name] = flight
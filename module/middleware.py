@@ -0,0 +1,178 @@
+"""Middleware module contains pure ASGI middlewares that wrap the
+application. They don't buffer the response body, so the chunks
+produced by the endpoint are streamed to the client untouched.
+
+"""
+
+import cProfile
+import os
+import random
+import time
+import uuid
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from module.constant import CORRELATION_ID
+from module.env import Env
+from module.logger import logger
+from module.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, sync_state
+from module.timing import TIMINGS, server_timing
+
+
+class CorrelationIdMiddleware:
+    """Assign a correlation ID to every HTTP request and return it
+    to the client in the `correlation-id` response header
+
+    """
+
+    header = "correlation-id"
+
+    def __init__(self, app: ASGIApp):
+        """Initialize the middleware
+
+        Args:
+            app (ASGIApp): ASGI application to wrap
+
+        """
+
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = uuid.uuid4()
+        CORRELATION_ID.set(correlation_id)
+
+        async def send_with_correlation_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(self.header, f"{correlation_id}")
+            await send(message)
+
+        await self.app(scope, receive, send_with_correlation_id)
+
+
+class MetricsMiddleware:
+    """Observe the latency of every HTTP request by route template,
+    e.g. "/metadata/{token}", so the number of label values is bounded
+    by the number of routes. Requests that don't match any route are
+    labelled "unmatched".
+
+    """
+
+    def __init__(self, app: ASGIApp):
+        """Initialize the middleware
+
+        Args:
+            app (ASGIApp): ASGI application to wrap
+
+        """
+
+        self.app = app
+        self.routes = None
+
+    def route(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self.routes is None:
+            self.routes = {route.endpoint: route.path for route in scope["app"].routes}
+        return self.routes.get(endpoint, "unmatched")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            REQUEST_LATENCY.labels(scope["method"], self.route(scope), status_code).observe(
+                time.perf_counter() - started)
+            sync_state()
+
+
+class TimingMiddleware:
+    """Record the spans of every request (see `module.timing`) and send
+    them in the `Server-Timing` response header when SERVER_TIMING is
+    enabled.
+
+    When PROFILE_SLOW_REQUESTS is set, a sample of the requests is
+    profiled with cProfile and the profile of a request slower than the
+    threshold is saved to PROFILE_DIR, named after its correlation ID.
+    The profiler sees the whole event loop, so a profile also includes
+    the requests that ran at the same time. One request is profiled at
+    a time.
+
+    """
+
+    def __init__(self, app: ASGIApp):
+        """Initialize the middleware
+
+        Args:
+            app (ASGIApp): ASGI application to wrap
+
+        """
+
+        self.app = app
+        self.profiling = False
+
+    def start_profile(self):
+        if (not Env.PROFILE_SLOW_REQUESTS or self.profiling or
+                random.random() >= Env.PROFILE_SAMPLE_RATE):
+            return None
+        self.profiling = True
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stop_profile(self, profile: cProfile.Profile, scope: Scope, elapsed: float) -> None:
+        profile.disable()
+        self.profiling = False
+        if elapsed * 1000 < Env.PROFILE_SLOW_REQUESTS:
+            return
+        try:
+            os.makedirs(Env.PROFILE_DIR, exist_ok=True)
+            path = os.path.join(Env.PROFILE_DIR, f"{int(time.time())}-{CORRELATION_ID.get()}.prof")
+            profile.dump_stats(path)
+            logger.warning("Request %s %s took %.1fms, profile saved to %s", scope["method"], scope["path"],
+                           elapsed * 1000, path)
+        except OSError as err:
+            logger.error("Failed to save profile of a slow request. Error: %s", str(err))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not (Env.SERVER_TIMING or Env.PROFILE_SLOW_REQUESTS):
+            await self.app(scope, receive, send)
+            return
+
+        timings = {}
+        TIMINGS.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_server_timing(message: Message) -> None:
+            if message["type"] == "http.response.start" and Env.SERVER_TIMING:
+                timings["total"] = time.perf_counter() - started
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(timings))
+            await send(message)
+
+        profile = self.start_profile()
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            if profile is not None:
+                self.stop_profile(profile, scope, time.perf_counter() - started)
@@ -0,0 +1,52 @@
+"""Pending module keeps track of storage writes in progress, so the
+service can wait for them on shutdown before the storage is closed. A
+write runs in its own task, so a cancelled request, e.g. when the client
+disconnects, doesn't leave the metadata saved without its backup.
+
+"""
+
+import asyncio
+from typing import Any, Awaitable
+
+
+class PendingTasks:
+    """Set of tasks that must complete before the service stops"""
+
+    def __init__(self):
+        self._tasks: set[asyncio.Future] = set()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def run(self, awaitable: Awaitable[Any]) -> Any:
+        """Run an awaitable in a tracked task and return its result.
+        Cancelling the caller doesn't cancel the task.
+
+        Args:
+            awaitable (Awaitable[Any]): awaitable to run, e.g. a storage write
+
+        Returns:
+            Any: result of the awaitable
+
+        """
+
+        task = asyncio.ensure_future(awaitable)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(task)
+
+    async def drain(self, timeout: float) -> int:
+        """Wait for the tasks in progress to complete
+
+        Args:
+            timeout (float): maximum number of seconds to wait
+
+        Returns:
+            int: number of tasks that didn't complete in time
+
+        """
+
+        if not self._tasks:
+            return 0
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        return len(pending)
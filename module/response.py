@@ -19,9 +19,13 @@ class Response(tuple, Enum):
 
     """
 
+    DUPLICATED_TOKEN_ID = _message("duplicated token ID", HTTPStatus.BAD_REQUEST)
     FILE_EXISTS = _message("file already exists", HTTPStatus.CONFLICT)
     INVALID_TOKEN = _message("invalid token", HTTPStatus.UNAUTHORIZED)
+    INVALID_TOKEN_ID = _message("invalid token ID", HTTPStatus.UNPROCESSABLE_ENTITY)
     NOT_FOUND = _message("not found", HTTPStatus.NOT_FOUND)
     OK = _message("success", HTTPStatus.OK)
     STORAGE_OPERATION_FAIL = _message("fail to run operation on storage", HTTPStatus.INTERNAL_SERVER_ERROR)
+    TOO_MANY_TOKENS = _message("too many token IDs", HTTPStatus.BAD_REQUEST)
     VALUE_REQUIRED = _message("value required", HTTPStatus.BAD_REQUEST)
+    WARMING_UP = _message("warming up", HTTPStatus.SERVICE_UNAVAILABLE)
@@ -7,7 +7,11 @@ https://docs.opensea.io/docs/metadata-standards#metadata-structure
 
 from typing import Optional, Union
 
-from pydantic import BaseModel, AnyUrl, constr, StrictBool, StrictFloat, StrictInt
+from pydantic import BaseModel, AnyUrl, conint, constr, StrictBool, StrictFloat, StrictInt
+
+from module import codec
+
+SCHEMA_VERSION = 1  # Bump it on any change of the Metadata schema, see `module.manifest`
 
 
 class Attribute(BaseModel):
@@ -30,6 +34,7 @@ class Metadata(BaseModel):
 
     class Config:
         extra = "allow"
+        json_loads = codec.loads  # parse_raw parses with the JSON codec of the service
 
 class MetadataRequestBody(Metadata):
     """Schema for metadata request body. It inherits
@@ -39,3 +44,10 @@ class MetadataRequestBody(Metadata):
 
     name: Optional[constr(min_length=1, strip_whitespace=True)]
     image_url: Optional[AnyUrl]
+
+
+class MetadataUpdate(BaseModel):
+    """Schema for one item of the bulk metadata update request body"""
+
+    token: conint(gt=0)
+    patch: MetadataRequestBody
@@ -23,6 +23,8 @@ class StorageType(str, Enum):
     S3 = "s3"
     Local = "local"
     Pinata = "pinata"
+    Pack = "pack"
+    Tiered = "tiered"
 
 
 class Configuration(BaseModel):
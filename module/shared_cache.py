@@ -0,0 +1,268 @@
+"""Shared cache module keeps validated metadata in a memory mapped file
+shared by the worker processes of `serve.py`, so a token loaded by one
+worker is served by the others without reading the storage again and
+without a copy per worker. Put the file on a memory filesystem, e.g.
+`/dev/shm`, so it's never written to disk.
+
+The file has a header, a slot per token ID from 1 to MAX_TOKEN_ID and
+a data area where the entries are appended:
+
+    header  magic | max token | data size | used bytes | entries
+    slot    sequence | expiry time | data offset | length | ETag length
+    data    ETag + content of each entry, one after another
+
+Reads don't take any lock. Each slot is a sequence lock: a writer makes
+its sequence odd, updates the slot and makes it even again, so a reader
+that sees the sequence change while it copies an entry retries. Writes
+are serialized between processes with `flock`. An entry is never
+rewritten in place, a new version is appended and the old one becomes
+garbage. When the data area is full every entry is dropped and it's
+filled again from the start.
+
+"""
+
+import contextlib
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+MAGIC = b"MDSHM001"
+HEADER = struct.Struct("<8sQQQQ")  # Magic, max token ID, data size, used bytes, entries
+SLOT = struct.Struct("<QdQII")  # Sequence, expiry time, data offset, length, ETag length
+SEQUENCE = struct.Struct("<Q")
+FIELDS = struct.Struct("<dQII")  # The slot without its sequence
+INDEX_OFFSET = 64
+READ_ATTEMPTS = 3
+
+
+class SharedCache:
+    """Metadata cache in a memory mapped file keyed by token ID. A cache
+    without a path is disabled, it never has an entry and accepts every
+    write, so the callers don't need to check whether it's enabled.
+
+    The sequence of a slot is also the stamp of its entry. A worker can
+    keep a copy of an entry in its own cache and check with `stamp`
+    that no worker updated the token since.
+
+    """
+
+    def __init__(self, path: Optional[str], max_token: int, data_size: int, logger: logging.Logger, ttl: float = 0):
+        """Initialize the cache and map the file, creating it if it
+        doesn't exist or if its layout doesn't match the settings
+
+        Args:
+            path (Optional[str]): path of the shared file, None disables the cache
+            max_token (int): largest token ID
+            data_size (int): size of the data area in bytes
+            logger (logging.Logger): logger object
+            ttl (float, optional): seconds before an entry expires, 0 means never. Defaults to 0
+
+        """
+
+        self.path = path
+        self.max_token = max_token
+        self.data_size = data_size
+        self.logger = logger
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.fd = None
+        self.mmap = None
+        self.data_offset = INDEX_OFFSET + (max_token + 1) * SLOT.size
+        if path:
+            self.open()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mmap is not None
+
+    def __len__(self) -> int:
+        return HEADER.unpack_from(self.mmap, 0)[4] if self.mmap is not None else 0
+
+    @property
+    def size(self) -> int:
+        """Bytes used in the data area, including the garbage of replaced entries"""
+
+        return HEADER.unpack_from(self.mmap, 0)[3] if self.mmap is not None else 0
+
+    def open(self) -> None:
+        """Map the shared file. The first process creates it, the other
+        processes check that it has the same layout and map it.
+
+        """
+
+        if fcntl is None:  # pragma: no cover
+            self.logger.error("Shared cache %s is disabled, it requires fcntl", self.path)
+            return
+        total_size = self.data_offset + self.data_size
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._lock():
+            header = os.pread(self.fd, HEADER.size, 0).ljust(HEADER.size, b"\0")
+            expected = (MAGIC, self.max_token, self.data_size)
+            if os.fstat(self.fd).st_size != total_size or HEADER.unpack(header)[:3] != expected:
+                os.ftruncate(self.fd, 0)  # The file is sparse, pages are only allocated when they are written
+                os.ftruncate(self.fd, total_size)
+                os.pwrite(self.fd, HEADER.pack(*expected, 0, 0), 0)
+                self.logger.info("Created shared cache %s of %s bytes", self.path, total_size)
+        self.mmap = mmap.mmap(self.fd, total_size)
+
+    def close(self) -> None:
+        """Unmap the shared file"""
+
+        if self.mmap is not None:
+            self.mmap.close()
+            self.mmap = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def stamp(self, token: int) -> int:
+        """Get the stamp of the entry of a token, it changes whenever
+        the entry is written or dropped
+
+        Args:
+            token (int): token ID
+
+        Returns:
+            int: stamp, always 0 when the cache is disabled
+
+        """
+
+        if self.mmap is None or not 0 < token <= self.max_token:
+            return 0
+        return SEQUENCE.unpack_from(self.mmap, self._slot(token))[0]
+
+    def get(self, token: int) -> Optional[tuple[bytes, str, int]]:
+        """Get the entry of a token without taking any lock
+
+        Args:
+            token (int): token ID
+
+        Returns:
+            Optional[tuple[bytes, str, int]]: content, ETag and stamp of the
+                entry, None if there is no valid entry or if it's being written
+
+        """
+
+        if self.mmap is None or not 0 < token <= self.max_token:
+            return None
+
+        slot = self._slot(token)
+        for _ in range(READ_ATTEMPTS):
+            sequence, expires_at, offset, length, etag_length = SLOT.unpack_from(self.mmap, slot)
+            if sequence & 1:  # A writer is updating the slot
+                continue
+            if not length or (expires_at and expires_at <= time.time()):
+                break
+            start = self.data_offset + offset
+            data = self.mmap[start:start + length]
+            if SEQUENCE.unpack_from(self.mmap, slot)[0] != sequence:
+                continue
+            self.hits += 1
+            return data[etag_length:], data[:etag_length].decode("ascii"), sequence
+        self.misses += 1
+        return None
+
+    def set(self, token: int, content: bytes, etag: str, stamp: int) -> Optional[int]:
+        """Put the entry of a token unless it was written or dropped
+        since its stamp was read, e.g. by an update in another worker
+
+        Args:
+            token (int): token ID
+            content (bytes): validated metadata content
+            etag (str): ETag of the content
+            stamp (int): stamp of the entry read before the content was loaded
+
+        Returns:
+            Optional[int]: stamp of the entry, the given stamp if the content
+                isn't stored, e.g. when it's larger than the data area, or
+                None if the entry changed since the stamp was read
+
+        """
+
+        etag = etag.encode("ascii")
+        length = len(etag) + len(content)
+        if self.mmap is None or not 0 < token <= self.max_token or length > self.data_size:
+            return stamp
+
+        slot = self._slot(token)
+        with self._lock():
+            sequence = SEQUENCE.unpack_from(self.mmap, slot)[0]
+            if sequence != stamp:
+                return None
+            _, _, _, used, entries = HEADER.unpack_from(self.mmap, 0)
+            if used + length > self.data_size:
+                self._reset()
+                used, entries = 0, 0
+                sequence = SEQUENCE.unpack_from(self.mmap, slot)[0]
+
+            start = self.data_offset + used
+            self.mmap[start:start + len(etag)] = etag
+            self.mmap[start + len(etag):start + length] = content
+            previous_length = FIELDS.unpack_from(self.mmap, slot + SEQUENCE.size)[2]
+            expires_at = time.time() + self.ttl if self.ttl else 0
+            SEQUENCE.pack_into(self.mmap, slot, sequence + 1)
+            FIELDS.pack_into(self.mmap, slot + SEQUENCE.size, expires_at, used, length, len(etag))
+            SEQUENCE.pack_into(self.mmap, slot, sequence + 2)
+            self._update_header(used + length, entries + (not previous_length))
+        return sequence + 2
+
+    def delete(self, token: int) -> None:
+        """Drop the entry of a token, e.g. after it was updated
+
+        Args:
+            token (int): token ID
+
+        """
+
+        if self.mmap is None or not 0 < token <= self.max_token:
+            return
+        slot = self._slot(token)
+        with self._lock():
+            if self._drop(slot):
+                _, _, _, used, entries = HEADER.unpack_from(self.mmap, 0)
+                self._update_header(used, entries - 1)
+            else:
+                # Bump the stamp of an empty slot too, so a load that started
+                # before the update doesn't put the previous version in the cache
+                SEQUENCE.pack_into(self.mmap, slot, SEQUENCE.unpack_from(self.mmap, slot)[0] + 2)
+
+    def _slot(self, token: int) -> int:
+        return INDEX_OFFSET + token * SLOT.size
+
+    def _drop(self, slot: int) -> bool:
+        sequence, _, _, length, _ = SLOT.unpack_from(self.mmap, slot)
+        if not length:
+            return False
+        SEQUENCE.pack_into(self.mmap, slot, sequence + 1)
+        FIELDS.pack_into(self.mmap, slot + SEQUENCE.size, 0, 0, 0, 0)
+        SEQUENCE.pack_into(self.mmap, slot, sequence + 2)
+        return True
+
+    def _reset(self) -> None:
+        # Every slot is dropped before the data area is written again, so a
+        # reader still copying an old entry sees its sequence change and retries
+        dropped = sum(self._drop(self._slot(token)) for token in range(1, self.max_token + 1))
+        self.evictions += dropped
+        self._update_header(0, 0)
+        self.logger.warning("Shared cache %s is full, dropped %s entries", self.path, dropped)
+
+    def _update_header(self, used: int, entries: int) -> None:
+        HEADER.pack_into(self.mmap, 0, MAGIC, self.max_token, self.data_size, used, entries)
+
+    @contextlib.contextmanager
+    def _lock(self) -> Iterator[None]:
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
@@ -0,0 +1,56 @@
+"""Single-flight module coalesces concurrent calls for the same key, so a
+burst of requests for one token, e.g. at reveal time, makes one storage
+call instead of one per request. Calls that arrive while a call for the
+same key is in flight wait for it and share its result.
+
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """Group of in-flight calls keyed by a hashable key. `calls` counts
+    the calls that were actually made and `coalesced` counts the calls
+    that shared the result of a call in flight.
+
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._flights: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """Call `function` unless a call for the same key is in flight,
+        in which case wait for that call and return its result. An
+        exception raised by the call is raised to every caller.
+
+        The call runs in its own task, so a cancelled caller, e.g. a
+        client that disconnects, doesn't cancel the call for the others.
+
+        Args:
+            key (Hashable): key of the call
+            function (Callable[[], Awaitable[Any]]): function returning the awaitable to run
+
+        Returns:
+            Any: result of the call
+
+        """
+
+        flight = self._flights.get(key)
+        if flight is None:
+            self.calls += 1
+            flight = asyncio.ensure_future(function())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._land(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(flight)
+
+    def _land(self, key: Hashable, flight: asyncio.Task) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
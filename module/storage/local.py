@@ -13,8 +13,10 @@ import aiofiles
 import aiofiles.os
 from pydantic import validate_arguments
 
+from module.metrics import timed_storage_operation
 from module.response import Response
 from module.storage.storage_interface import StorageInterface
+from module.validation import validate_internal_arguments
 
 
 class LocalStorage(StorageInterface):
@@ -31,7 +33,8 @@ class LocalStorage(StorageInterface):
         """
         self.logger = logger
 
-    @validate_arguments
+    @timed_storage_operation("local", "get")
+    @validate_internal_arguments
     async def get(self, path: str, **kwargs) -> Union[tuple[bytes, HTTPStatus], Response]:
         """Get file from local storage. Keep in mind that
         there is no sanitization in this module, so it may
@@ -46,10 +49,33 @@ class LocalStorage(StorageInterface):
 
         """
 
+        response, status = await self._read(path)
+        if status != HTTPStatus.OK:
+            return response, status
+        return response[0], status
+
+    @timed_storage_operation("local", "get_with_version")
+    @validate_internal_arguments
+    async def get_with_version(self, path: str, **kwargs) -> Union[tuple[tuple[bytes, str], HTTPStatus], Response]:
+        """Get file from local storage together with its version,
+        read from the opened file, see `get_version`
+
+        Args:
+            path (str): Path to the file to load.
+
+        Returns:
+            Union[tuple[tuple[bytes, str], HTTPStatus], Response]: File content and version, and HTTP status
+
+        """
+
+        return await self._read(path)
+
+    async def _read(self, path: str) -> Union[tuple[tuple[bytes, str], HTTPStatus], Response]:
         self.logger.info("Load file %s from local storage", path)
         try:
             async with aiofiles.open(path, "rb") as file:
-                return await file.read(), HTTPStatus.OK
+                stat = os.fstat(file.fileno())
+                return (await file.read(), self._version(stat)), HTTPStatus.OK
         except FileNotFoundError:
             self.logger.error("File %s not found", path)
             return Response.NOT_FOUND
@@ -61,7 +87,8 @@ class LocalStorage(StorageInterface):
             self.logger.error("Failed to run read operation on %s. Error: %s", path, str(err))
         return Response.STORAGE_OPERATION_FAIL
 
-    @validate_arguments
+    @timed_storage_operation("local", "put")
+    @validate_internal_arguments
     async def put(self, path: str, content: bytes, overwrite=False, **kwargs) -> Response:
         """Put file to local storage. Keep in mind that
         there is no sanitization in this module, so it may
@@ -78,6 +105,34 @@ class LocalStorage(StorageInterface):
             HTTPStatus: HTTP status code
 
         """
+        response, status = await self._write(path, content, overwrite)
+        if status != HTTPStatus.OK:
+            return response, status
+        return Response.OK
+
+    @timed_storage_operation("local", "put_with_version")
+    @validate_internal_arguments
+    async def put_with_version(self,
+                               path: str,
+                               content: bytes,
+                               overwrite=False,
+                               **kwargs) -> Union[tuple[str, HTTPStatus], Response]:
+        """Put file to local storage and get the version of the written
+        file, read from the opened file, see `get_version`
+
+        Args:
+            path (str): Path to the file to save.
+            content (bytes): File content to save.
+            overwrite (bool, optional): Overwrite the file if it exists. Defaults to False.
+
+        Returns:
+            Union[tuple[str, HTTPStatus], Response]: Version of the written file and HTTP status
+
+        """
+
+        return await self._write(path, content, overwrite)
+
+    async def _write(self, path: str, content: bytes, overwrite: bool) -> Union[tuple[str, HTTPStatus], Response]:
         self.logger.info("Save file %s to local storage", path)
         try:
             if not overwrite and await aiofiles.os.path.isfile(path):
@@ -91,7 +146,8 @@ class LocalStorage(StorageInterface):
 
             async with aiofiles.open(path, "wb") as file:
                 await file.write(content)
-                return Response.OK
+                await file.flush()
+                return self._version(os.fstat(file.fileno())), HTTPStatus.OK
         except IsADirectoryError:
             self.logger.error("Path %s is a directory", path)
         except PermissionError as err:
@@ -100,7 +156,8 @@ class LocalStorage(StorageInterface):
             self.logger.error("Failed to run write operation on %s. Error: %s", path, str(err))
         return Response.STORAGE_OPERATION_FAIL
 
-    @validate_arguments
+    @timed_storage_operation("local", "is_exists")
+    @validate_internal_arguments
     async def is_exists(self, path: str, **kwargs) -> Union[tuple[bool, HTTPStatus], Response]:
         """Check if file exists in local storage. Keep in mind that
         there is no sanitization in this module, so it may
@@ -126,3 +183,30 @@ class LocalStorage(StorageInterface):
         except Exception as err:
             self.logger.error("Failed to check file %s. Error: %s", path, str(err))
             return Response.STORAGE_OPERATION_FAIL
+
+    @timed_storage_operation("local", "get_version")
+    @validate_internal_arguments
+    async def get_version(self, path: str, **kwargs) -> Union[tuple[str, HTTPStatus], Response]:
+        """Get the version of a file in local storage from its
+        modification time in nanoseconds and its size.
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            Union[tuple[str, HTTPStatus], Response]: Version of the file and HTTP status
+
+        """
+
+        try:
+            return self._version(await aiofiles.os.stat(path)), HTTPStatus.OK
+        except FileNotFoundError:
+            self.logger.error("File %s not found", path)
+            return Response.NOT_FOUND
+        except Exception as err:
+            self.logger.error("Failed to get version of %s. Error: %s", path, str(err))
+            return Response.STORAGE_OPERATION_FAIL
+
+    @staticmethod
+    def _version(stat: os.stat_result) -> str:
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
@@ -27,6 +27,7 @@ from pydantic import validate_arguments
 from module.response import Response
 from module.schema.storage import StorageType, Configuration
 from module.storage.storage_interface import StorageInterface
+from module.validation import validate_internal_arguments
 
 
 class Storage(StorageInterface):
@@ -49,7 +50,7 @@ class Storage(StorageInterface):
 
         self.storage = self.storage_class[storage](logger=logger, config=config, **kwargs)
 
-    @validate_arguments
+    @validate_internal_arguments
     async def get(self, path: str, **kwargs) -> Union[tuple[bytes, HTTPStatus], Response]:
         """Method to get file from a storage
 
@@ -62,7 +63,7 @@ class Storage(StorageInterface):
         """
         return await self.storage.get(path, **kwargs)
 
-    @validate_arguments
+    @validate_internal_arguments
     async def put(self, path: str, data: bytes, overwrite=False, **kwargs) -> Response:
         """Method to put file to a storage
 
@@ -79,7 +80,27 @@ class Storage(StorageInterface):
         """
         return await self.storage.put(path, data, overwrite, **kwargs)
 
-    @validate_arguments
+    @validate_internal_arguments
+    async def put_with_version(self,
+                               path: str,
+                               data: bytes,
+                               overwrite=False,
+                               **kwargs) -> Union[tuple[str, HTTPStatus], Response]:
+        """Method to put file to a storage and get the version of the written file
+
+        Args:
+            path (str): File path
+            data (bytes): File data
+            overwrite (bool, optional): Overwrite file. Defaults to False
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Union[tuple[str, HTTPStatus], Response]: Version of the written file and HTTP Status
+
+        """
+        return await self.storage.put_with_version(path, data, overwrite, **kwargs)
+
+    @validate_internal_arguments
     async def is_exists(self, path: str, **kwargs) -> Union[tuple[bool, HTTPStatus], Response]:
         """Method to check if file exists in a storage
 
@@ -93,6 +114,56 @@ class Storage(StorageInterface):
         """
         return await self.storage.is_exists(path, **kwargs)
 
+    @validate_internal_arguments
+    async def ping(self, path: str, **kwargs) -> Union[tuple[bool, HTTPStatus], Response]:
+        """Method to check that a storage answers without using any cache
+
+        Args:
+            path (str): File path
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Union[tuple[bool, HTTPStatus], Response]: Response data and HTTP Status
+
+        """
+        return await self.storage.ping(path, **kwargs)
+
+    @validate_internal_arguments
+    async def get_version(self, path: str, **kwargs) -> Union[tuple[str, HTTPStatus], Response]:
+        """Method to get the version of a file in a storage
+
+        Args:
+            path (str): File path
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Union[tuple[str, HTTPStatus], Response]: Version of the file and HTTP Status
+
+        """
+        return await self.storage.get_version(path, **kwargs)
+
+    @validate_internal_arguments
+    async def get_with_version(self, path: str, **kwargs) -> Union[tuple[tuple[bytes, str], HTTPStatus], Response]:
+        """Method to get file from a storage together with its version
+
+        Args:
+            path (str): File path
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Union[tuple[tuple[bytes, str], HTTPStatus], Response]: File content and version, and HTTP Status
+
+        """
+        return await self.storage.get_with_version(path, **kwargs)
+
+    async def connect(self):
+        """Method to open long-lived resources of a storage"""
+        await self.storage.connect()
+
+    async def close(self):
+        """Method to release resources opened by `connect`"""
+        await self.storage.close()
+
     @classmethod
     @validate_arguments(config=dict(arbitrary_types_allowed=True))
     def register(cls, storage_name: StorageType, storage_class) -> None:
@@ -0,0 +1,263 @@
+"""This module is used to serve metadata from a pack, a single file that
+contains the metadata of every token. The pack is built offline with
+`python cli.py pack` and opened once with `mmap`, so reading metadata
+doesn't open any file and doesn't copy the content.
+
+The pack starts with a header (magic, schema version and maximum token
+ID) followed by an index with one entry (offset, length) per token ID
+from 1 to the maximum token ID, then the validated metadata one after
+another. A token without metadata has an entry with length 0.
+
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from http import HTTPStatus
+from typing import Union
+
+from pydantic import validate_arguments
+
+from module.env import Env
+from module.metrics import timed_storage_operation
+from module.response import Response
+from module.schema.metadata import SCHEMA_VERSION
+from module.storage.storage_interface import StorageInterface
+from module.validation import validate_internal_arguments
+
+MAGIC = b"MDPACK01"
+HEADER = struct.Struct("<8sII")  # Magic, schema version, maximum token ID
+ENTRY = struct.Struct("<QI")  # Offset, length
+
+
+class PackWriter:
+    """Write a pack file. The pack is written to a temporary file next
+    to the destination, which replaces the destination atomically when
+    the writer is closed without error.
+
+    with PackWriter("metadata.pack", max_token=10000) as pack:
+        pack.add(1, b'{"name": "1"}')
+
+    """
+
+    def __init__(self, path: str, max_token: int, schema_version: int = SCHEMA_VERSION):
+        """Initialize the pack writer
+
+        Args:
+            path (str): path of the pack file
+            max_token (int): maximum token ID
+            schema_version (int, optional): schema version of the metadata. Defaults to SCHEMA_VERSION
+
+        """
+
+        self.path = path
+        self.max_token = max_token
+        self.schema_version = schema_version
+        self.index = [(0, 0)] * max_token
+        self.file = None
+
+    def __enter__(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        self.file = tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".tmp", delete=False)
+        self.file.seek(HEADER.size + ENTRY.size * self.max_token)
+        return self
+
+    def add(self, token: int, content: bytes) -> None:
+        """Append the metadata of a token to the pack
+
+        Args:
+            token (int): token ID from 1 to the maximum token ID
+            content (bytes): validated metadata
+
+        """
+
+        if not 0 < token <= self.max_token:
+            raise ValueError(f"Token ID {token} is out of the pack range")
+        self.index[token - 1] = (self.file.tell(), len(content))
+        self.file.write(content)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                self.file.seek(0)
+                self.file.write(HEADER.pack(MAGIC, self.schema_version, self.max_token))
+                self.file.write(b"".join(ENTRY.pack(*entry) for entry in self.index))
+                self.file.flush()
+                os.fsync(self.file.fileno())
+        finally:
+            self.file.close()
+        if exc_type is None:
+            os.replace(self.file.name, self.path)
+        else:
+            os.remove(self.file.name)
+
+
+class PackStorage(StorageInterface):
+    """Class to read metadata from a pack file. The pack is read-only,
+    a metadata can be updated only by building the pack again. Paths
+    are resolved by their file name, e.g. "metadata/12.json" is the
+    metadata of token ID 12.
+
+    """
+
+    @validate_arguments(config=dict(arbitrary_types_allowed=True))
+    def __init__(self, logger: logging.Logger, **kwargs):
+        """Initialize PackStorage class
+
+        Args:
+            logger (logging.Logger): Logger object
+            **kwargs: Arbitrary keyword arguments
+
+        """
+
+        self.logger = logger
+        self.path = Env.METADATA_PACK
+        self.mmap = None
+        self.max_token = 0
+
+    async def connect(self):
+        """Open the pack file"""
+
+        self._open()
+
+    async def close(self):
+        """Close the pack file"""
+
+        if self.mmap is None:
+            return
+        self.logger.info("Close metadata pack %s", self.path)
+        try:
+            self.mmap.close()
+        except BufferError:  # A memoryview of the pack is still used, it's closed once released
+            self.logger.warning("Metadata pack %s is still in use", self.path)
+        self.mmap = None
+        self.max_token = 0
+
+    def _open(self) -> None:
+        if self.mmap is not None:
+            return
+        self.logger.info("Open metadata pack %s", self.path)
+        with open(self.path, "rb") as file:
+            pack = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, schema_version, max_token = HEADER.unpack_from(pack)
+        if magic != MAGIC:
+            pack.close()
+            raise ValueError(f"{self.path} is not a metadata pack")
+        if schema_version != SCHEMA_VERSION:
+            self.logger.warning("Metadata pack %s was built for schema version %s, the current version is %s",
+                                self.path,
+                                schema_version,
+                                SCHEMA_VERSION)
+        self.mmap = pack
+        self.max_token = max_token
+
+    def _find(self, path: str) -> Union[tuple[memoryview, HTTPStatus], Response]:
+        try:
+            self._open()
+        except Exception as err:
+            self.logger.error("Failed to open metadata pack %s. Error: %s", self.path, str(err))
+            return Response.STORAGE_OPERATION_FAIL
+
+        token, extension = os.path.splitext(os.path.basename(path))
+        if extension != ".json" or not token.isdigit() or not 0 < int(token) <= self.max_token:
+            self.logger.error("File %s not found in metadata pack", path)
+            return Response.NOT_FOUND
+        offset, length = ENTRY.unpack_from(self.mmap, HEADER.size + ENTRY.size * (int(token) - 1))
+        if not length:
+            self.logger.error("File %s not found in metadata pack", path)
+            return Response.NOT_FOUND
+        return memoryview(self.mmap)[offset:offset + length], HTTPStatus.OK
+
+    @timed_storage_operation("pack", "get")
+    @validate_internal_arguments
+    async def get(self, path: str, **kwargs) -> Union[tuple[memoryview, HTTPStatus], Response]:
+        """Get file from the pack. The content is a view of the
+        memory-mapped pack, so it's not copied.
+
+        Args:
+            path (str): Path to the file
+
+        Returns:
+            Union[tuple[memoryview, HTTPStatus], Response]: Response data and HTTP status
+
+        """
+
+        return self._find(path)
+
+    @timed_storage_operation("pack", "put")
+    @validate_internal_arguments
+    async def put(self, path: str, content: bytes, overwrite=False, **kwargs) -> Response:
+        """The pack is read-only, build it again with `python cli.py pack` instead
+
+        Args:
+            path (str): Path to the file
+            content (bytes): File content
+            overwrite (bool, optional): Overwrite the file if it exists. Defaults to False
+
+        Returns:
+            Response: Response data and HTTP status
+
+        """
+
+        self.logger.error("Failed to save %s, metadata pack is read-only", path)
+        return Response.STORAGE_OPERATION_FAIL
+
+    @timed_storage_operation("pack", "is_exists")
+    @validate_internal_arguments
+    async def is_exists(self, path: str, **kwargs) -> Union[tuple[bool, HTTPStatus], Response]:
+        """Check if file exists in the pack
+
+        Args:
+            path (str): Path to the file
+
+        Returns:
+            Union[tuple[bool, HTTPStatus], Response]: Response data and HTTP status
+
+        """
+
+        response, status = self._find(path)
+        if status != HTTPStatus.OK and status != HTTPStatus.NOT_FOUND:
+            return response, status
+        return status == HTTPStatus.OK, status
+
+    @timed_storage_operation("pack", "get_version")
+    @validate_internal_arguments
+    async def get_version(self, path: str, **kwargs) -> Union[tuple[str, HTTPStatus], Response]:
+        """Get the version of a file in the pack from the digest of its
+        content, which is cheap since the content is in memory
+
+        Args:
+            path (str): Path to the file
+
+        Returns:
+            Union[tuple[str, HTTPStatus], Response]: Version of the file and HTTP status
+
+        """
+
+        response, status = self._find(path)
+        if status != HTTPStatus.OK:
+            return response, status
+        return hashlib.blake2b(response, digest_size=16).hexdigest(), HTTPStatus.OK
+
+    @timed_storage_operation("pack", "get_with_version")
+    @validate_internal_arguments
+    async def get_with_version(self,
+                               path: str,
+                               **kwargs) -> Union[tuple[tuple[memoryview, str], HTTPStatus], Response]:
+        """Get file from the pack together with its version
+
+        Args:
+            path (str): Path to the file
+
+        Returns:
+            Union[tuple[tuple[memoryview, str], HTTPStatus], Response]: File content and version, and HTTP status
+
+        """
+
+        response, status = self._find(path)
+        if status != HTTPStatus.OK:
+            return response, status
+        return (response, hashlib.blake2b(response, digest_size=16).hexdigest()), HTTPStatus.OK
@@ -3,20 +3,42 @@ import json
 import logging
 import os
 import urllib.parse
+from contextlib import asynccontextmanager
 from http import HTTPStatus
-from typing import Union
+from typing import Optional, Union
 
 import aiohttp
 from pydantic import validate_arguments, constr
 
+from module.cache import LRUCache
 from module.env import Env
+from module.metrics import register_cache, timed_storage_operation
 from module.response import Response
 from module.storage.storage_interface import StorageInterface
+from module.validation import validate_internal_arguments
 
 
 class PinataStorage(StorageInterface):
-    """Class to interact with Pinata Storage"""
-
+    """Class to interact with Pinata Storage. Once `connect` is
+    called, every request goes through a single HTTP session that
+    keeps connections to Pinata alive until `close` is called.
+    Before that, each request opens its own session.
+
+    Resolving a file name to its CID needs a query to the Pinata
+    API, so the CID of each name is cached. Names that are not
+    pinned are cached for a shorter time.
+
+    The cache is per worker, while `put` replaces the CID of a file
+    in Pinata. A caller that knows when a file last changed, e.g. the
+    stamp of the token in the shared metadata cache, passes it as the
+    `stamp` keyword argument of `get` and `get_version`: a CID cached
+    under another stamp is resolved again, so a worker doesn't load
+    the previous version of a file updated by another worker. Without
+    a stamp, a cached CID is used until it expires.
+
+    """
+
+    api_host = "https://api.pinata.cloud/"
     timeout = aiohttp.ClientTimeout(total=10)
 
     @validate_arguments(config=dict(arbitrary_types_allowed=True))
@@ -41,8 +63,43 @@ class PinataStorage(StorageInterface):
             "pinata_secret_api_key": self.secret_key
         }
         self.logger = logger
-
-    @validate_arguments
+        self.session = None
+        self.cid_cache = LRUCache(max_size=Env.PINATA_CID_CACHE_SIZE,
+                                  ttl=Env.PINATA_CID_CACHE_TTL,
+                                  sizeof=lambda _: 1)
+        register_cache("pinata_cid", self.cid_cache)
+
+    async def connect(self):
+        """Create the long-lived HTTP session"""
+
+        if self.session is not None:
+            return
+        self.logger.info("Open Pinata HTTP session")
+        connector = aiohttp.TCPConnector(limit=Env.PINATA_CONNECTION_LIMIT,
+                                         limit_per_host=Env.PINATA_CONNECTION_LIMIT_PER_HOST,
+                                         ttl_dns_cache=Env.PINATA_DNS_CACHE_TTL,
+                                         keepalive_timeout=Env.PINATA_KEEPALIVE_TIMEOUT)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    async def close(self):
+        """Close the long-lived HTTP session and its connections"""
+
+        if self.session is None:
+            return
+        self.logger.info("Close Pinata HTTP session")
+        await self.session.close()
+        self.session = None
+
+    @asynccontextmanager
+    async def _session(self):
+        if self.session is not None:
+            yield self.session
+            return
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            yield session
+
+    @timed_storage_operation("pinata", "get")
+    @validate_internal_arguments
     async def get(self, path: constr(min_length=1), **kwargs) -> Union[tuple[bytes, HTTPStatus], Response]:
         """Method to get file from Pinata storage
 
@@ -60,7 +117,8 @@ class PinataStorage(StorageInterface):
         file_path = path
         if directory:
             file_path = directory.split(os.path.sep)[0]
-        response, status = await self._fetch_cid(file_path)
+        # Files in a folder can't be updated, see `put`, so the CID of the folder doesn't need a stamp
+        response, status = await self._fetch_cid(file_path, stamp=None if directory else kwargs.get("stamp"))
         if status != HTTPStatus.OK:
             return response, status
         file_hash = response
@@ -68,7 +126,8 @@ class PinataStorage(StorageInterface):
             file_hash = os.path.join(file_hash, os.path.sep.join(path.split(os.path.sep)[1:]))
         return await self._fetch_metadata(file_hash)
 
-    @validate_arguments
+    @timed_storage_operation("pinata", "put")
+    @validate_internal_arguments
     async def put(self, path: str, data: bytes, overwrite=False, **kwargs) -> Response:
         """Method to upload file to Pinata storage
         Currently, Pinata supports only replacing files in the root
@@ -93,6 +152,40 @@ class PinataStorage(StorageInterface):
 
         """
 
+        response, status = await self._put(path, data, overwrite)
+        if status != HTTPStatus.OK:
+            return response, status
+        return Response.OK
+
+    @timed_storage_operation("pinata", "put_with_version")
+    @validate_internal_arguments
+    async def put_with_version(self,
+                               path: str,
+                               data: bytes,
+                               overwrite=False,
+                               **kwargs) -> Union[tuple[str, HTTPStatus], Response]:
+        """Method to upload file to Pinata storage and get the CID of
+        the uploaded file, which is its version, see `get_version`
+
+        Args:
+            path (str): File path
+            data (bytes): File data
+            overwrite (bool, optional): Overwrite file. Defaults to False
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Union[tuple[str, HTTPStatus], Response]: Version of the uploaded file and HTTP Status
+
+        """
+
+        response, status = await self._put(path, data, overwrite)
+        if status != HTTPStatus.OK:
+            return response, status
+        if not response:  # The CID wasn't in the response of Pinata
+            return await self.get_version(path)
+        return response, status
+
+    async def _put(self, path: str, data: bytes, overwrite: bool) -> Union[tuple[str, HTTPStatus], Response]:
         if os.path.dirname(path):
             self.logger.error("Overwrite a file inside a folder is not supported in IPFS")
             return Response.STORAGE_OPERATION_FAIL
@@ -106,7 +199,7 @@ class PinataStorage(StorageInterface):
             return Response.FILE_EXISTS
 
         original_file_hash = response
-        url = "https://api.pinata.cloud/pinning/pinFileToIPFS"
+        url = urllib.parse.urljoin(self.api_host, "pinning/pinFileToIPFS")
         body = {
             "file": data,
             "pinataOptions": '{"cidVersion": 1}',
@@ -119,14 +212,23 @@ class PinataStorage(StorageInterface):
             self.logger.error("Failed to upload file to Pinata. Error: %s", response)
             return Response.STORAGE_OPERATION_FAIL
 
+        try:
+            cid = json.loads(response.decode("utf-8"))["IpfsHash"]
+            self.cid_cache.set(path, (cid, None))
+        except (ValueError, KeyError, TypeError):
+            self.logger.warning("Failed to read CID of %s from Pinata response: %s", path, response)
+            self.cid_cache.delete(path)
+            cid = ""
+
         if overwrite:  # Unpin old file after upload a new one
             self.logger.info("Unpin file %s with CID %s from Pinata", path, original_file_hash)
-            url = f"https://api.pinata.cloud/pinning/unpin/{original_file_hash}"
+            url = urllib.parse.urljoin(self.api_host, f"pinning/unpin/{original_file_hash}")
             await self._fetch(url, method="delete", headers=self.headers)
 
-        return Response.OK
+        return cid, HTTPStatus.OK
 
-    @validate_arguments
+    @timed_storage_operation("pinata", "is_exists")
+    @validate_internal_arguments
     async def is_exists(self, path: str, **kwargs) -> Union[tuple[bool, HTTPStatus], Response]:
         """Method to check if file exists in the Pinata storage
 
@@ -152,10 +254,58 @@ class PinataStorage(StorageInterface):
             _, status = await self._fetch_metadata(file_hash)
         return status == HTTPStatus.OK, status
 
+    @timed_storage_operation("pinata", "ping")
+    @validate_internal_arguments
+    async def ping(self, path: str, **kwargs) -> Union[tuple[bool, HTTPStatus], Response]:
+        """Method to check that the Pinata API answers. The CID of the
+        file, or of its folder, is requested without the CID cache.
+
+        Args:
+            path (str): File path
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Union[tuple[bool, HTTPStatus], Response]: Response data and HTTP Status
+
+        """
+
+        response, status = await self._fetch_cid(path.split(os.path.sep)[0], use_cache=False)
+        if status != HTTPStatus.OK and status != HTTPStatus.NOT_FOUND:
+            return response, status
+        return status == HTTPStatus.OK, status
+
+    @timed_storage_operation("pinata", "get_version")
+    @validate_internal_arguments
+    async def get_version(self, path: constr(min_length=1), **kwargs) -> Union[tuple[str, HTTPStatus], Response]:
+        """Method to get the version of a file in the Pinata storage.
+        IPFS content is immutable, so the CID of the pinned file, or
+        of the pinned folder followed by the path inside it, is the
+        version. The CID is usually cached, so no request is sent.
+
+        Args:
+            path (str): File path
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Union[tuple[str, HTTPStatus], Response]: Version of the file and HTTP Status
+
+        """
+
+        directory = os.path.dirname(path)
+        file_path = path
+        if directory:
+            file_path = directory.split(os.path.sep)[0]
+        response, status = await self._fetch_cid(file_path, stamp=None if directory else kwargs.get("stamp"))
+        if status != HTTPStatus.OK:
+            return response, status
+        if directory:
+            return os.path.join(response, os.path.sep.join(path.split(os.path.sep)[1:])), HTTPStatus.OK
+        return response, HTTPStatus.OK
+
     async def _fetch(self, url: str, method: str, body: dict = {}, data=None, headers: dict = {}) -> (bytes, int):
         self.logger.info("Send %s request to Pinata %s", method.upper(), url)
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            async with self._session() as session:
                 if body:
                     async with session.request(method, url, json=body, headers=headers) as response:
                         return await response.read(), response.status
@@ -173,17 +323,32 @@ class PinataStorage(StorageInterface):
                               body,
                               data)
 
-    async def _fetch_cid(self, path: str) -> (str, int):
+    @timed_storage_operation("pinata", "fetch_cid")
+    async def _fetch_cid(self, path: str, use_cache: bool = True, stamp: Optional[int] = None) -> (str, int):
+        cached = self.cid_cache.get(path) if use_cache else None
+        if cached is not None and (stamp is None or cached[1] == stamp):
+            cid = cached[0]
+            if not cid:
+                self.logger.error("File %s not found in Pinata Storage", path)
+                return Response.NOT_FOUND
+            return cid, HTTPStatus.OK
+
         try:
-            url = f"https://api.pinata.cloud/data/pinList?includeCount=false&metadata[name]={path}&status=pinned"
+            url = urllib.parse.urljoin(self.api_host,
+                                       f"data/pinList?includeCount=false&metadata[name]={path}&status=pinned")
             response, status = await self._fetch(url, method="get", headers=self.headers)
             if status != HTTPStatus.OK:
                 raise ValueError
             response_data = json.loads(response.decode("utf-8"))
             if not response_data.get("rows", []):
                 self.logger.error("File %s not found in Pinata Storage", path)
+                if Env.PINATA_CID_NEGATIVE_CACHE_TTL:
+                    self.cid_cache.set(path, ("", stamp), ttl=Env.PINATA_CID_NEGATIVE_CACHE_TTL)
                 return Response.NOT_FOUND
-            return response_data["rows"][0].get("ipfs_pin_hash", ""), HTTPStatus.OK
+            cid = response_data["rows"][0].get("ipfs_pin_hash", "")
+            if cid:
+                self.cid_cache.set(path, (cid, stamp))
+            return cid, HTTPStatus.OK
         except json.decoder.JSONDecodeError:
             self.logger.error("Failed to parse Pinata response to JSON: %s", response)
         except ValueError:
@@ -198,6 +363,7 @@ class PinataStorage(StorageInterface):
             self.logger.error("Failed to load file from Pinata Storage: %s", err)
         return Response.STORAGE_OPERATION_FAIL
 
+    @timed_storage_operation("pinata", "fetch_metadata")
     async def _fetch_metadata(self, path: str) -> (bytes, int):
         url = urllib.parse.urljoin(self.host, path)
         response, status = await self._fetch(method="get", url=url)
@@ -1,20 +1,29 @@
 """This module is used to interact with AWS S3 bucket"""
 
 import logging
+from contextlib import AsyncExitStack, asynccontextmanager
 from http import HTTPStatus
 from typing import Union
 
 import aioboto3
 import botocore.exceptions
+from aiobotocore.config import AioConfig
 from pydantic import validate_arguments
 
 from module.env import Env
+from module.metrics import timed_storage_operation
 from module.response import Response
 from module.storage.storage_interface import StorageInterface
+from module.validation import validate_internal_arguments
 
 
 class S3Storage(StorageInterface):
-    """This class is used to interact with AWS S3 bucket"""
+    """This class is used to interact with AWS S3 bucket. Once
+    `connect` is called, every operation shares a single client
+    and its connection pool until `close` is called. Before that,
+    each operation opens a short-lived client.
+
+    """
 
     S3 = "s3"
     bucket = Env.S3_BUCKET_NAME
@@ -33,8 +42,46 @@ class S3Storage(StorageInterface):
         self.access_key = config.get("access_key")
         self.secret_key = config.get("secret_key")
         self.logger = logger
+        self.client = None
+        self._exit_stack = None
+
+    async def connect(self):
+        """Create the long-lived S3 client"""
+
+        if self.client is not None:
+            return
+        self.logger.info("Open S3 client with %s max pool connections", Env.S3_MAX_POOL_CONNECTIONS)
+        self._exit_stack = AsyncExitStack()
+        self.client = await self._exit_stack.enter_async_context(self._create_client())
+
+    async def close(self):
+        """Close the long-lived S3 client and its connection pool"""
+
+        if self._exit_stack is None:
+            return
+        self.logger.info("Close S3 client")
+        await self._exit_stack.aclose()
+        self._exit_stack = None
+        self.client = None
+
+    def _create_client(self):
+        session = aioboto3.Session()
+        return session.client(self.S3,
+                              aws_access_key_id=self.access_key,
+                              aws_secret_access_key=self.secret_key,
+                              endpoint_url=Env.S3_ENDPOINT_URL,
+                              config=AioConfig(max_pool_connections=Env.S3_MAX_POOL_CONNECTIONS))
 
-    @validate_arguments
+    @asynccontextmanager
+    async def _client(self):
+        if self.client is not None:
+            yield self.client
+            return
+        async with self._create_client() as s3:
+            yield s3
+
+    @timed_storage_operation("s3", "get")
+    @validate_internal_arguments
     async def get(self, path: str, **kwargs) -> Union[tuple[bytes, HTTPStatus], Response]:
         """Get file from S3 bucket
 
@@ -46,15 +93,34 @@ class S3Storage(StorageInterface):
 
         """
 
-        session = aioboto3.Session()
-        async with session.client(self.S3,
-                                  aws_access_key_id=self.access_key,
-                                  aws_secret_access_key=self.secret_key) as s3:
+        response, status = await self._get_object(path)
+        if status != HTTPStatus.OK:
+            return response, status
+        return response[0], status
+
+    @timed_storage_operation("s3", "get_with_version")
+    @validate_internal_arguments
+    async def get_with_version(self, path: str, **kwargs) -> Union[tuple[tuple[bytes, str], HTTPStatus], Response]:
+        """Get file from S3 bucket together with the ETag of the
+        object, in a single GET request
+
+        Args:
+            path (str): Path to file
+
+        Returns:
+            Union[tuple[tuple[bytes, str], HTTPStatus], Response]: File content and version, and HTTP status
+
+        """
+
+        return await self._get_object(path)
+
+    async def _get_object(self, path: str) -> Union[tuple[tuple[bytes, str], HTTPStatus], Response]:
+        async with self._client() as s3:
             try:
                 self.logger.info("Load file %s from bucket %s", path, self.bucket)
                 file = await s3.get_object(Bucket=self.bucket, Key=path)
                 if file is not None:
-                    return await file["Body"].read(), HTTPStatus.OK
+                    return (await file["Body"].read(), file.get("ETag", "").strip('"')), HTTPStatus.OK
             except botocore.exceptions.ParamValidationError as err:
                 self.logger.error("Invalid parameter added when loading from S3 bucket. Error: %s", str(err))
             except botocore.exceptions.ClientError as err:
@@ -65,7 +131,8 @@ class S3Storage(StorageInterface):
                 self.logger.error("Failed to run operation on S3 bucket. Error: %s", str(err))
             return Response.STORAGE_OPERATION_FAIL
 
-    @validate_arguments
+    @timed_storage_operation("s3", "put")
+    @validate_internal_arguments
     async def put(self, path: str, content: bytes, overwrite=False, **kwargs) -> Response:
         """Put file to S3 bucket
 
@@ -80,8 +147,37 @@ class S3Storage(StorageInterface):
 
         """
 
-        session = aioboto3.Session()
+        response, status = await self._put(path, content, overwrite)
+        if status != HTTPStatus.OK:
+            return response, status
+        return Response.OK
+
+    @timed_storage_operation("s3", "put_with_version")
+    @validate_internal_arguments
+    async def put_with_version(self,
+                               path: str,
+                               content: bytes,
+                               overwrite=False,
+                               **kwargs) -> Union[tuple[str, HTTPStatus], Response]:
+        """Put file to S3 bucket and get the ETag of the written object,
+        see `get_version`
 
+        Args:
+            path (str): Path to file
+            content (bytes): File content in bytes
+            overwrite (bool, optional): Overwrite file if exists. Defaults to False
+
+        Returns:
+            Union[tuple[str, HTTPStatus], Response]: Version of the written file and HTTP status
+
+        """
+
+        response, status = await self._put(path, content, overwrite)
+        if status != HTTPStatus.OK:
+            return response, status
+        return response.get("ETag", "").strip('"'), HTTPStatus.OK
+
+    async def _put(self, path: str, content: bytes, overwrite: bool) -> Union[tuple[dict, HTTPStatus], Response]:
         if not overwrite:
             response, status = await self.is_exists(path)
             if response:
@@ -91,13 +187,10 @@ class S3Storage(StorageInterface):
             elif status == HTTPStatus.OK:
                 return Response.FILE_EXISTS
 
-        async with session.client(self.S3,
-                                  aws_access_key_id=self.access_key,
-                                  aws_secret_access_key=self.secret_key) as s3:
+        async with self._client() as s3:
             try:
                 self.logger.info("Save file %s to bucket %s", path, self.bucket)
-                await s3.put_object(Bucket=self.bucket, Key=path, Body=content)
-                return Response.OK
+                return await s3.put_object(Bucket=self.bucket, Key=path, Body=content), HTTPStatus.OK
             except botocore.exceptions.ParamValidationError as err:
                 self.logger.error("Invalid parameter added when saving to S3 bucket. Error: %s", str(err))
             except botocore.exceptions.ClientError as err:
@@ -106,7 +199,8 @@ class S3Storage(StorageInterface):
                 self.logger.error("Failed to run operation on S3 bucket. Error: %s", str(err))
             return Response.STORAGE_OPERATION_FAIL
 
-    @validate_arguments
+    @timed_storage_operation("s3", "is_exists")
+    @validate_internal_arguments
     async def is_exists(self,
                         path: str,
                         **kwargs) -> Union[tuple[bool, HTTPStatus], Response]:
@@ -121,10 +215,7 @@ class S3Storage(StorageInterface):
 
         """
 
-        session = aioboto3.Session()
-        async with session.client(self.S3,
-                                  aws_access_key_id=self.access_key,
-                                  aws_secret_access_key=self.secret_key) as s3:
+        async with self._client() as s3:
             try:
                 await s3.head_object(Bucket=self.bucket, Key=path)
                 self.logger.info("File %s exists in bucket %s", path, self.bucket)
@@ -139,3 +230,33 @@ class S3Storage(StorageInterface):
             except Exception as err:
                 self.logger.error("Failed to run operation on S3 bucket. Error: %s", str(err))
         return Response.STORAGE_OPERATION_FAIL
+
+    @timed_storage_operation("s3", "get_version")
+    @validate_internal_arguments
+    async def get_version(self, path: str, **kwargs) -> Union[tuple[str, HTTPStatus], Response]:
+        """Get the version of a file in S3 bucket from the ETag
+        returned by a HEAD request
+
+        Args:
+            path (str): Path to file
+            **kwargs: Arbitrary keyword arguments
+
+        Returns:
+            Union[tuple[str, HTTPStatus], Response]: Version of the file and HTTP status
+
+        """
+
+        async with self._client() as s3:
+            try:
+                response = await s3.head_object(Bucket=self.bucket, Key=path)
+                return response["ETag"].strip('"'), HTTPStatus.OK
+            except botocore.exceptions.ParamValidationError as err:
+                self.logger.error("Invalid parameter added when accessing S3 bucket. Error: %s", str(err))
+            except botocore.exceptions.ClientError as err:
+                if "error occurred (404)" in str(err):
+                    self.logger.warning("File %s in bucket %s not found. Error: %s", path, self.bucket, str(err))
+                    return Response.NOT_FOUND
+                self.logger.error("Failed to check file in S3 bucket. Error: %s", str(err))
+            except Exception as err:
+                self.logger.error("Failed to run operation on S3 bucket. Error: %s", str(err))
+        return Response.STORAGE_OPERATION_FAIL
@@ -7,6 +7,7 @@ without a need to touch the codebase.
 """
 
 import abc
+from http import HTTPStatus
 
 
 class StorageInterface(metaclass=abc.ABCMeta):  # pragma: no cover
@@ -30,3 +31,66 @@ class StorageInterface(metaclass=abc.ABCMeta):  # pragma: no cover
     async def is_exists(self):
         """Abstract method to check if file exists in a storage"""
         raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_version(self):
+        """Abstract method to get an identifier of the current content
+        of a file without loading it. The identifier must change
+        whenever the file content changes.
+
+        """
+        raise NotImplementedError
+
+    async def ping(self, path: str, **kwargs):
+        """Check that the storage answers, e.g. for a readiness probe,
+        without using any cache. A missing file still proves that the
+        storage is reachable. Storages that cache `is_exists` must
+        override it.
+
+        """
+
+        return await self.is_exists(path, **kwargs)
+
+    async def get_with_version(self, path: str, **kwargs):
+        """Get a file together with its version, see `get_version`.
+        Storages that get the version with the content, e.g. the ETag
+        of an S3 object, should override it to make a single call. By
+        default the version is read first, so it's never newer than
+        the content.
+
+        """
+
+        version, status = await self.get_version(path, **kwargs)
+        if status != HTTPStatus.OK:
+            return version, status
+        content, status = await self.get(path, **kwargs)
+        if status != HTTPStatus.OK:
+            return content, status
+        return (content, version), HTTPStatus.OK
+
+    async def put_with_version(self, path: str, content: bytes, overwrite=False, **kwargs):
+        """Put a file and get the version of the written content, see
+        `get_version`. Storages that get the version from the write,
+        e.g. the ETag of an S3 object, should override it to make a
+        single call. By default the version is read after the write,
+        so it may already be the version of a later write.
+
+        """
+
+        response, status = await self.put(path, content, overwrite, **kwargs)
+        if status != HTTPStatus.OK:
+            return response, status
+        return await self.get_version(path, **kwargs)
+
+    async def connect(self):
+        """Open long-lived resources (clients, connection pools) of a
+        storage. It's called once when the application starts, storages
+        that don't keep any connection don't need to override it.
+
+        """
+
+    async def close(self):
+        """Release the resources opened in `connect`. It's called once
+        when the application shuts down.
+
+        """
@@ -0,0 +1,435 @@
+"""This module is used to serve metadata of a remote storage, e.g. S3 or
+Pinata, through a cache on the local disk. A file is fetched from the
+remote storage once, then it's read from the disk, so restarting the
+service doesn't load the whole collection from the remote storage again.
+
+Every cached file keeps the version of the remote file it was fetched
+with (see `StorageInterface.get_version`). A cached file older than
+TIERED_CACHE_MAX_AGE is revalidated with the version of the remote file,
+which doesn't load the content, and fetched again only if it changed.
+
+The workers of `serve.py` share the cache directory. Each worker keeps
+an index of the files and rescans the directory every RESCAN_INTERVAL
+seconds, so the files fetched by the other workers count towards
+TIERED_CACHE_MAX_SIZE too.
+
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Optional, Union
+
+import aiofiles
+import aiofiles.os
+from pydantic import validate_arguments
+
+from module.env import Env
+from module.metrics import timed_storage_operation
+from module.response import Response
+from module.schema.storage import StorageType
+from module.storage.main import Storage
+from module.storage.storage_interface import StorageInterface
+from module.validation import validate_internal_arguments
+
+
+class TieredStorage(StorageInterface):
+    """Class to read through a local disk cache in front of the storage
+    set in TIERED_REMOTE_STORAGE. Files are written to the remote
+    storage and through to the cache.
+
+    The cache holds at most TIERED_CACHE_MAX_SIZE bytes and evicts the
+    least recently used files. Files are written to a temporary file and
+    renamed, so a reader never sees a partially written file. After a
+    restart, the files are ordered by the time they were fetched.
+
+    """
+
+    SEPARATOR = b"\n"  # Separates the remote version from the content in a cached file
+    RESCAN_INTERVAL = 60  # Seconds between scans of the cache directory
+
+    @validate_arguments(config=dict(arbitrary_types_allowed=True))
+    def __init__(self, logger: logging.Logger, config: Optional[dict] = {}, **kwargs):
+        """Initialize TieredStorage class
+
+        Args:
+            logger (logging.Logger): Logger object
+            config (dict, optional): Configuration of the remote storage. Defaults to {}
+            **kwargs: Arbitrary keyword arguments
+
+        """
+
+        if Env.TIERED_REMOTE_STORAGE == StorageType.Tiered:
+            raise ValueError("TIERED_REMOTE_STORAGE can't be tiered")
+        self.logger = logger
+        self.remote = Storage(logger=logger, storage=Env.TIERED_REMOTE_STORAGE, config=config, **kwargs)
+        self.directory = Env.TIERED_CACHE_DIR
+        self.max_size = Env.TIERED_CACHE_MAX_SIZE
+        self.max_age = Env.TIERED_CACHE_MAX_AGE
+        self.entries: Optional[OrderedDict[str, list]] = None  # File name -> [size, fetched time]
+        self.size = 0
+        self.scanned_at = 0.0
+
+    async def connect(self):
+        """Connect the remote storage and load the index of the cache"""
+
+        await self.remote.connect()
+        await self._index()
+
+    async def close(self):
+        """Close the remote storage"""
+
+        await self.remote.close()
+
+    async def _index(self) -> OrderedDict:
+        """Get the index of the cache, scanning the cache directory on the
+        first call and every RESCAN_INTERVAL seconds after. Files that are
+        already indexed keep their order, the files written by another
+        process are added as the most recently used ones.
+
+        Returns:
+            OrderedDict: index of the cached files, least recently used first
+
+        """
+
+        now = time.monotonic()
+        if self.entries is not None and now - self.scanned_at < self.RESCAN_INTERVAL:
+            return self.entries
+        first_scan = self.entries is None
+        if first_scan:
+            self.entries = OrderedDict()
+        self.scanned_at = now
+        try:
+            await aiofiles.os.makedirs(self.directory, exist_ok=True)
+            files = await asyncio.get_running_loop().run_in_executor(None, self._scan)
+        except OSError as err:
+            self.logger.error("Failed to scan tiered storage cache %s. Error: %s", self.directory, str(err))
+            return self.entries
+
+        entries = OrderedDict((name, [files[name][0], files[name][1]]) for name in self.entries if name in files)
+        for fetched, name, size in sorted((fetched, name, size) for name, (size, fetched) in files.items()):
+            if name not in entries:
+                entries[name] = [size, fetched]
+        self.entries = entries
+        self.size = sum(size for size, _ in files.values())
+        if first_scan:
+            self.logger.info("Loaded %s files (%s bytes) from tiered storage cache %s",
+                             len(self.entries),
+                             self.size,
+                             self.directory)
+        await self._evict()
+        return self.entries
+
+    def _scan(self) -> dict[str, tuple[int, float]]:
+        """List the cached files, it runs in a thread as it blocks
+
+        Returns:
+            dict[str, tuple[int, float]]: file name -> size and fetched time
+
+        """
+
+        files = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.name.endswith(".tmp"):
+                        # Left by an interrupted write, or being written by another process
+                        if time.time() - entry.stat().st_mtime > self.RESCAN_INTERVAL:
+                            os.remove(entry.path)
+                        continue
+                    stat = entry.stat()
+                except FileNotFoundError:  # Removed by another process
+                    continue
+                files[entry.name] = (stat.st_size, stat.st_mtime)
+        return files
+
+    @staticmethod
+    def _name(path: str) -> str:
+        return hashlib.blake2b(path.encode(), digest_size=16).hexdigest()
+
+    def _is_fresh(self, name: str) -> bool:
+        return time.time() - self.entries[name][1] < self.max_age
+
+    def _forget(self, name: str) -> None:
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            self.size -= entry[0]
+
+    async def _remove(self, name: str) -> None:
+        self._forget(name)
+        try:
+            await aiofiles.os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+        except OSError as err:
+            self.logger.error("Failed to remove %s from tiered storage cache. Error: %s", name, str(err))
+
+    async def _evict(self) -> None:
+        while self.size > self.max_size and self.entries:
+            name = next(iter(self.entries))
+            self.logger.info("Evict %s from tiered storage cache", name)
+            await self._remove(name)
+
+    async def _read(self, name: str) -> Optional[tuple[str, bytes]]:
+        try:
+            async with aiofiles.open(os.path.join(self.directory, name), "rb") as file:
+                data = await file.read()
+        except FileNotFoundError:  # Evicted by another process
+            self._forget(name)
+            return None
+        except Exception as err:
+            self.logger.error("Failed to read %s from tiered storage cache. Error: %s", name, str(err))
+            self._forget(name)
+            return None
+        self.entries.move_to_end(name)
+        version, _, content = data.partition(self.SEPARATOR)
+        return version.decode(), content
+
+    async def _read_version(self, name: str) -> Optional[str]:
+        try:
+            async with aiofiles.open(os.path.join(self.directory, name), "rb") as file:
+                version = await file.readline()
+        except FileNotFoundError:
+            self._forget(name)
+            return None
+        except Exception as err:
+            self.logger.error("Failed to read %s from tiered storage cache. Error: %s", name, str(err))
+            self._forget(name)
+            return None
+        return version.rstrip(self.SEPARATOR).decode()
+
+    async def _write(self, name: str, version: str, content: bytes) -> None:
+        data = version.encode() + self.SEPARATOR + content
+        if len(data) > self.max_size:
+            return
+        path = os.path.join(self.directory, name)
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            await aiofiles.os.makedirs(self.directory, exist_ok=True)
+            async with aiofiles.open(temporary_path, "xb") as file:
+                await file.write(data)
+            await aiofiles.os.replace(temporary_path, path)
+        except Exception as err:
+            self.logger.error("Failed to write %s to tiered storage cache. Error: %s", name, str(err))
+            try:
+                await aiofiles.os.remove(temporary_path)
+            except OSError:
+                pass
+            await self._remove(name)
+            return
+        self._forget(name)
+        self.entries[name] = [len(data), time.time()]
+        self.size += len(data)
+        await self._evict()
+
+    async def _touch(self, name: str) -> None:
+        now = time.time()
+        self.entries[name][1] = now
+        try:
+            await asyncio.get_running_loop().run_in_executor(None,
+                                                             os.utime,
+                                                             os.path.join(self.directory, name),
+                                                             (now, now))
+        except OSError as err:
+            self.logger.warning("Failed to touch %s in tiered storage cache. Error: %s", name, str(err))
+
+    async def _revalidate(self,
+                          path: str,
+                          name: str,
+                          version: str) -> Union[tuple[bool, HTTPStatus], Response]:
+        """Compare the version of a stale cached file with the remote file
+
+        Returns:
+            Union[tuple[bool, HTTPStatus], Response]: whether the cached file is still valid
+                and HTTP status
+
+        """
+
+        remote_version, status = await self.remote.get_version(path)
+        if status == HTTPStatus.NOT_FOUND:
+            await self._remove(name)
+            return Response.NOT_FOUND
+        if status != HTTPStatus.OK:
+            self.logger.warning("Serve stale %s from tiered storage cache, remote storage failed", path)
+            return True, HTTPStatus.OK
+        if remote_version == version:
+            await self._touch(name)
+            return True, HTTPStatus.OK
+        return False, HTTPStatus.OK
+
+    async def _fetch(self, path: str, name: str) -> Union[tuple[tuple[bytes, str], HTTPStatus], Response]:
+        # The version comes with the content, so a file changed in between isn't cached with an older version
+        response, status = await self.remote.get_with_version(path)
+        if status != HTTPStatus.OK:
+            return response, status
+        content, version = response
+        content = bytes(content)
+        await self._write(name, version, content)
+        return (content, version), HTTPStatus.OK
+
+    @timed_storage_operation("tiered", "get")
+    @validate_internal_arguments
+    async def get(self, path: str, **kwargs) -> Union[tuple[bytes, HTTPStatus], Response]:
+        """Get file from the cache, or from the remote storage if it's
+        not cached or changed since it was cached
+
+        Args:
+            path (str): Path to the file
+
+        Returns:
+            Union[tuple[bytes, HTTPStatus], Response]: Response data and HTTP status
+
+        """
+
+        response, status = await self._get(path)
+        if status != HTTPStatus.OK:
+            return response, status
+        return response[0], status
+
+    @timed_storage_operation("tiered", "get_with_version")
+    @validate_internal_arguments
+    async def get_with_version(self, path: str, **kwargs) -> Union[tuple[tuple[bytes, str], HTTPStatus], Response]:
+        """Get file and the version of the remote file it was fetched with
+
+        Args:
+            path (str): Path to the file
+
+        Returns:
+            Union[tuple[tuple[bytes, str], HTTPStatus], Response]: Content and version of the file,
+                and HTTP status
+
+        """
+
+        return await self._get(path)
+
+    async def _get(self, path: str) -> Union[tuple[tuple[bytes, str], HTTPStatus], Response]:
+        name = self._name(path)
+        if name in await self._index():
+            cached = await self._read(name)
+            if cached is not None:
+                version, content = cached
+                if self._is_fresh(name):
+                    self.logger.info("Load file %s from tiered storage cache", path)
+                    return (content, version), HTTPStatus.OK
+                valid, status = await self._revalidate(path, name, version)
+                if status != HTTPStatus.OK:
+                    return valid, status
+                if valid:
+                    self.logger.info("Load revalidated file %s from tiered storage cache", path)
+                    return (content, version), HTTPStatus.OK
+        return await self._fetch(path, name)
+
+    @timed_storage_operation("tiered", "put")
+    @validate_internal_arguments
+    async def put(self, path: str, content: bytes, overwrite=False, **kwargs) -> Response:
+        """Put file to the remote storage and write it through to the
+        cache with the version of the written remote file
+
+        Args:
+            path (str): Path to the file
+            content (bytes): File content
+            overwrite (bool, optional): Overwrite the file if it exists. Defaults to False
+
+        Returns:
+            Response: Response data and HTTP status
+
+        """
+
+        response, status = await self._put(path, content, overwrite, **kwargs)
+        if status != HTTPStatus.OK:
+            return response, status
+        return Response.OK
+
+    @timed_storage_operation("tiered", "put_with_version")
+    @validate_internal_arguments
+    async def put_with_version(self,
+                               path: str,
+                               content: bytes,
+                               overwrite=False,
+                               **kwargs) -> Union[tuple[str, HTTPStatus], Response]:
+        """Put file like `put` and get the version of the written remote file
+
+        Args:
+            path (str): Path to the file
+            content (bytes): File content
+            overwrite (bool, optional): Overwrite the file if it exists. Defaults to False
+
+        Returns:
+            Union[tuple[str, HTTPStatus], Response]: Version of the written file and HTTP status
+
+        """
+
+        return await self._put(path, content, overwrite, **kwargs)
+
+    async def _put(self,
+                   path: str,
+                   content: bytes,
+                   overwrite: bool,
+                   **kwargs) -> Union[tuple[str, HTTPStatus], Response]:
+        version, status = await self.remote.put_with_version(path, content, overwrite, **kwargs)
+        if status != HTTPStatus.OK:
+            return version, status
+        await self._index()
+        await self._write(self._name(path), version, bytes(content))
+        return version, status
+
+    @timed_storage_operation("tiered", "is_exists")
+    @validate_internal_arguments
+    async def is_exists(self, path: str, **kwargs) -> Union[tuple[bool, HTTPStatus], Response]:
+        """Check if file exists in the cache or in the remote storage
+
+        Args:
+            path (str): Path to the file
+
+        Returns:
+            Union[tuple[bool, HTTPStatus], Response]: Response data and HTTP status
+
+        """
+
+        name = self._name(path)
+        if name in await self._index() and self._is_fresh(name):
+            return True, HTTPStatus.OK
+        return await self.remote.is_exists(path, **kwargs)
+
+    @timed_storage_operation("tiered", "ping")
+    @validate_internal_arguments
+    async def ping(self, path: str, **kwargs) -> Union[tuple[bool, HTTPStatus], Response]:
+        """Check that the remote storage answers, the cache isn't used
+
+        Args:
+            path (str): Path to the file
+
+        Returns:
+            Union[tuple[bool, HTTPStatus], Response]: Response data and HTTP status
+
+        """
+
+        return await self.remote.ping(path, **kwargs)
+
+    @timed_storage_operation("tiered", "get_version")
+    @validate_internal_arguments
+    async def get_version(self, path: str, **kwargs) -> Union[tuple[str, HTTPStatus], Response]:
+        """Get the version of a file. A fresh cached file returns the
+        version it was fetched with, otherwise the remote storage is asked.
+
+        Args:
+            path (str): Path to the file
+
+        Returns:
+            Union[tuple[str, HTTPStatus], Response]: Version of the file and HTTP status
+
+        """
+
+        name = self._name(path)
+        version = await self._read_version(name) if name in await self._index() else None
+        if version is not None and self._is_fresh(name):
+            return version, HTTPStatus.OK
+        remote_version, status = await self.remote.get_version(path, **kwargs)
+        if version is not None and remote_version == version:
+            await self._touch(name)
+        return remote_version, status
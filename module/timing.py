@@ -0,0 +1,52 @@
+"""Timing module records how long each step of a request takes, e.g. the
+storage read or the validation, so a slow request can be explained from
+its `Server-Timing` response header. The spans are only recorded for a
+request when `TimingMiddleware` enabled them, otherwise `Span` doesn't
+do anything.
+
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+TIMINGS: ContextVar[Optional[dict[str, float]]] = ContextVar("timings", default=None)
+
+
+class Span:
+    """Context manager that adds the time spent in its block to the span
+    of the current request. Spans with the same name are summed.
+
+    with Span("storage"):
+        await storage.get(path)
+
+    """
+
+    __slots__ = ("name", "timings", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timings = TIMINGS.get()
+
+    def __enter__(self):
+        if self.timings is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.timings is not None:
+            self.timings[self.name] = self.timings.get(self.name, 0) + time.perf_counter() - self.started
+
+
+def server_timing(timings: dict[str, float]) -> str:
+    """Format spans as a Server-Timing header value
+
+    Args:
+        timings (dict[str, float]): span durations in seconds
+
+    Returns:
+        str: header value, e.g. "storage;dur=1.2, validate;dur=0.4"
+
+    """
+
+    return ", ".join(f"{name};dur={duration * 1000:.1f}" for name, duration in timings.items())
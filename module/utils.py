@@ -1,16 +1,21 @@
-import json
+import hashlib
 import os
 from datetime import datetime
 from http import HTTPStatus
-from typing import Union
+from typing import Optional, Union
 
 from pydantic import validate_arguments, ValidationError
 
-from config import storage
+from config import metadata_cache, metadata_flight, metadata_manifest, shared_metadata_cache, storage, storage_writes
+from module import codec
+from module.cache import CachedDocument
+from module.compression import compress
 from module.env import Env
 from module.logger import logger
 from module.response import Response, _message
 from module.schema.metadata import Attribute, Metadata
+from module.timing import Span
+from module.validation import validate_internal_arguments
 
 
 @validate_arguments
@@ -124,37 +129,238 @@ def _flatten_attributes(attributes: list[Attribute]) -> dict[str, dict]:
         flattened_attributes[attribute.trait_type] = attribute.dict(exclude_none=True)
     return flattened_attributes
 
-@validate_arguments
-async def get_metadata(token: int) -> Union[tuple[dict, HTTPStatus], Response]:
-    """Get metadata for specific token ID from storage.
-    It will load metadata from a directory specified
-    in METADATA_FOLDER environment variable.
+def make_etag(version: str) -> str:
+    """Make a strong ETag from the version of a file in the storage
+
+    Args:
+        version (str): file version, see `Storage.get_version`
+
+    Returns:
+        str: quoted ETag
+
+    """
+
+    return f'"{hashlib.blake2b(version.encode("utf-8"), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag. It uses
+    the weak comparison required for If-None-Match, so W/ prefixes
+    are ignored.
+
+    Args:
+        if_none_match (Optional[str]): If-None-Match header value
+        etag (str): quoted ETag of the current content
+
+    Returns:
+        bool: True if the client has the current content
+
+    """
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+@validate_internal_arguments
+async def get_metadata_document(token: int,
+                                if_none_match: Optional[str] = None) -> Union[tuple[CachedDocument, HTTPStatus],
+                                                                              Response]:
+    """Get metadata for specific token ID from storage together
+    with its ETag. The metadata is validated once when it's
+    loaded from the storage, then the validated bytes are
+    kept in the metadata cache and returned as is, so a
+    cached read doesn't parse JSON at all.
+
+    A file whose digest is in the metadata manifest was already
+    validated, so it isn't parsed again.
+
+    On a cache miss the content and its version are read with
+    a single storage call, see `StorageInterface.get_with_version`.
+    Only when `if_none_match` is set, the version is read first
+    and the content is not loaded if the ETag matches, the status
+    is then 304 Not Modified. Concurrent misses for the same
+    token share one storage call, see `module.singleflight`.
+
+    With several workers, a miss is looked up in the metadata
+    cache shared by the workers before the storage, and a hit
+    is only served if no worker updated the token since it was
+    cached, see `module.shared_cache`.
 
     Args:
         token (int): token ID
+        if_none_match (Optional[str], optional): If-None-Match header value. Defaults to None
 
     Returns:
-        Union[tuple[dict, HTTPStatus], Response]: Response data and HTTP status code
+        Union[tuple[CachedDocument, HTTPStatus], Response]: Response data and HTTP status code
 
     """
 
+    document = metadata_cache.get(token)
+    if document is None or document.stamp != shared_metadata_cache.stamp(token):
+        document = shared_metadata_cache.get(token)
+        if document is not None:
+            document = CachedDocument(*document)
+            metadata_cache.set(token, document)
+    if document is not None:
+        if etag_matches(if_none_match, document.etag):
+            return document, HTTPStatus.NOT_MODIFIED
+        return document, HTTPStatus.OK
+
+    # A call that starts after an update must not share a read started before it
+    generation = metadata_cache.generation
+    stamp = shared_metadata_cache.stamp(token)
     path = os.path.join(Env.METADATA_FOLDER, f"{token}.json")
+    if if_none_match:
+        with Span("storage"):
+            response, status = await metadata_flight.do(("version", path, generation, stamp),
+                                                        lambda: storage.get_version(path, stamp=stamp))
+        if status != HTTPStatus.OK:
+            return response, status
+        etag = make_etag(response)
+        if etag_matches(if_none_match, etag):
+            return CachedDocument(None, etag), HTTPStatus.NOT_MODIFIED
+    return await metadata_flight.do(("load", path, generation, stamp),
+                                    lambda: load_metadata_document(token, path, generation, stamp))
+
+
+@validate_internal_arguments
+async def load_metadata_document(token: int,
+                                 path: str,
+                                 generation: int,
+                                 stamp: int = 0) -> Union[tuple[CachedDocument, HTTPStatus], Response]:
+    """Load metadata from storage, validate it unless it's trusted by
+    the metadata manifest and put it in the metadata cache and in the
+    shared metadata cache
+
+    Args:
+        token (int): token ID
+        path (str): path of the metadata file
+        generation (int): generation of the metadata cache before the file was read
+        stamp (int, optional): stamp of the shared cache entry before the file was read. Defaults to 0
+
+    Returns:
+        Union[tuple[CachedDocument, HTTPStatus], Response]: Response data and HTTP status code
+
+    """
+
     logger.info("Load metadata for token ID %s from path %s", token, path)
-    response, status = await storage.get(path)
+    with Span("storage"):
+        # The stamp changes when another worker updates the token, see `PinataStorage`
+        response, status = await storage.get_with_version(path, stamp=stamp)
     if status != HTTPStatus.OK:
         return response, status
+    response, version = response
+    etag = make_etag(version)
+    if not metadata_manifest.is_trusted(token, response):
+        with Span("validate"):
+            response, status = validate_metadata(response)
+        if status != HTTPStatus.OK:
+            return response, status
+    cached = generation == metadata_cache.generation  # Don't cache what was read before an update
+    if cached and metadata_cache.max_size:
+        # Pack storage returns a view of the pack, the cache keeps a copy. A document
+        # that isn't cached is sent from the view, the shared cache copies it anyway.
+        response = bytes(response)
+    document = CachedDocument(response, etag)
+    if cached:
+        document.stamp = shared_metadata_cache.set(token, response, etag, stamp)
+        if document.stamp is not None:  # None if another worker updated the token meanwhile
+            metadata_cache.set(token, document)
+    return document, HTTPStatus.OK
+
+
+def validate_metadata(content: bytes) -> Union[tuple[bytes, HTTPStatus], Response]:
+    """Validate serialized metadata against the Metadata schema
+
+    Args:
+        content (bytes): serialized metadata
+
+    Returns:
+        Union[tuple[bytes, HTTPStatus], Response]: The content if it's valid or
+            the validation errors, and HTTP status code
+
+    """
+
     try:
-        Metadata.parse_raw(response)
+        Metadata.parse_raw(content)
     except ValidationError as err:
         logger.error("Invalid metadata format. Error: %s", str(err.errors()))
-        return json.loads(err.json()), HTTPStatus.BAD_REQUEST
-    return json.loads(response.decode("utf-8")), HTTPStatus.OK
+        return codec.loads(err.json()), HTTPStatus.BAD_REQUEST
+    return content, HTTPStatus.OK
+
+
+def encode_document(token: int, document: CachedDocument, encoding: str) -> bytes:
+    """Get a metadata document compressed with a content coding.
+    The compressed content is kept in the document, so a cached
+    document is compressed once per content coding.
+
+    Args:
+        token (int): token ID
+        document (CachedDocument): metadata document
+        encoding (str): content coding, see `module.compression`
+
+    Returns:
+        bytes: compressed content
+
+    """
+
+    encoded = document.encodings.get(encoding)
+    if encoded is None:
+        encoded = compress(document.content, encoding)
+        document.encodings[encoding] = encoded
+        metadata_cache.resize(token)
+    return encoded
+
+
+@validate_internal_arguments
+async def get_raw_metadata(token: int) -> Union[tuple[bytes, HTTPStatus], Response]:
+    """Get metadata for specific token ID from storage as
+    raw bytes, see `get_metadata_document`.
+
+    Args:
+        token (int): token ID
+
+    Returns:
+        Union[tuple[bytes, HTTPStatus], Response]: Response data and HTTP status code
+
+    """
+
+    response, status = await get_metadata_document(token)
+    if status != HTTPStatus.OK:
+        return response, status
+    return response.content, HTTPStatus.OK
+
+
+@validate_internal_arguments
+async def get_metadata(token: int) -> Union[tuple[dict, HTTPStatus], Response]:
+    """Get metadata for specific token ID from storage.
+    It will load metadata from a directory specified
+    in METADATA_FOLDER environment variable.
+
+    Args:
+        token (int): token ID
+
+    Returns:
+        Union[tuple[dict, HTTPStatus], Response]: Response data and HTTP status code
+
+    """
+
+    response, status = await get_raw_metadata(token)
+    if status != HTTPStatus.OK:
+        return response, status
+    with Span("decode"):
+        return codec.loads(response), HTTPStatus.OK
 
 @validate_arguments
 async def save_metadata(token: int, metadata: Metadata, overwrite=False) -> Response:
     """Save metadata for specific token ID to storage.
     It will save to a folder specified in METADATA_FOLDER
-    environment variable.
+    environment variable, invalidate the cached metadata
+    of the token and record the digest of the validated
+    metadata in the metadata manifest.
 
     Args:
         token (int): token ID
@@ -168,11 +374,22 @@ async def save_metadata(token: int, metadata: Metadata, overwrite=False) -> Resp
 
     path = os.path.join(Env.METADATA_FOLDER, f"{token}.json")
     logger.info("Save metadata for token ID %s to path %s", token, path)
-    return await storage.put(path,
-                             metadata.json(exclude_none=True).encode("utf-8"),
-                             overwrite)
-
-@validate_arguments
+    with Span("serialize"):
+        content = codec.dumps(metadata.dict(exclude_none=True))
+    with Span("storage"):
+        return await storage_writes.run(_save_and_invalidate(token, path, content, overwrite))
+
+
+async def _save_and_invalidate(token: int, path: str, content: bytes, overwrite: bool) -> Response:
+    # Runs as one tracked task, so a cancelled request still invalidates the caches after the write
+    response = await storage.put(path, content, overwrite)
+    metadata_cache.delete(token)
+    shared_metadata_cache.delete(token)
+    if response[1] == HTTPStatus.OK:
+        metadata_manifest.stamp(token, content)
+    return response
+
+@validate_internal_arguments
 async def create_backup(path: str, data: bytes) -> Response:
     """Create a backup file. It will create a 'backup' directory
     in a given path then put the backup file inside the backup
@@ -199,4 +416,4 @@ async def create_backup(path: str, data: bytes) -> Response:
     backup_file = f"{filename}_{timestamp.time().isoformat()}{extension}"
     backup_path = os.path.join(backup_folder, backup_file)
     logger.info("Backup file %s to %s", path, backup_path)
-    return await storage.put(backup_path, data)
\ No newline at end of file
+    return await storage_writes.run(storage.put(backup_path, data))
\ No newline at end of file
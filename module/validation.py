@@ -0,0 +1,39 @@
+"""Validation module contains helpers to validate arguments of internal
+functions. Requests are validated once at the edge by the routers and
+the request body schemas, so internal calls only pass values that are
+already valid. Validating them again on every layer (router, controller,
+`Storage` and the storage backend) costs more than the storage read
+itself when the metadata is cached.
+
+"""
+
+from typing import Callable, TypeVar
+
+from pydantic import validate_arguments
+
+from module.env import Env
+
+Function = TypeVar("Function", bound=Callable)
+
+
+def validate_internal_arguments(function: Function) -> Function:
+    """Decorator that validates the arguments of an internal function
+    with `pydantic.validate_arguments` only if VALIDATE_INTERNAL_CALLS
+    environment variable is enabled, e.g. during development. Otherwise,
+    the function is returned as is, so the call doesn't have any
+    overhead. The setting is read once when the function is decorated.
+
+    Functions that rely on pydantic to convert their arguments, e.g. a
+    dict to a schema, must keep using `validate_arguments` instead.
+
+    Args:
+        function (Function): function to decorate
+
+    Returns:
+        Function: validated function or the function itself
+
+    """
+
+    if Env.VALIDATE_INTERNAL_CALLS:
+        return validate_arguments(function)
+    return function
@@ -0,0 +1,155 @@
+"""Warm-up module pre-loads the metadata of every token from 1 to
+MAX_TOKEN_ID into the metadata cache when the service starts, so the
+first requests after a deployment don't all miss the cache. The
+warm-up runs in the background, requests that arrive meanwhile are
+served as usual and load their metadata from the storage on a miss.
+
+With SHARED_CACHE_PATH, only the worker that takes the warm-up lock
+warms up the shared cache, the other workers load their metadata from
+it on a miss. Without it, every worker warms up its own cache.
+
+"""
+
+import asyncio
+import logging
+import os
+import time
+from http import HTTPStatus
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from config import metadata_cache, shared_metadata_cache
+from module.env import Env
+from module.logger import logger
+from module.utils import get_metadata_document
+
+
+class CacheWarmUp:
+    """Background task that loads every token into the metadata cache"""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.warming = False
+        self.total = 0
+        self.loaded = 0
+        self.failed = 0
+        self.task: Optional[asyncio.Task] = None
+        self.lock: Optional[int] = None  # Descriptor of the warm-up lock of the shared cache
+
+    def start(self, concurrency: int = None) -> None:
+        """Start the warm-up in the background. It's marked as warming
+        immediately, so the health check is unavailable until it's done.
+
+        Args:
+            concurrency (int, optional): number of tokens loaded at once. Defaults to WARM_UP_CONCURRENCY
+
+        """
+
+        self.warming = True
+        self.task = asyncio.ensure_future(self.run(concurrency or Env.WARM_UP_CONCURRENCY))
+
+    async def stop(self) -> None:
+        """Cancel the warm-up if it's still running and release the
+        warm-up lock of the shared cache
+
+        """
+
+        if self.lock is not None:
+            os.close(self.lock)
+            self.lock = None
+        if self.task is None or self.task.done():
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.warming = False  # The task may be cancelled before it started
+
+    async def run(self, concurrency: int) -> None:
+        """Load the metadata of every token into the metadata cache
+
+        Args:
+            concurrency (int): number of tokens loaded at once
+
+        """
+
+        self.warming = True
+        self.total = Env.MAX_TOKEN_ID
+        self.loaded = self.failed = 0
+        try:
+            if not metadata_cache.max_size:
+                self.logger.warning("Skip cache warm-up, the metadata cache is disabled")
+                return
+            if shared_metadata_cache.enabled and not self._lock_shared_cache():
+                self.logger.info("Skip cache warm-up, another worker warms up the shared cache")
+                return
+            if metadata_cache.ttl:
+                self.logger.warning("Warmed up metadata expires after METADATA_CACHE_TTL=%ss, "
+                                    "set it to 0 to keep every token in the cache",
+                                    metadata_cache.ttl)
+            await self._run(concurrency)
+        finally:
+            self.warming = False
+
+    def _lock_shared_cache(self) -> bool:
+        """Take the warm-up lock of the shared cache. It's held until the
+        warm-up is stopped, so a worker that starts later doesn't warm up
+        the shared cache again.
+
+        Returns:
+            bool: True if this worker warms up the shared cache
+
+        """
+
+        if self.lock is not None:
+            return True
+        descriptor = os.open(f"{shared_metadata_cache.path}.warm-up", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(descriptor)
+            return False
+        self.lock = descriptor
+        return True
+
+    async def _run(self, concurrency: int) -> None:
+        self.logger.info("Warm up metadata cache with %s tokens, %s at once", self.total, concurrency)
+        started = time.perf_counter()
+        evictions = metadata_cache.evictions
+        step = max(1, self.total // 10)
+        tokens = iter(range(1, self.total + 1))
+
+        async def load():
+            for token in tokens:
+                try:
+                    _, status = await get_metadata_document(token)
+                except Exception as err:
+                    self.logger.error("Failed to warm up token ID %s. Error: %s", token, str(err))
+                    status = HTTPStatus.INTERNAL_SERVER_ERROR
+                if status == HTTPStatus.OK:
+                    self.loaded += 1
+                else:
+                    self.failed += 1
+                if (self.loaded + self.failed) % step == 0:
+                    self.logger.info("Warmed up %s/%s tokens", self.loaded + self.failed, self.total)
+
+        await asyncio.gather(*(load() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        self.logger.info("Warmed up metadata cache in %.1fs: %s loaded, %s failed, %s tokens/s, %s bytes cached",
+                         elapsed,
+                         self.loaded,
+                         self.failed,
+                         round(self.total / elapsed, 1),
+                         metadata_cache.size)
+        if metadata_cache.evictions > evictions:
+            self.logger.warning("Metadata cache evicted %s entries during warm-up, "
+                                "increase METADATA_CACHE_MAX_SIZE to keep every token",
+                                metadata_cache.evictions - evictions)
+
+
+cache_warm_up = CacheWarmUp(logger)
@@ -2,9 +2,29 @@
 
 from fastapi import APIRouter
 
+from controller import health
+from module.codec import JSONResponse
+from module.env import Env
+from module.response import Response
+from module.warmup import cache_warm_up
+
 router = APIRouter()
 
 
 @router.get("/health")
 async def healthcheck():
+    if cache_warm_up.warming and Env.WARM_UP_BLOCK_HEALTH:
+        content, status_code = Response.WARMING_UP
+        return JSONResponse(content=content, status_code=status_code)
+    return "Ok"
+
+
+@router.get("/health/live")
+async def liveness():
     return "Ok"
+
+
+@router.get("/health/ready")
+async def readiness():
+    content, status_code = await health.ready()
+    return JSONResponse(content=content, status_code=status_code)
@@ -1,16 +1,69 @@
 """Metadata router module contains endpoints related to metadata"""
 
-from fastapi import APIRouter, Path
-from fastapi.responses import JSONResponse
+from http import HTTPStatus
+from typing import Optional, Union
+
+from fastapi import APIRouter, Header, Path, Query
+from fastapi.responses import Response, StreamingResponse
 
 from controller import metadata
+from module.codec import JSONResponse
+from module.compression import choose_encoding, compress_stream
 from module.constant import EndpointTag
 from module.env import Env
 
 router = APIRouter(tags=[EndpointTag.PUBLIC_METADATA_API])
 
 
+class MetadataResponse(Response):
+    """Response of a metadata document. The content can be a view of the
+    metadata pack, it's sent without copying it.
+
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Union[bytes, memoryview]) -> Union[bytes, memoryview]:
+        if isinstance(content, memoryview):
+            return content
+        return super().render(content)
+
+
 @router.get("/metadata/{token}")
-async def get_metadata(token: int = Path(gt=0, le=Env.MAX_TOKEN_ID)):
-    content, status_code = await metadata.get(token)
-    return JSONResponse(content=content, status_code=status_code)
+async def get_metadata(token: int = Path(gt=0, le=Env.MAX_TOKEN_ID),
+                       if_none_match: Optional[str] = Header(default=None),
+                       accept_encoding: Optional[str] = Header(default=None)):
+    content, status_code = await metadata.get(token, if_none_match)
+    if status_code not in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
+        return JSONResponse(content=content, status_code=status_code)
+    encoding = metadata.negotiate(content, accept_encoding)
+    headers = _cache_headers(content.etag, metadata.is_weak_etag(content, encoding, if_none_match))
+    if status_code == HTTPStatus.NOT_MODIFIED:
+        return Response(status_code=status_code, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return MetadataResponse(content=metadata.encode(token, content, encoding), headers=headers)
+
+
+@router.get("/metadata")
+async def get_many_metadata(ids: str = Query(description="Comma separated token IDs, e.g. 1,2,3"),
+                            accept_encoding: Optional[str] = Header(default=None)):
+    content, status_code = metadata.parse_token_ids(ids)
+    if status_code != HTTPStatus.OK:
+        return JSONResponse(content=content, status_code=status_code)
+    encoding = choose_encoding(accept_encoding)
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(compress_stream(metadata.get_many(content), encoding),
+                             media_type="application/json",
+                             headers=headers)
+
+
+def _cache_headers(etag: str, weak: bool) -> dict[str, str]:
+    # A compressed body is a different representation, so its ETag
+    # is weak. If-None-Match uses the weak comparison, so both match.
+    headers = {"ETag": f"W/{etag}" if weak else etag, "Vary": "Accept-Encoding"}
+    if Env.METADATA_CACHE_CONTROL:
+        headers["Cache-Control"] = Env.METADATA_CACHE_CONTROL
+    return headers
@@ -0,0 +1,14 @@
+"""Endpoint for Prometheus metrics"""
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from module.metrics import scrape_registry
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def metrics():
+    return Response(content=generate_latest(scrape_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -2,10 +2,11 @@
 
 from fastapi import FastAPI
 
-from routers import health, metadata, internal_metadata
+from routers import health, metadata, metrics, internal_metadata
 
 
 def router(app: FastAPI):
     app.include_router(health.router)
+    app.include_router(metrics.router)
     app.include_router(metadata.router)
     app.include_router(internal_metadata.router)
@@ -0,0 +1,67 @@
+"""Production entry point of the service. It runs SERVER_WORKERS worker
+processes, one per CPU by default, on the uvloop event loop with the
+httptools HTTP parser, falling back to asyncio and h11 where they aren't
+installed.
+
+On SIGTERM or SIGINT a worker stops accepting connections, waits for the
+requests in progress to be answered, then for the storage writes they
+started, see SHUTDOWN_TIMEOUT, before it closes the storage.
+
+The shared metadata cache of a previous run is removed before the
+workers start, so they don't serve metadata that changed meanwhile.
+
+The workers write their metrics to PROMETHEUS_MULTIPROC_DIR, a temporary
+directory unless it's set, so `GET /metrics` reports all of them. The
+metrics files of a previous run are removed first.
+
+    python serve.py
+
+"""
+
+import glob
+import os
+import tempfile
+
+import uvicorn
+
+from module.env import Env
+
+
+def prepare_metrics_directory() -> str:
+    """Create or clear the directory of the multiprocess metrics, the
+    workers inherit it from the environment
+
+    Returns:
+        str: path of the directory
+
+    """
+
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+    else:
+        directory = tempfile.mkdtemp(prefix="metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    return directory
+
+
+def main():
+    if Env.SHARED_CACHE_PATH and os.path.exists(Env.SHARED_CACHE_PATH):
+        os.remove(Env.SHARED_CACHE_PATH)
+    prepare_metrics_directory()
+    uvicorn.run("main:app",
+                host="0.0.0.0",
+                port=Env.PORT,
+                workers=Env.SERVER_WORKERS or os.cpu_count(),
+                loop="auto",  # uvloop when it's installed
+                http="auto",  # httptools when it's installed
+                backlog=Env.SERVER_BACKLOG,
+                timeout_keep_alive=Env.SERVER_KEEP_ALIVE_TIMEOUT,
+                limit_concurrency=Env.SERVER_LIMIT_CONCURRENCY,
+                server_header=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Stand-in servers that speak just enough of the remote storage HTTP
+APIs for the storage classes. They are used by the tests and the
+benchmarks to exercise the real HTTP clients without any network
+access. A server can also be started on its own:
+
+    python -m tests.stand_in s3 --port 9000
+
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+
+from aiohttp import web
+
+
+class StandInServer:
+    """Base class that counts the requests and the TCP connections
+    opened by the clients, so tests can assert connection reuse
+
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = set()
+        self.app = web.Application(middlewares=[self._count])
+        self.runner = None
+        self.url = None
+
+    @web.middleware
+    async def _count(self, request: web.Request, handler):
+        self.requests += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+        return await handler(request)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start the server and return its base URL"""
+
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        host, port = self.runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        """Stop the server"""
+
+        await self.runner.cleanup()
+
+
+class S3StandIn(StandInServer):
+    """In-memory S3 stand-in supporting GetObject, PutObject and
+    HeadObject with path-style addressing
+
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.app.router.add_route("GET", "/{bucket}/{key:.+}", self.get_object)
+        self.app.router.add_route("HEAD", "/{bucket}/{key:.+}", self.head_object)
+        self.app.router.add_route("PUT", "/{bucket}/{key:.+}", self.put_object)
+
+    @staticmethod
+    def etag(content: bytes) -> str:
+        return f'"{hashlib.md5(content).hexdigest()}"'
+
+    async def get_object(self, request: web.Request) -> web.Response:
+        content = self.objects.get((request.match_info["bucket"], request.match_info["key"]))
+        if content is None:
+            body = "<Error><Code>NoSuchKey</Code><Message>The specified key does not exist.</Message></Error>"
+            return web.Response(status=404, text=body, content_type="application/xml")
+        return web.Response(body=content, headers={"ETag": self.etag(content)})
+
+    async def head_object(self, request: web.Request) -> web.Response:
+        content = self.objects.get((request.match_info["bucket"], request.match_info["key"]))
+        if content is None:
+            return web.Response(status=404)
+        return web.Response(headers={"ETag": self.etag(content), "Content-Length": str(len(content))})
+
+    async def put_object(self, request: web.Request) -> web.Response:
+        content = await request.read()
+        self.objects[(request.match_info["bucket"], request.match_info["key"])] = content
+        return web.Response(headers={"ETag": self.etag(content)})
+
+
+class PinataStandIn(StandInServer):
+    """In-memory stand-in for both the Pinata API (pinList, pinFileToIPFS
+    and unpin) and the IPFS gateway. Use `api_url` and `gateway_url`
+    as `PinataStorage.api_host` and `PinataStorage.host`.
+
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.pins: dict[str, str] = {}  # Pin name to CID
+        self.files: dict[str, bytes] = {}  # CID or CID/path to content
+        self.app.router.add_route("GET", "/data/pinList", self.pin_list)
+        self.app.router.add_route("POST", "/pinning/pinFileToIPFS", self.pin_file)
+        self.app.router.add_route("DELETE", "/pinning/unpin/{cid}", self.unpin)
+        self.app.router.add_route("GET", "/ipfs/{path:.+}", self.gateway)
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.url}/"
+
+    @property
+    def gateway_url(self) -> str:
+        return f"{self.url}/ipfs/"
+
+    @staticmethod
+    def cid(content: bytes) -> str:
+        return f"bafy{hashlib.sha256(content).hexdigest()[:52]}"
+
+    def pin(self, name: str, content: bytes) -> str:
+        """Pin a single file and return its CID"""
+
+        cid = self.cid(content)
+        self.pins[name] = cid
+        self.files[cid] = content
+        return cid
+
+    def pin_folder(self, name: str, files: dict[str, bytes]) -> str:
+        """Pin a folder of files and return the CID of the folder"""
+
+        cid = self.cid(json.dumps(sorted(files)).encode("utf-8") + b"".join(files.values()))
+        self.pins[name] = cid
+        for path, content in files.items():
+            self.files[f"{cid}/{path}"] = content
+        return cid
+
+    async def pin_list(self, request: web.Request) -> web.Response:
+        cid = self.pins.get(request.query.get("metadata[name]"))
+        rows = [{"ipfs_pin_hash": cid}] if cid else []
+        return web.json_response({"rows": rows})
+
+    async def pin_file(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        content = form["file"]
+        content = content.file.read() if isinstance(content, web.FileField) else bytes(content)
+        name = json.loads(form["pinataMetadata"])["name"]
+        return web.json_response({"IpfsHash": self.pin(name, content), "PinSize": len(content)})
+
+    async def unpin(self, request: web.Request) -> web.Response:
+        cid = request.match_info["cid"]
+        self.pins = {name: pinned for name, pinned in self.pins.items() if pinned != cid}
+        return web.Response(text="OK")
+
+    async def gateway(self, request: web.Request) -> web.Response:
+        path = request.match_info["path"]
+        content = self.files.get(path)
+        if content is None:
+            cid, _, link = path.partition("/")
+            return web.Response(status=500, text=f"no link named \"{link}\" under {cid}")
+        return web.Response(body=content)
+
+
+SERVERS = {"s3": S3StandIn, "pinata": PinataStandIn}
+
+
+async def serve(server: StandInServer, host: str, port: int):
+    print(await server.start(host, port), flush=True)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("server", choices=SERVERS)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(serve(SERVERS[args.server](), args.host, args.port))
@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import patch
+
+from module import cache
+from module.cache import CachedDocument, LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_get_and_set(self):
+        lru = LRUCache(max_size=100)
+        self.assertTrue(lru.set(1, b"metadata"))
+        self.assertEqual(lru.get(1), b"metadata")
+        self.assertIsNone(lru.get(2))
+        self.assertEqual(lru.hits, 1)
+        self.assertEqual(lru.misses, 1)
+        self.assertEqual(lru.size, len(b"metadata"))
+
+    def test_evict_by_size(self):
+        lru = LRUCache(max_size=10)
+        lru.set(1, b"aaaa")
+        lru.set(2, b"bbbb")
+        lru.get(1)  # 2 becomes the least recently used entry
+        lru.set(3, b"cccc")
+        self.assertIsNone(lru.get(2))
+        self.assertEqual(lru.get(1), b"aaaa")
+        self.assertEqual(lru.get(3), b"cccc")
+        self.assertEqual(lru.evictions, 1)
+        self.assertEqual(lru.size, 8)
+
+    def test_reject_entry_larger_than_cache(self):
+        lru = LRUCache(max_size=4)
+        self.assertFalse(lru.set(1, b"too large"))
+        self.assertEqual(len(lru), 0)
+        self.assertEqual(lru.size, 0)
+
+    def test_disabled_cache(self):
+        lru = LRUCache(max_size=0)
+        self.assertFalse(lru.set(1, b"metadata"))
+        self.assertIsNone(lru.get(1))
+
+    def test_replace_entry(self):
+        lru = LRUCache(max_size=100)
+        lru.set(1, b"old")
+        lru.set(1, b"new value")
+        self.assertEqual(lru.get(1), b"new value")
+        self.assertEqual(lru.size, len(b"new value"))
+
+    @patch.object(cache.time, "monotonic")
+    def test_expired_entry(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        lru = LRUCache(max_size=100, ttl=10)
+        lru.set(1, b"metadata")
+        lru.set(2, b"metadata", ttl=0)
+        mock_monotonic.return_value = 111
+        self.assertIsNone(lru.get(1))
+        self.assertEqual(lru.get(2), b"metadata")
+        self.assertEqual(lru.size, len(b"metadata"))
+
+    def test_resize_entry(self):
+        lru = LRUCache(max_size=20)
+        lru.set(1, CachedDocument(b"aaaa", '"1"'))
+        document = CachedDocument(b"bbbb", '"2"')
+        lru.set(2, document)
+        document.encodings["gzip"] = b"cccccccc"
+        lru.resize(2)
+        self.assertEqual(lru.size, 16)
+
+        document.encodings["br"] = b"dddddddd"
+        lru.resize(2)
+        self.assertIsNone(lru.get(1))
+        self.assertIs(lru.get(2), document)
+        self.assertEqual(lru.size, 20)
+
+        document.encodings["deflate"] = b"e"
+        lru.resize(2)
+        self.assertEqual(len(lru), 0)
+        self.assertEqual(lru.size, 0)
+        lru.resize(3)
+
+    def test_delete_bumps_generation(self):
+        lru = LRUCache(max_size=100)
+        lru.set(1, b"metadata")
+        generation = lru.generation
+        lru.delete(1)
+        lru.delete(2)
+        self.assertIsNone(lru.get(1))
+        self.assertEqual(lru.generation, generation + 2)
+        self.assertEqual(lru.size, 0)
+
+    def test_stats(self):
+        lru = LRUCache(max_size=100)
+        lru.set(1, b"metadata")
+        lru.get(1)
+        lru.get(2)
+        self.assertDictEqual(lru.stats, {"entries": 1,
+                                         "size": 8,
+                                         "max_size": 100,
+                                         "hits": 1,
+                                         "misses": 1,
+                                         "evictions": 0})
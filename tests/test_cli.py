@@ -0,0 +1,100 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from http import HTTPStatus
+from unittest.mock import patch
+
+import cli
+from config import metadata_manifest
+from module.env import Env
+from module.logger import logger
+from module.manifest import Manifest
+from module.schema.storage import StorageType
+from module.storage.pack import PackStorage
+from tests.constant import METADATA_DIR
+
+
+class TestForEachToken(unittest.TestCase):
+
+    def test_for_each_token(self):
+        calls = []
+        running = {"now": 0, "max": 0}
+
+        async def call(token: int):
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            await asyncio.sleep(0)
+            calls.append(token)
+            running["now"] -= 1
+
+        with patch.object(Env, "MAX_TOKEN_ID", 20):
+            asyncio.run(cli.for_each_token(3, call))
+        self.assertListEqual(sorted(calls), list(range(1, 21)))
+        self.assertEqual(running["max"], 3)
+
+
+class TestScan(unittest.TestCase):
+
+    def test_scan(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(metadata_manifest, "path", os.path.join(directory, "manifest.json")), \
+                patch.object(metadata_manifest, "digests", {}), \
+                patch.object(metadata_manifest, "changed", set()):
+            results = asyncio.run(cli.scan(concurrency=2))
+            self.assertDictEqual(results, {"valid": [1, 2, 3], "invalid": [4], "missing": [5], "failed": []})
+            for token in [1, 2, 3]:
+                with open(os.path.join(METADATA_DIR, f"{token}.json"), "rb") as file:
+                    self.assertTrue(metadata_manifest.is_trusted(token, file.read()))
+            self.assertNotIn(4, metadata_manifest.digests)
+
+            metadata_manifest.save()
+            self.assertEqual(len(Manifest(metadata_manifest.path, metadata_manifest.logger).digests), 3)
+
+
+class TestPack(unittest.TestCase):
+
+    def test_pack(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metadata.pack")
+            with patch.object(metadata_manifest, "path", None):
+                results = asyncio.run(cli.pack(path, StorageType.Local, concurrency=2))
+            self.assertDictEqual(results, {"valid": [1, 2, 3], "invalid": [4], "missing": [5], "failed": []})
+
+            with patch.object(Env, "METADATA_PACK", path):
+                storage = PackStorage(logger)
+                for token in range(1, 6):
+                    response, status = asyncio.run(storage.get(os.path.join(Env.METADATA_FOLDER, f"{token}.json")))
+                    if token > 3:
+                        self.assertEqual(status, HTTPStatus.NOT_FOUND)
+                        continue
+                    with open(os.path.join(METADATA_DIR, f"{token}.json"), "rb") as file:
+                        self.assertEqual(response, file.read())
+                asyncio.run(storage.close())
+
+
+class TestAudit(unittest.TestCase):
+
+    def test_audit(self):
+        results, errors, statistics = asyncio.run(cli.audit(StorageType.Local, concurrency=2, processes=2, batch_size=2))
+        self.assertDictEqual(results, {"valid": [1, 2, 3], "invalid": [4], "missing": [5], "failed": []})
+        self.assertListEqual(list(errors), [4])
+        self.assertTrue(errors[4])
+        self.assertEqual(statistics["tokens"], 5)
+        self.assertEqual(statistics["files"], 4)
+        self.assertEqual(statistics["bytes"],
+                         sum(os.path.getsize(os.path.join(METADATA_DIR, f"{token}.json")) for token in range(1, 5)))
+
+    def test_audit_with_batches_waiting_for_validation(self):
+        # One process takes two batches at once, so loading the other batches waits for it
+        results, errors, _ = asyncio.run(cli.audit(StorageType.Local, concurrency=4, processes=1, batch_size=1))
+        self.assertDictEqual(results, {"valid": [1, 2, 3], "invalid": [4], "missing": [5], "failed": []})
+        self.assertListEqual(list(errors), [4])
+
+    def test_validate_batch(self):
+        results = cli.validate_batch([(1, b'{"name": "1", "image_url": "https://example.com/1.png"}'),
+                                      (2, b'{"name": "2"}'),
+                                      (3, b"not json")])
+        self.assertEqual(results[0], (1, None))
+        self.assertEqual([error["loc"] for error in results[1][1]], [("image_url",)])
+        self.assertTrue(results[2][1])
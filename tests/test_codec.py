@@ -0,0 +1,73 @@
+import unittest
+from datetime import datetime
+from http import HTTPStatus
+from unittest.mock import Mock, patch
+
+from module import codec
+from module.codec import JSONResponse
+from module.schema.metadata import Metadata
+from module.utils import validate_metadata
+
+CODECS = [codec.STDLIB] + ([codec.ORJSON] if codec.ORJSON else [])
+
+
+class TestCodec(unittest.TestCase):
+    metadata = Metadata(name="Mölér 🐉",
+                        image_url="https://example.com/1.png",
+                        attributes=[{"trait_type": "HP", "value": 33}, {"trait_type": "Speed", "value": 1.5}])
+
+    def test_dumps(self):
+        expected = ('{"name":"Mölér 🐉","image_url":"https://example.com/1.png",'
+                    '"attributes":[{"trait_type":"HP","value":33},{"trait_type":"Speed","value":1.5}]}').encode("utf-8")
+        for json_codec in CODECS:
+            with patch.object(codec, "CODEC", json_codec):
+                self.assertEqual(codec.dumps(self.metadata.dict(exclude_none=True)), expected, json_codec.name)
+
+    def test_dumps_non_string_keys_and_pydantic_types(self):
+        content = {2: {"status": HTTPStatus.OK}, 1: {"time": datetime(2023, 1, 2, 3, 4, 5)}, "metadata": self.metadata}
+        for json_codec in CODECS:
+            with patch.object(codec, "CODEC", json_codec):
+                self.assertEqual(codec.loads(codec.dumps(content)),
+                                 {"2": {"status": 200},
+                                  "1": {"time": "2023-01-02T03:04:05"},
+                                  "metadata": self.metadata.dict()},
+                                 json_codec.name)
+
+    def test_loads(self):
+        document = '{"b": "é", "a": [1, 2.5, null, true]}'
+        for json_codec in CODECS:
+            with patch.object(codec, "CODEC", json_codec):
+                for content in (document, document.encode("utf-8")):
+                    loaded = codec.loads(content)
+                    self.assertEqual(loaded, {"b": "é", "a": [1, 2.5, None, True]}, json_codec.name)
+                    self.assertEqual(list(loaded), ["b", "a"], json_codec.name)
+
+    def test_integers_beyond_64_bits(self):
+        document = {"trait_type": "DNA", "value": 123456789012345678901234567890, "other": [2 ** 70, -2 ** 63 - 1]}
+        for json_codec in CODECS:
+            with patch.object(codec, "CODEC", json_codec):
+                content = codec.dumps(document)
+                self.assertEqual(content, b'{"trait_type":"DNA","value":123456789012345678901234567890,'
+                                          b'"other":[1180591620717411303424,-9223372036854775809]}', json_codec.name)
+                for loaded in (codec.loads(content), codec.loads(content.decode()), codec.loads(memoryview(content))):
+                    self.assertEqual(loaded, document, json_codec.name)
+                    self.assertIsInstance(loaded["value"], int, json_codec.name)
+                self.assertEqual(Metadata.parse_raw(b'{"name": "1", "image_url": "https://example.com/1.png", '
+                                                    b'"attributes": [{"trait_type": "DNA", "value": %d}]}' % 2 ** 70)
+                                 .attributes[0].value, 2 ** 70, json_codec.name)
+
+    def test_validate_metadata_with_codec(self):
+        content = codec.dumps(self.metadata.dict(exclude_none=True))
+        for json_codec in CODECS:
+            loads = Mock(wraps=json_codec.loads)
+            with patch.object(codec, "CODEC", json_codec._replace(loads=loads)):
+                self.assertEqual(validate_metadata(content), (content, HTTPStatus.OK), json_codec.name)
+                loads.assert_called_once()
+                _, status = validate_metadata(b'{"name": ')
+                self.assertEqual(status, HTTPStatus.BAD_REQUEST, json_codec.name)
+
+    def test_json_response(self):
+        response = JSONResponse(content={"detail": "Ok ✓"}, status_code=HTTPStatus.CREATED)
+        self.assertEqual(response.body, '{"detail":"Ok ✓"}'.encode("utf-8"))
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(response.headers["content-type"], "application/json")
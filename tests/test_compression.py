@@ -0,0 +1,64 @@
+import asyncio
+import gzip
+import unittest
+from unittest.mock import patch
+
+from module import compression
+from module.compression import BROTLI, GZIP, choose_encoding, compress, compress_stream
+
+
+class TestCompression(unittest.TestCase):
+    content = b'{"name": "Moler", "attributes": [' + b'{"trait_type": "HP", "value": 33},' * 100 + b"]}"
+
+    @patch.object(compression, "ENCODINGS", (BROTLI, GZIP))
+    def test_choose_encoding(self):
+        for accept_encoding, expected_encoding in [
+            (None, None),
+            ("", None),
+            ("identity", None),
+            ("gzip", GZIP),
+            ("gzip, deflate, br", BROTLI),
+            ("gzip, br;q=0.8", GZIP),
+            ("GZIP;Q=0.5, deflate", GZIP),
+            ("br;q=0, gzip;q=0", None),
+            ("*", BROTLI),
+            ("*;q=0.5, br;q=0", GZIP),
+            ("br;q=invalid, gzip", GZIP),
+        ]:
+            self.assertEqual(choose_encoding(accept_encoding), expected_encoding, accept_encoding)
+
+    @patch.object(compression, "ENCODINGS", (GZIP,))
+    def test_choose_encoding_without_brotli(self):
+        self.assertEqual(choose_encoding("br, gzip;q=0.1"), GZIP)
+        self.assertIsNone(choose_encoding("br"))
+
+    def test_compress_gzip(self):
+        compressed = compress(self.content, GZIP)
+        self.assertLess(len(compressed), len(self.content))
+        self.assertEqual(gzip.decompress(compressed), self.content)
+        self.assertEqual(compress(self.content, GZIP), compressed)
+
+    def test_compress_stream(self):
+        async def run(encoding):
+            async def chunks():
+                for index in range(0, len(self.content), 100):
+                    yield self.content[index:index + 100]
+
+            return [chunk async for chunk in compress_stream(chunks(), encoding)]
+
+        self.assertEqual(b"".join(asyncio.run(run(None))), self.content)
+        compressed = asyncio.run(run(GZIP))
+        self.assertLess(len(compressed), len(self.content) // 100)
+        self.assertEqual(gzip.decompress(b"".join(compressed)), self.content)
+
+    @unittest.skipUnless(compression.brotli, "brotli is not installed")
+    def test_compress_brotli(self):
+        self.assertEqual(compression.brotli.decompress(compress(self.content, BROTLI)), self.content)
+
+        async def run():
+            async def chunks():
+                yield self.content
+
+            return b"".join([chunk async for chunk in compress_stream(chunks(), BROTLI)])
+
+        self.assertEqual(compression.brotli.decompress(asyncio.run(run())), self.content)
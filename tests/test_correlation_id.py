@@ -0,0 +1,27 @@
+import unittest
+import uuid
+from http import HTTPStatus
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+class TestCorrelationIdMiddleware(unittest.TestCase):
+    client = TestClient(app)
+
+    def test_correlation_id_header(self):
+        response = self.client.get("/health")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        uuid.UUID(response.headers["correlation-id"])
+
+    def test_unique_correlation_id_per_request(self):
+        first = self.client.get("/health").headers["correlation-id"]
+        second = self.client.get("/health").headers["correlation-id"]
+        self.assertNotEqual(first, second)
+
+    def test_body_is_not_modified(self):
+        response = self.client.get("/metadata/2", headers={"Accept-Encoding": "identity"})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(int(response.headers["content-length"]), len(response.content))
+        self.assertIn("correlation-id", response.headers)
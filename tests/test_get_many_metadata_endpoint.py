@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+import unittest
+from http import HTTPStatus
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from config import bulk_loads
+from controller import metadata
+from main import app
+from module.env import Env
+from module.response import Response
+
+
+class TestGetManyMetadataEndpoint(unittest.TestCase):
+    client = TestClient(app)
+
+    def test_get_many_metadata(self):
+        response = self.client.get("/metadata", params={"ids": "3,2"})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.headers["content-type"], "application/json")
+        content = response.json()
+        self.assertEqual(list(content), ["3", "2"])
+        for token in [2, 3]:
+            file_path = os.path.join(Env.METADATA_FOLDER, f"{token}.json")
+            with open(file_path) as metadata_file:
+                self.assertDictEqual(content[str(token)], json.load(metadata_file))
+
+    def test_get_many_metadata_with_errors(self):
+        response = self.client.get("/metadata", params={"ids": "2,5,4"})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        content = response.json()
+        detail, status = Response.NOT_FOUND
+        self.assertDictEqual(content["5"], {"error": detail, "status": status})
+        self.assertEqual(content["4"]["status"], HTTPStatus.BAD_REQUEST)
+        self.assertIn("name", content["2"])
+
+    def test_remove_duplicated_token_ids(self):
+        response = self.client.get("/metadata", params={"ids": "2, 2,3"})
+        self.assertEqual(list(response.json()), ["2", "3"])
+
+    def test_invalid_token_ids(self):
+        for ids in ["", "legawa", "1,,2", "0", f"{Env.MAX_TOKEN_ID + 1}", "2.0"]:
+            response = self.client.get("/metadata", params={"ids": ids})
+            detail, status = Response.INVALID_TOKEN_ID
+            self.assertEqual(response.status_code, status)
+            self.assertDictEqual(response.json(), detail)
+
+    def test_missing_token_ids(self):
+        response = self.client.get("/metadata")
+        self.assertEqual(response.status_code, HTTPStatus.UNPROCESSABLE_ENTITY)
+
+    @patch.object(Env, "BULK_READ_MAX_TOKENS", 2)
+    def test_too_many_token_ids(self):
+        response = self.client.get("/metadata", params={"ids": "1,2,3"})
+        detail, status = Response.TOO_MANY_TOKENS
+        self.assertEqual(response.status_code, status)
+        self.assertDictEqual(response.json(), detail)
+
+
+class TestGetManyMetadata(unittest.TestCase):
+
+    @patch.object(Env, "BULK_CONCURRENCY", 3)
+    @patch.object(bulk_loads, "limit", 3)
+    def test_bounded_concurrency(self):
+        running = 0
+        max_running = 0
+
+        async def get_raw_metadata(token):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.001 * (token % 4))
+            running -= 1
+            return b'{"token": %d}' % token, HTTPStatus.OK
+
+        async def run():
+            return b"".join([chunk async for chunk in metadata.get_many(list(range(1, 21)))])
+
+        with patch.object(metadata, "get_raw_metadata", get_raw_metadata):
+            content = json.loads(asyncio.run(run()))
+
+        self.assertEqual(max_running, 3)
+        self.assertEqual(list(content), [str(token) for token in range(1, 21)])
+        self.assertDictEqual(content["7"], {"token": 7})
+
+    @patch.object(bulk_loads, "limit", 4)
+    def test_bounded_concurrency_across_requests(self):
+        running = 0
+        max_running = 0
+
+        async def get_raw_metadata(token):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.001 * (token % 4))
+            running -= 1
+            return b'{"token": %d}' % token, HTTPStatus.OK
+
+        async def get_many(tokens):
+            return json.loads(b"".join([chunk async for chunk in metadata.get_many(tokens)]))
+
+        async def run():
+            return await asyncio.gather(get_many(list(range(1, 21))), get_many(list(range(21, 41))))
+
+        with patch.object(metadata, "get_raw_metadata", get_raw_metadata):
+            first, second = asyncio.run(run())
+
+        self.assertEqual(max_running, 4)  # Each request alone keeps BULK_CONCURRENCY loads ahead
+        self.assertEqual(list(first), [str(token) for token in range(1, 21)])
+        self.assertEqual(list(second), [str(token) for token in range(21, 41)])
+        self.assertEqual(bulk_loads.in_flight, 0)
+
+    def test_empty_tokens(self):
+        async def run():
+            return b"".join([chunk async for chunk in metadata.get_many([])])
+
+        self.assertEqual(asyncio.run(run()), b"{}")
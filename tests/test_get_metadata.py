@@ -1,12 +1,18 @@
 import asyncio
 import json
 import os
+import tempfile
 import unittest
 from http import HTTPStatus
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
-from module.utils import get_metadata
+from config import metadata_cache, metadata_flight, metadata_manifest, storage
+from module import codec, utils
+from module.schema.metadata import Metadata
+from module.shared_cache import SharedCache
+from module.utils import get_metadata, get_raw_metadata, save_metadata
 from module.env import Env
+from module.logger import logger
 from module.response import Response
 from tests.constant import METADATA_DIR
 
@@ -25,10 +31,133 @@ class TestGetMetadata(unittest.TestCase):
             self.assertDictEqual(metadata, response)
             self.assertEqual(status, HTTPStatus.OK)
 
+    def test_get_raw_metadata(self):
+        response, status = asyncio.run(get_raw_metadata(3))
+        file_path = os.path.join(Env.METADATA_FOLDER, "3.json")
+        with open(file_path, "rb") as metadata_file:
+            self.assertEqual(response, metadata_file.read())
+            self.assertEqual(status, HTTPStatus.OK)
+
     def test_get_metadata_not_found(self):
         response = asyncio.run(get_metadata(3749210))
         self.assertEqual(response, Response.NOT_FOUND)
 
     def test_get_invalid_metadata_format(self):
         _, status = asyncio.run(get_metadata(4))
-        self.assertEqual(status, HTTPStatus.BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(status, HTTPStatus.BAD_REQUEST)
+
+    def test_get_metadata_from_cache(self):
+        metadata_cache.clear()
+        expected_response, _ = asyncio.run(get_metadata(3))
+        hits = metadata_cache.hits
+        with patch.object(storage, "get_with_version") as mock_get:
+            response, status = asyncio.run(get_metadata(3))
+            mock_get.assert_not_called()
+        self.assertDictEqual(response, expected_response)
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertEqual(metadata_cache.hits, hits + 1)
+
+    def test_copy_pack_view_only_when_cached(self):
+        with open(os.path.join(METADATA_DIR, "3.json"), "rb") as metadata_file:
+            content = metadata_file.read()
+        response = (memoryview(content), "version"), HTTPStatus.OK
+        with patch.object(storage, "get_with_version", new_callable=AsyncMock, return_value=response):
+            metadata_cache.clear()
+            with patch.object(metadata_cache, "max_size", 0):
+                document, _ = asyncio.run(utils.get_metadata_document(3))
+                self.assertIsInstance(document.content, memoryview)
+                for json_codec in [codec.STDLIB] + ([codec.ORJSON] if codec.ORJSON else []):
+                    with patch.object(codec, "CODEC", json_codec):
+                        self.assertEqual(asyncio.run(get_metadata(3)), (json.loads(content), HTTPStatus.OK))
+
+            document, _ = asyncio.run(utils.get_metadata_document(3))
+            self.assertIsInstance(document.content, bytes)
+            self.assertIs(metadata_cache.get(3), document)
+
+    def test_coalesce_concurrent_reads(self):
+        metadata_cache.clear()
+        coalesced = metadata_flight.coalesced
+
+        async def read_concurrently():
+            return await asyncio.gather(*(get_raw_metadata(3) for _ in range(10)))
+
+        with patch.object(storage, "get_with_version", wraps=storage.get_with_version) as mock_get, \
+                patch.object(storage, "get_version", wraps=storage.get_version) as mock_get_version:
+            responses = asyncio.run(read_concurrently())
+            mock_get.assert_called_once()
+            mock_get_version.assert_not_called()
+        self.assertEqual(len(set(response for response, _ in responses)), 1)
+        self.assertEqual(metadata_flight.coalesced, coalesced + 9)
+
+    def test_do_not_cache_invalid_metadata(self):
+        metadata_cache.clear()
+        asyncio.run(get_metadata(4))
+        self.assertIsNone(metadata_cache.get(4))
+
+    def test_invalidate_cache_on_save(self):
+        asyncio.run(get_metadata(2))
+        self.assertIsNotNone(metadata_cache.get(2))
+        with patch.object(storage, "put", new_callable=AsyncMock) as mock_put:
+            mock_put.return_value = Response.OK
+            asyncio.run(save_metadata(2, {"name": "new name", "image_url": "https://image-url.url/image.png"}))
+        self.assertIsNone(metadata_cache.get(2))
+
+    def test_trust_metadata_in_manifest(self):
+        with open(os.path.join(METADATA_DIR, "3.json"), "rb") as metadata_file:
+            content = metadata_file.read()
+        with patch.object(metadata_manifest, "path", "manifest.json"), patch.object(metadata_manifest, "digests", {}):
+            for trusted in [False, True]:
+                if trusted:
+                    metadata_manifest.stamp(3, content)
+                metadata_cache.clear()
+                with patch.object(Metadata, "parse_raw", wraps=Metadata.parse_raw) as mock_parse:
+                    response, status = asyncio.run(get_raw_metadata(3))
+                self.assertEqual(mock_parse.called, not trusted)
+                self.assertEqual(response, content)
+                self.assertEqual(status, HTTPStatus.OK)
+
+    def test_validate_metadata_changed_after_stamp(self):
+        with patch.object(metadata_manifest, "path", "manifest.json"), patch.object(metadata_manifest, "digests", {}):
+            metadata_manifest.stamp(4, b'{"name": "Valid"}')
+            metadata_cache.clear()
+            _, status = asyncio.run(get_metadata(4))
+        self.assertEqual(status, HTTPStatus.BAD_REQUEST)
+
+    def test_stamp_saved_metadata(self):
+        metadata = {"name": "Moler", "image_url": "https://pixelmon.club/moler.png"}
+        with patch.object(metadata_manifest, "path", "manifest.json"), \
+                patch.object(metadata_manifest, "digests", {}), \
+                patch.object(storage, "put", new_callable=AsyncMock) as mock_put:
+            mock_put.return_value = Response.STORAGE_OPERATION_FAIL
+            asyncio.run(save_metadata(2, metadata, overwrite=True))
+            self.assertNotIn(2, metadata_manifest.digests)
+
+            mock_put.return_value = Response.OK
+            asyncio.run(save_metadata(2, metadata, overwrite=True))
+            self.assertTrue(metadata_manifest.is_trusted(2, mock_put.call_args.args[1]))
+
+    def test_share_metadata_between_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache")
+            worker, other_worker = (SharedCache(path, Env.MAX_TOKEN_ID, 1024 * 1024, logger) for _ in range(2))
+            with patch.object(utils, "shared_metadata_cache", worker):
+                metadata_cache.clear()
+                expected_response, _ = asyncio.run(get_raw_metadata(3))
+                self.assertEqual(other_worker.get(3)[0], expected_response)
+
+                metadata_cache.clear()  # The cache of another worker
+                with patch.object(storage, "get_with_version") as mock_get:
+                    response, status = asyncio.run(get_raw_metadata(3))
+                    mock_get.assert_not_called()
+                self.assertEqual(response, expected_response)
+                self.assertEqual(status, HTTPStatus.OK)
+
+                other_worker.delete(3)  # Updated by another worker
+                with patch.object(storage, "get_with_version", wraps=storage.get_with_version) as mock_get:
+                    response, _ = asyncio.run(get_raw_metadata(3))
+                    # The stamp tells the storage to resolve what it cached before the update again
+                    mock_get.assert_called_once_with(os.path.join(Env.METADATA_FOLDER, "3.json"),
+                                                     stamp=other_worker.stamp(3) - 2)
+                self.assertEqual(response, expected_response)
+            worker.close()
+            other_worker.close()
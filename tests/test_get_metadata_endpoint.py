@@ -2,15 +2,20 @@ import json
 import os
 import unittest
 from http import HTTPStatus
+from unittest.mock import AsyncMock, patch
 
 from fastapi.testclient import TestClient
 
+from config import metadata_cache, storage
 from main import app
+from module import utils
+from module.compression import GZIP
 from module.env import Env
 
 
 class TestGetMetadataEndpoint(unittest.TestCase):
     client = TestClient(app)
+    identity = {"Accept-Encoding": "identity"}
 
     def test_get_metadata(self):
         # 1.json is modified during testing
@@ -20,6 +25,18 @@ class TestGetMetadataEndpoint(unittest.TestCase):
             file_path = os.path.join(Env.METADATA_FOLDER, f"{token}.json")
             with open(file_path, "rb") as metadata_file:
                 self.assertEqual(response.read(), metadata_file.read().strip())
+            self.assertEqual(response.headers["content-type"], "application/json")
+
+    def test_get_metadata_from_pack_view(self):
+        content = b'{"name": "Pack", "image_url": "https://example.com/1.png"}'
+        response = (memoryview(content), "version"), HTTPStatus.OK
+        metadata_cache.clear()
+        with patch.object(metadata_cache, "max_size", 0), \
+                patch.object(storage, "get_with_version", new_callable=AsyncMock, return_value=response):
+            response = self.client.get("/metadata/3", headers=self.identity)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.content, content)
+        self.assertEqual(response.headers["content-length"], str(len(content)))
 
     def test_get_metadata_non_exist_metadata_file(self):
         response = self.client.get(f"/metadata/5")
@@ -38,3 +55,91 @@ class TestGetMetadataEndpoint(unittest.TestCase):
         for token in ["legawa", 2.0, False]:
             response = self.client.get(f"/metadata/{token}")
             self.assertEqual(response.status_code, HTTPStatus.UNPROCESSABLE_ENTITY)
+
+    def test_get_metadata_with_etag(self):
+        response = self.client.get("/metadata/2", headers=self.identity)
+        etag = response.headers["etag"]
+        self.assertRegex(etag, r'^"[0-9a-f]{32}"$')
+        self.assertEqual(response.headers["cache-control"], Env.METADATA_CACHE_CONTROL)
+        self.assertEqual(self.client.get("/metadata/2", headers=self.identity).headers["etag"], etag)
+
+        metadata_cache.clear()
+        self.assertEqual(self.client.get("/metadata/2", headers=self.identity).headers["etag"], etag)
+
+        file_path = os.path.join(Env.METADATA_FOLDER, "2.json")
+        os.utime(file_path, ns=(0, 0))
+        metadata_cache.clear()
+        self.assertNotEqual(self.client.get("/metadata/2", headers=self.identity).headers["etag"], etag)
+
+    def test_not_modified(self):
+        etag = self.client.get("/metadata/3", headers=self.identity).headers["etag"]
+        for if_none_match in [etag, f"W/{etag}", f'"other", {etag}', "*"]:
+            for cached in [True, False]:
+                if cached:
+                    self.client.get("/metadata/3", headers=self.identity)
+                else:
+                    metadata_cache.clear()
+                with patch.object(storage, "get_with_version") as mock_get:
+                    response = self.client.get("/metadata/3", headers={"If-None-Match": if_none_match, **self.identity})
+                    mock_get.assert_not_called()
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response.content, b"")
+                # Without the content, a 304 answers with the form of the ETag the client sent
+                weak = not cached and if_none_match == f"W/{etag}"
+                self.assertEqual(response.headers["etag"], f"W/{etag}" if weak else etag)
+                self.assertEqual(response.headers["cache-control"], Env.METADATA_CACHE_CONTROL)
+
+    def test_modified(self):
+        response = self.client.get("/metadata/3", headers={"If-None-Match": '"other"'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()["name"], json.loads(self.client.get("/metadata/3").content)["name"])
+
+    def test_not_modified_non_exist_metadata_file(self):
+        response = self.client.get("/metadata/5", headers={"If-None-Match": "*"})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    @patch.object(Env, "METADATA_CACHE_CONTROL", "")
+    def test_get_metadata_without_cache_control(self):
+        response = self.client.get("/metadata/2", headers=self.identity)
+        self.assertNotIn("cache-control", response.headers)
+        self.assertIn("etag", response.headers)
+
+    def test_get_compressed_metadata(self):
+        metadata_cache.clear()
+        file_path = os.path.join(Env.METADATA_FOLDER, "2.json")
+        with open(file_path, "rb") as metadata_file:
+            content = metadata_file.read().strip()
+        etag = self.client.get("/metadata/2", headers=self.identity).headers["etag"]
+
+        with patch.object(utils, "compress", wraps=utils.compress) as mock_compress:
+            for _ in range(2):
+                response = self.client.get("/metadata/2", headers={"Accept-Encoding": GZIP})
+                self.assertEqual(response.headers["content-encoding"], GZIP)
+                self.assertEqual(response.headers["vary"], "Accept-Encoding")
+                self.assertEqual(response.headers["etag"], f"W/{etag}")
+                self.assertLess(int(response.headers["content-length"]), len(content))
+                self.assertEqual(response.content, content)
+            mock_compress.assert_called_once()
+        self.assertEqual(len(metadata_cache.get(2)), len(content) + int(response.headers["content-length"]))
+
+        for cached in [True, False]:
+            if not cached:
+                metadata_cache.clear()
+            response = self.client.get("/metadata/2", headers={"Accept-Encoding": GZIP, "If-None-Match": f"W/{etag}"})
+            self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+            self.assertEqual(response.headers["etag"], f"W/{etag}")
+
+    def test_do_not_compress_small_metadata(self):
+        with patch.object(Env, "COMPRESSION_MIN_SIZE", 1024 * 1024):
+            response = self.client.get("/metadata/2", headers={"Accept-Encoding": GZIP})
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+
+    def test_get_many_compressed_metadata(self):
+        response = self.client.get("/metadata", params={"ids": "2,3"}, headers={"Accept-Encoding": GZIP})
+        self.assertEqual(response.headers["content-encoding"], GZIP)
+        self.assertEqual(list(response.json()), ["2", "3"])
+
+        response = self.client.get("/metadata", params={"ids": "2,3"}, headers=self.identity)
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(list(response.json()), ["2", "3"])
@@ -1,9 +1,16 @@
+import asyncio
 import unittest
 from http import HTTPStatus
+from unittest.mock import AsyncMock, patch
 
 from fastapi.testclient import TestClient
 
+from config import storage
+from controller import health
 from main import app
+from module.response import Response
+from module.env import Env
+from module.warmup import cache_warm_up
 
 
 class TestHealthcheckEndpoint(unittest.TestCase):
@@ -12,3 +19,78 @@ class TestHealthcheckEndpoint(unittest.TestCase):
     def test_get_healthcheck(self):
         response = self.client.get("/health")
         self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_get_healthcheck_while_warming_up(self):
+        with patch.object(cache_warm_up, "warming", True):
+            response = self.client.get("/health")
+            self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+            with patch.object(Env, "WARM_UP_BLOCK_HEALTH", False):
+                response = self.client.get("/health")
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_get_liveness(self):
+        with patch.object(cache_warm_up, "warming", True):
+            response = self.client.get("/health/live")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class TestReadinessEndpoint(unittest.TestCase):
+    client = TestClient(app)
+
+    def setUp(self):
+        health.last_probe.clear()
+
+    def test_get_readiness(self):
+        response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.json()["ready"])
+        self.assertEqual(response.json()["storage"]["detail"], "ok")
+
+    def test_get_readiness_with_missing_probe_file(self):
+        with patch.object(Env, "HEALTH_PROBE_PATH", "missing.json"):
+            response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_get_readiness_with_failed_storage(self):
+        with patch.object(storage, "ping", new_callable=AsyncMock, return_value=Response.STORAGE_OPERATION_FAIL):
+            response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertEqual(response.json()["storage"]["detail"], "storage operation failed")
+
+    def test_get_readiness_with_storage_error(self):
+        with patch.object(storage, "ping", new_callable=AsyncMock, side_effect=OSError("connection refused")):
+            response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertEqual(response.json()["storage"]["detail"], "storage probe failed: connection refused")
+
+    def test_get_readiness_with_slow_storage(self):
+        with patch.object(Env, "HEALTH_PROBE_MAX_LATENCY", 1), \
+                patch.object(storage, "ping", side_effect=self.slow_ping(0.01)):
+            response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertGreater(response.json()["storage"]["latency_ms"], 1)
+
+    def test_get_readiness_with_storage_timeout(self):
+        with patch.object(Env, "HEALTH_PROBE_TIMEOUT", 0.01), \
+                patch.object(storage, "ping", side_effect=self.slow_ping(1)):
+            response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+
+    def test_get_readiness_while_warming_up(self):
+        with patch.object(cache_warm_up, "warming", True):
+            response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+
+    def test_reuse_probe_result(self):
+        with patch.object(storage, "ping", wraps=storage.ping) as mock_ping:
+            for _ in range(3):
+                self.client.get("/health/ready")
+            mock_ping.assert_called_once()
+
+    @staticmethod
+    def slow_ping(delay: float):
+        async def ping(path):
+            await asyncio.sleep(delay)
+            return True, HTTPStatus.OK
+
+        return ping
@@ -0,0 +1,46 @@
+import asyncio
+import unittest
+
+from module.limit import ConcurrencyLimit
+
+
+class TestConcurrencyLimit(unittest.TestCase):
+
+    def test_run(self):
+        limit = ConcurrencyLimit(2)
+        peaks = []
+
+        async def load(token: int):
+            peaks.append(limit.in_flight)
+            await asyncio.sleep(0.001)
+            return token
+
+        async def run():
+            return await asyncio.gather(*(limit.run(load, token) for token in range(10)))
+
+        self.assertEqual(asyncio.run(run()), list(range(10)))
+        self.assertEqual(max(peaks), 2)
+        self.assertEqual(limit.in_flight, 0)
+
+    def test_run_in_another_event_loop(self):
+        limit = ConcurrencyLimit(1)
+
+        async def run():
+            return await asyncio.gather(limit.run(asyncio.sleep, 0.001, 1), limit.run(asyncio.sleep, 0, 2))
+
+        self.assertEqual(asyncio.run(run()), [1, 2])
+        self.assertEqual(asyncio.run(run()), [1, 2])
+
+    def test_release_slot_on_error(self):
+        limit = ConcurrencyLimit(1)
+
+        async def fail():
+            raise ValueError
+
+        async def run():
+            with self.assertRaises(ValueError):
+                await limit.run(fail)
+            return await limit.run(asyncio.sleep, 0, "loaded")
+
+        self.assertEqual(asyncio.run(run()), "loaded")
+        self.assertEqual(limit.in_flight, 0)
@@ -0,0 +1,47 @@
+import json
+import logging
+import unittest
+import uuid
+from logging.handlers import QueueHandler
+
+from module.constant import CORRELATION_ID
+from module.logger import ContextFilter, JsonFormatter, SamplingFilter, logger
+
+
+class TestLogger(unittest.TestCase):
+
+    def make_record(self, level=logging.INFO, message="Load file %s", args=("1.json",)):
+        record = logging.LogRecord("app", level, "utils.py", 10, message, args, None)
+        ContextFilter().filter(record)
+        return record
+
+    def test_write_through_queue(self):
+        self.assertTrue(all(isinstance(handler, QueueHandler) for handler in logger.handlers))
+
+    def test_format_json(self):
+        correlation_id = uuid.uuid4()
+        token = CORRELATION_ID.set(correlation_id)
+        try:
+            entry = json.loads(JsonFormatter().format(self.make_record()))
+        finally:
+            CORRELATION_ID.reset(token)
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["message"], "Load file 1.json")
+        self.assertEqual(entry["correlation_id"], str(correlation_id))
+        self.assertEqual(entry["location"], "utils.py:10")
+
+    def test_format_exception(self):
+        try:
+            raise ValueError("failed")
+        except ValueError as err:
+            record = self.make_record(logging.ERROR)
+            record.exc_info = (type(err), err, err.__traceback__)
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertIn("ValueError: failed", entry["exception"])
+
+    def test_sample_info_records(self):
+        self.assertFalse(SamplingFilter(0).filter(self.make_record()))
+        self.assertTrue(SamplingFilter(0).filter(self.make_record(logging.WARNING)))
+        self.assertTrue(SamplingFilter(1).filter(self.make_record()))
+        kept = sum(SamplingFilter(0.5).filter(self.make_record()) for _ in range(1000))
+        self.assertTrue(350 < kept < 650)
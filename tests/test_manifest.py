@@ -0,0 +1,99 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from module.logger import logger
+from module.manifest import Manifest
+
+
+class TestManifest(unittest.TestCase):
+    content = b'{"name": "Moler", "image_url": "https://pixelmon.club/moler.png"}'
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "manifest.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_stamp(self):
+        manifest = Manifest(self.path, logger)
+        self.assertFalse(manifest.is_trusted(1, self.content))
+        manifest.stamp(1, self.content)
+        self.assertTrue(manifest.is_trusted(1, self.content))
+        self.assertFalse(manifest.is_trusted(1, self.content + b" "))
+        self.assertFalse(manifest.is_trusted(2, self.content))
+
+    def test_save_and_load(self):
+        manifest = Manifest(self.path, logger)
+        manifest.stamp(1, self.content)
+        manifest.save()
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["manifest.json", "manifest.json.lock"])
+        self.assertTrue(Manifest(self.path, logger).is_trusted(1, self.content))
+
+    def test_ignore_other_schema_version(self):
+        manifest = Manifest(self.path, logger, schema_version=1)
+        manifest.stamp(1, self.content)
+        manifest.save()
+        self.assertFalse(Manifest(self.path, logger, schema_version=2).is_trusted(1, self.content))
+
+    def test_ignore_invalid_manifest(self):
+        with open(self.path, "w") as file:
+            file.write("{invalid")
+        self.assertEqual(Manifest(self.path, logger).digests, {})
+
+    def test_disabled_manifest(self):
+        manifest = Manifest(None, logger)
+        manifest.stamp(1, self.content)
+        manifest.save()
+        self.assertFalse(manifest.enabled)
+        self.assertFalse(manifest.is_trusted(1, self.content))
+
+    def test_save_to_nonexist_directory(self):
+        manifest = Manifest(os.path.join(self.directory.name, "nonexist", "manifest.json"), logger)
+        manifest.stamp(1, self.content)
+        manifest.save()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_manifest_format(self):
+        manifest = Manifest(self.path, logger)
+        manifest.stamp(1, self.content)
+        manifest.save()
+        with open(self.path) as file:
+            self.assertDictEqual(json.load(file), {"schema_version": manifest.schema_version,
+                                                   "digests": {"1": Manifest.digest(self.content)}})
+
+    def test_merge_digests_of_other_workers(self):
+        worker, other_worker = Manifest(self.path, logger), Manifest(self.path, logger)
+        worker.stamp(1, self.content)
+        other_worker.stamp(2, self.content)
+        worker.save()
+        other_worker.save()
+        self.assertTrue(other_worker.is_trusted(1, self.content))  # Picked up while saving
+        manifest = Manifest(self.path, logger)
+        self.assertTrue(manifest.is_trusted(1, self.content))
+        self.assertTrue(manifest.is_trusted(2, self.content))
+
+        worker.stamp(2, self.content + b" ")  # The latest save of a token wins
+        worker.save()
+        self.assertTrue(Manifest(self.path, logger).is_trusted(2, self.content + b" "))
+        self.assertEqual(worker.changed, set())
+
+    def test_save_periodically(self):
+        manifest = Manifest(self.path, logger)
+
+        async def run():
+            manifest.start()
+            manifest.stamp(1, self.content)
+            await asyncio.sleep(0.05)
+            self.assertTrue(Manifest(self.path, logger).is_trusted(1, self.content))
+            manifest.stamp(2, self.content)
+            await manifest.stop()
+
+        with patch.object(Manifest, "SAVE_INTERVAL", 0.01):
+            asyncio.run(run())
+        self.assertIsNone(manifest.task)
+        self.assertTrue(Manifest(self.path, logger).is_trusted(2, self.content))
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from http import HTTPStatus
+
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, multiprocess
+
+from config import storage
+from main import app
+from module.metrics import registry, timed_storage_operation
+from module.response import Response
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    client = TestClient(app)
+
+    def sample(self, name, labels):
+        return registry.get_sample_value(name, labels) or 0
+
+    def test_get_metrics(self):
+        self.client.get("/metadata/2")
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn("text/plain", response.headers["content-type"])
+        for name in ["http_request_duration_seconds", "http_requests_in_flight", "storage_operation_duration_seconds",
+                     "cache_hit_ratio", "singleflight_coalesced_total"]:
+            self.assertIn(name, response.text)
+
+    def test_observe_request_by_route(self):
+        labels = {"method": "GET", "route": "/metadata/{token}", "status": "200"}
+        count = self.sample("http_request_duration_seconds_count", labels)
+        self.client.get("/metadata/2")
+        self.client.get("/metadata/3")
+        self.assertEqual(self.sample("http_request_duration_seconds_count", labels), count + 2)
+
+    def test_observe_unmatched_request(self):
+        labels = {"method": "GET", "route": "unmatched", "status": "404"}
+        count = self.sample("http_request_duration_seconds_count", labels)
+        self.client.get("/unknown/path")
+        self.assertEqual(self.sample("http_request_duration_seconds_count", labels), count + 1)
+
+    def test_observe_storage_operation(self):
+        labels = {"backend": "local", "operation": "get"}
+        count = self.sample("storage_operation_duration_seconds_count", labels)
+        asyncio.run(storage.get("tests/test_file/metadata/2.json"))
+        self.assertEqual(self.sample("storage_operation_duration_seconds_count", labels), count + 1)
+
+    def test_count_storage_errors(self):
+        labels = {"backend": "test", "operation": "get"}
+
+        @timed_storage_operation("test", "get")
+        async def get(response):
+            return response
+
+        asyncio.run(get(Response.NOT_FOUND))
+        self.assertEqual(self.sample("storage_operation_errors_total", labels), 0)
+        asyncio.run(get(Response.STORAGE_OPERATION_FAIL))
+        self.assertEqual(self.sample("storage_operation_errors_total", labels), 1)
+
+    def test_count_cache_hits(self):
+        self.client.get("/metadata/2")
+        hits = self.sample("cache_hits_total", {"cache": "metadata"})
+        self.client.get("/metadata/2")
+        self.assertEqual(self.sample("cache_hits_total", {"cache": "metadata"}), hits + 1)
+
+
+WORKER = """
+from module import metrics
+from module.singleflight import SingleFlight
+
+flight = SingleFlight()
+flight.calls = 3
+metrics.register_flight("worker", flight)
+metrics.REQUEST_LATENCY.labels("GET", "/metadata/{token}", "200").observe(0.1)
+metrics.close()
+"""
+
+
+class TestMultiProcessMetrics(unittest.TestCase):
+
+    def test_sum_metrics_of_every_worker(self):
+        with tempfile.TemporaryDirectory() as directory:
+            environment = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+            for _ in range(2):
+                subprocess.run([sys.executable, "-c", WORKER], env=environment, check=True)
+            collected = CollectorRegistry()
+            multiprocess.MultiProcessCollector(collected, path=directory)
+
+            labels = {"method": "GET", "route": "/metadata/{token}", "status": "200"}
+            self.assertEqual(collected.get_sample_value("http_request_duration_seconds_count", labels), 2)
+            self.assertEqual(collected.get_sample_value("singleflight_calls_total", {"flight": "worker"}), 6)
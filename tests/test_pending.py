@@ -0,0 +1,52 @@
+import asyncio
+import unittest
+
+from module.pending import PendingTasks
+
+
+class TestPendingTasks(unittest.TestCase):
+
+    def test_run(self):
+        tasks = PendingTasks()
+
+        async def write():
+            await asyncio.sleep(0)
+            return "saved"
+
+        async def run():
+            return await tasks.run(write())
+
+        self.assertEqual(asyncio.run(run()), "saved")
+        self.assertEqual(len(tasks), 0)
+
+    def test_cancelled_caller_does_not_cancel_the_task(self):
+        tasks = PendingTasks()
+        writes = []
+
+        async def write():
+            await asyncio.sleep(0.01)
+            writes.append("saved")
+
+        async def run():
+            request = asyncio.ensure_future(tasks.run(write()))
+            await asyncio.sleep(0)
+            request.cancel()
+            self.assertEqual(len(tasks), 1)
+            self.assertEqual(await tasks.drain(1), 0)
+
+        asyncio.run(run())
+        self.assertEqual(writes, ["saved"])
+        self.assertEqual(len(tasks), 0)
+
+    def test_drain_timeout(self):
+        tasks = PendingTasks()
+
+        async def run():
+            self.assertEqual(await tasks.drain(1), 0)
+            request = asyncio.ensure_future(tasks.run(asyncio.sleep(1)))
+            await asyncio.sleep(0)
+            pending = await tasks.drain(0.01)
+            request.cancel()
+            return pending
+
+        self.assertEqual(asyncio.run(run()), 1)
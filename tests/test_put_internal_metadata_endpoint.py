@@ -7,6 +7,7 @@ from http import HTTPStatus
 
 from fastapi.testclient import TestClient
 
+from config import metadata_cache
 from main import app
 from module.env import Env
 from module.response import Response
@@ -75,6 +76,38 @@ class TestPutInternalMetadataEndpoint(unittest.TestCase):
         self.assertEqual(response.json(), expected_response)
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
+    def test_keep_integers_beyond_64_bits(self):
+        token_id = 2
+        metadata_file = os.path.join(METADATA_DIR, f"{token_id}.json")
+        with open(metadata_file) as file:
+            original = file.read()
+        metadata = json.loads(original)
+        metadata["attributes"].append({"trait_type": "DNA", "value": 123456789012345678901234567890})
+        try:
+            with open(metadata_file, "w") as file:
+                file.write(json.dumps(metadata))
+            metadata_cache.clear()
+
+            response = self.client.put(f"/internal/update/metadata/{token_id}",
+                                       json={"attributes": [{"trait_type": "HP", "value": 1}]},
+                                       headers=self.header)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            with open(metadata_file) as file:
+                self.assertIn({"trait_type": "DNA", "value": 123456789012345678901234567890},
+                              json.load(file)["attributes"])
+
+            response = self.client.put(f"/internal/update/metadata/{token_id}",
+                                       json={"attributes": [{"trait_type": "DNA", "value": 2 ** 70}]},
+                                       headers=self.header)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertIn({"trait_type": "DNA", "value": 2 ** 70}, response.json()["attributes"])
+            with open(metadata_file) as file:
+                self.assertIn({"trait_type": "DNA", "value": 2 ** 70}, json.load(file)["attributes"])
+        finally:
+            with open(metadata_file, "w") as file:
+                file.write(original)
+            metadata_cache.clear()
+
     def test_change_nonexist_metadata_file(self):
         token_id = 5
         response = self.client.put(f"/internal/update/metadata/{token_id}",
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import os
+import shutil
+import unittest
+from http import HTTPStatus
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+from config import storage_writes
+from controller import internal_metadata
+from main import app
+from module.env import Env
+from module.response import Response
+from module.schema.metadata import MetadataUpdate
+from tests.constant import METADATA_DIR, TEST_FILE
+from tests.utils import generate_token
+
+
+class TestPutManyInternalMetadataEndpoint(unittest.TestCase):
+    client = TestClient(app)
+    token = generate_token()
+    header = {"Authorization": f"{token}"}
+    backup_dir = os.path.join(TEST_FILE, "backup")
+    new_metadata = {
+        "name": "New Name",
+        "attributes": [
+            {
+                "trait_type": "Attack",
+                "value": 0
+            }
+        ]
+    }
+
+    def setUp(self):
+        self.original_files = {}
+        for token_id in [1, 2, 3]:
+            with open(os.path.join(METADATA_DIR, f"{token_id}.json"), "rb") as file:
+                self.original_files[token_id] = file.read()
+
+    def tearDown(self):
+        for token_id, content in self.original_files.items():
+            with open(os.path.join(METADATA_DIR, f"{token_id}.json"), "wb") as file:
+                file.write(content)
+        if os.path.isdir(self.backup_dir):
+            shutil.rmtree(self.backup_dir)
+
+    def read_metadata(self, token_id: int) -> dict:
+        with open(os.path.join(METADATA_DIR, f"{token_id}.json")) as file:
+            return json.load(file)
+
+    def test_change_many_metadata_files(self):
+        response = self.client.put("/internal/update/metadata",
+                                   json=[{"token": 1, "patch": self.new_metadata},
+                                         {"token": 2, "patch": {"name": "Other Name"}}],
+                                   headers=self.header)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertDictEqual(response.json(), {"1": {"status": HTTPStatus.OK}, "2": {"status": HTTPStatus.OK}})
+        self.assertEqual(self.read_metadata(1)["name"], "New Name")
+        self.assertIn({"trait_type": "Attack", "value": 0}, self.read_metadata(1)["attributes"])
+        self.assertEqual(self.read_metadata(2)["name"], "Other Name")
+
+        backup_files = [os.path.join(root, file) for root, _, files in os.walk(self.backup_dir) for file in files]
+        self.assertEqual(len(backup_files), 1)
+        with open(backup_files[0]) as file:
+            backup = json.load(file)
+        self.assertDictEqual(backup, {str(token_id): json.loads(self.original_files[token_id]) for token_id in [1, 2]})
+
+    def test_change_many_metadata_with_errors(self):
+        response = self.client.put("/internal/update/metadata",
+                                   json=[{"token": 5, "patch": self.new_metadata},
+                                         {"token": 1, "patch": {"new_key": "new_value"}},
+                                         {"token": 2, "patch": {}},
+                                         {"token": 3, "patch": {"name": "Other Name"}}],
+                                   headers=self.header)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        content = response.json()
+        self.assertEqual(list(content), ["5", "1", "2", "3"])
+        detail, status = Response.NOT_FOUND
+        self.assertDictEqual(content["5"], {"error": detail, "status": status})
+        self.assertDictEqual(content["1"], {"error": {"detail": "Key(s) 'new_key' not found in metadata"},
+                                            "status": HTTPStatus.BAD_REQUEST})
+        detail, status = Response.VALUE_REQUIRED
+        self.assertDictEqual(content["2"], {"error": detail, "status": status})
+        self.assertDictEqual(content["3"], {"status": HTTPStatus.OK})
+        self.assertDictEqual(self.read_metadata(1), json.loads(self.original_files[1]))
+
+    def test_do_not_save_when_backup_failed(self):
+        with patch.object(internal_metadata, "create_backup", new_callable=AsyncMock) as mock_backup:
+            mock_backup.return_value = Response.STORAGE_OPERATION_FAIL
+            response = self.client.put("/internal/update/metadata",
+                                       json=[{"token": 1, "patch": self.new_metadata}],
+                                       headers=self.header)
+
+        detail, status = Response.STORAGE_OPERATION_FAIL
+        self.assertDictEqual(response.json(), {"1": {"error": detail, "status": status}})
+        self.assertDictEqual(self.read_metadata(1), json.loads(self.original_files[1]))
+
+    def test_save_when_request_is_cancelled_after_backup_started(self):
+        async def slow_backup(*args):
+            await asyncio.sleep(0.01)
+            return Response.OK
+
+        async def run():
+            request = asyncio.ensure_future(internal_metadata.put_many(
+                [MetadataUpdate(token=1, patch={"name": "Other Name"})]))
+            while not mock_backup.called:
+                await asyncio.sleep(0)
+            request.cancel()
+            self.assertEqual(await storage_writes.drain(1), 0)
+
+        with patch.object(internal_metadata, "create_backup", side_effect=slow_backup) as mock_backup:
+            asyncio.run(run())
+        self.assertEqual(self.read_metadata(1)["name"], "Other Name")
+
+    def test_update_many_metadata_with_invalid_request(self):
+        for body, expected_response in [
+            ([], Response.VALUE_REQUIRED),
+            ([{"token": 1, "patch": {}}, {"token": 1, "patch": {}}], Response.DUPLICATED_TOKEN_ID),
+            ([{"token": Env.MAX_TOKEN_ID + 1, "patch": self.new_metadata}], Response.INVALID_TOKEN_ID),
+        ]:
+            response = self.client.put("/internal/update/metadata", json=body, headers=self.header)
+            detail, status = expected_response
+            self.assertDictEqual(response.json(), detail)
+            self.assertEqual(response.status_code, status)
+
+    @patch.object(Env, "BULK_UPDATE_MAX_TOKENS", 1)
+    def test_update_too_many_tokens(self):
+        response = self.client.put("/internal/update/metadata",
+                                   json=[{"token": 1, "patch": {}}, {"token": 2, "patch": {}}],
+                                   headers=self.header)
+        detail, status = Response.TOO_MANY_TOKENS
+        self.assertDictEqual(response.json(), detail)
+        self.assertEqual(response.status_code, status)
+
+    def test_update_many_metadata_without_authorization(self):
+        response = self.client.put("/internal/update/metadata",
+                                   json=[{"token": 1, "patch": self.new_metadata}])
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
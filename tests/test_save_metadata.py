@@ -4,6 +4,8 @@ import os
 import unittest
 from unittest.mock import patch
 
+from config import metadata_cache, storage_writes
+from module.cache import CachedDocument
 from module.utils import save_metadata
 from module.env import Env
 from module.response import Response
@@ -49,3 +51,19 @@ class TestSaveMetadata(unittest.TestCase):
             self.assertEqual(json.loads(file.read()), new_metadata)
             self.assertEqual(response, Response.OK)
         os.unlink(file_path)
+
+    def test_invalidate_cache_when_request_is_cancelled(self):
+        file_path = os.path.join(Env.METADATA_FOLDER, f"{self.token_id}.json")
+
+        async def run():
+            metadata_cache.set(self.token_id, CachedDocument(b"{}", '"etag"'))
+            request = asyncio.ensure_future(save_metadata(self.token_id, self.metadata))
+            await asyncio.sleep(0)
+            request.cancel()
+            self.assertEqual(await storage_writes.drain(1), 0)
+
+        asyncio.run(run())
+        self.assertIsNone(metadata_cache.get(self.token_id))
+        with open(file_path, "r") as file:
+            self.assertEqual(json.loads(file.read()), self.metadata)
+        os.unlink(file_path)
@@ -0,0 +1,116 @@
+import logging
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from module import shared_cache
+from module.shared_cache import SharedCache
+
+logger = logging.getLogger("test")
+
+
+def write_versions(path: str, writes: int):
+    cache = SharedCache(path, 1, 4096, logger)
+    for index in range(writes):
+        version = str(index % 10)
+        cache.set(1, version.encode() * (index % 10 + 1) * 50, f'"{version}"', cache.stamp(1))
+
+
+@unittest.skipUnless(shared_cache.fcntl, "fcntl is not available")
+class TestSharedCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache")
+        self.cache = SharedCache(self.path, 10, 1024, logger)
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_disabled(self):
+        cache = SharedCache(None, 10, 1024, logger)
+        self.assertFalse(cache.enabled)
+        self.assertEqual(cache.stamp(1), 0)
+        self.assertEqual(cache.set(1, b"content", '"etag"', 0), 0)
+        self.assertIsNone(cache.get(1))
+        cache.delete(1)
+        self.assertEqual(len(cache), 0)
+
+    def test_set_and_get(self):
+        stamp = self.cache.set(1, b'{"name": "1"}', '"etag"', self.cache.stamp(1))
+        self.assertEqual(self.cache.get(1), (b'{"name": "1"}', '"etag"', stamp))
+        self.assertEqual(self.cache.stamp(1), stamp)
+        self.assertIsNone(self.cache.get(2))
+        self.assertEqual((len(self.cache), self.cache.size), (1, 19))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        stamp = self.cache.set(1, b'{"name": "2"}', '"new"', stamp)
+        self.assertEqual(self.cache.get(1), (b'{"name": "2"}', '"new"', stamp))
+        self.assertEqual((len(self.cache), self.cache.size), (1, 37))
+
+    def test_share_entries_between_processes(self):
+        stamp = self.cache.set(1, b"content", '"etag"', 0)
+        other = SharedCache(self.path, 10, 1024, logger)
+        self.assertEqual(other.get(1), (b"content", '"etag"', stamp))
+        other.close()
+
+        with self.assertLogs(logger, "INFO"):
+            other = SharedCache(self.path, 20, 1024, logger)  # A different layout recreates the file
+        self.assertIsNone(other.get(1))
+        other.close()
+
+    def test_do_not_set_entry_changed_since_stamp(self):
+        stamp = self.cache.stamp(1)
+        self.cache.delete(1)  # e.g. an update in another worker
+        self.assertIsNone(self.cache.set(1, b"stale", '"etag"', stamp))
+        self.assertIsNone(self.cache.get(1))
+
+    def test_delete(self):
+        stamp = self.cache.set(1, b"content", '"etag"', 0)
+        self.cache.delete(1)
+        self.assertIsNone(self.cache.get(1))
+        self.assertNotEqual(self.cache.stamp(1), stamp)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_drop_every_entry_when_full(self):
+        self.cache.set(1, b"1" * 500, '"1"', 0)
+        self.cache.set(2, b"2" * 500, '"2"', 0)
+        with self.assertLogs(logger, "WARNING"):
+            self.cache.set(3, b"3" * 500, '"3"', 0)
+        self.assertIsNone(self.cache.get(1))
+        self.assertIsNone(self.cache.get(2))
+        self.assertEqual(self.cache.get(3)[0], b"3" * 500)
+        self.assertEqual((len(self.cache), self.cache.size, self.cache.evictions), (1, 503, 2))
+
+        stamp = self.cache.stamp(4)
+        self.assertEqual(self.cache.set(4, b"4" * 2000, '"4"', stamp), stamp)  # Larger than the cache
+        self.assertIsNone(self.cache.get(4))
+
+    def test_expire(self):
+        cache = SharedCache(self.path, 10, 1024, logger, ttl=60)
+        with patch.object(shared_cache.time, "time", return_value=1000):
+            cache.set(1, b"content", '"etag"', 0)
+            self.assertIsNotNone(cache.get(1))
+        with patch.object(shared_cache.time, "time", return_value=1060):
+            self.assertIsNone(cache.get(1))
+        cache.close()
+
+    def test_read_while_another_process_writes(self):
+        cache = SharedCache(self.path, 1, 4096, logger)
+        writer = multiprocessing.Process(target=write_versions, args=(self.path, 20000))
+        writer.start()
+        reads = 0
+        while writer.is_alive() or not reads:
+            entry = cache.get(1)
+            if entry is None:
+                continue
+            content, etag, _ = entry
+            version = etag.strip('"')
+            self.assertEqual(content, version.encode() * (int(version) + 1) * 50)  # Never a torn entry
+            reads += 1
+        writer.join()
+        self.assertEqual(writer.exitcode, 0)
+        cache.close()
@@ -0,0 +1,66 @@
+import asyncio
+import unittest
+
+from module.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_coalesce_concurrent_calls(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def load(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        async def run():
+            return await asyncio.gather(*(flight.do(key, lambda key=key: load(key)) for key in [1, 1, 1, 2]))
+
+        self.assertEqual(asyncio.run(run()), [1, 1, 1, 2])
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual((flight.calls, flight.coalesced), (2, 2))
+        self.assertEqual(len(flight), 0)
+
+    def test_do_not_coalesce_sequential_calls(self):
+        flight = SingleFlight()
+
+        async def load():
+            return "value"
+
+        async def run():
+            return [await flight.do(1, load), await flight.do(1, load)]
+
+        self.assertEqual(asyncio.run(run()), ["value", "value"])
+        self.assertEqual((flight.calls, flight.coalesced), (2, 0))
+
+    def test_raise_exception_to_every_caller(self):
+        flight = SingleFlight()
+
+        async def load():
+            await asyncio.sleep(0.01)
+            raise ValueError("failed")
+
+        async def run():
+            return await asyncio.gather(flight.do(1, load), flight.do(1, load), return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(len(flight), 0)
+
+    def test_cancelled_caller_does_not_cancel_call(self):
+        flight = SingleFlight()
+
+        async def load():
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def run():
+            first = asyncio.ensure_future(flight.do(1, load))
+            second = asyncio.ensure_future(flight.do(1, load))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()), "value")
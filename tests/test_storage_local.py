@@ -66,6 +66,14 @@ class TestStorageLocal(unittest.TestCase):
         self.assertEqual(response, Response.OK)
         os.unlink(metadata)
 
+    def test_put_with_version(self):
+        metadata = os.path.join(METADATA_DIR, "test.json")
+        version, status = asyncio.run(self.storage.put_with_version(metadata, b"test"))
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertEqual(asyncio.run(self.storage.get_version(metadata)), (version, HTTPStatus.OK))
+        self.assertEqual(asyncio.run(self.storage.put_with_version(metadata, b"test")), Response.FILE_EXISTS)
+        os.unlink(metadata)
+
     def test_write_file_nonexist_directory(self):
         file_path = os.path.join(METADATA_DIR, "path/to/nonexist/directory/file.json")
         response = asyncio.run(self.storage.put(file_path, b"test"))
@@ -120,3 +128,26 @@ class TestStorageLocal(unittest.TestCase):
         metadata = os.path.join(METADATA_DIR, "2.json")
         response = asyncio.run(self.storage.is_exists(metadata))
         self.assertEqual(response, Response.STORAGE_OPERATION_FAIL)
+
+    def test_get_version(self):
+        metadata = os.path.join(METADATA_DIR, "2.json")
+        version, status = asyncio.run(self.storage.get_version(metadata))
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertEqual(asyncio.run(self.storage.get_version(metadata)), (version, HTTPStatus.OK))
+
+        os.utime(metadata, ns=(0, 0))
+        self.assertNotEqual(asyncio.run(self.storage.get_version(metadata)), (version, HTTPStatus.OK))
+
+    def test_get_version_nonexist_file(self):
+        metadata = os.path.join(METADATA_DIR, "non-exist.json")
+        response = asyncio.run(self.storage.get_version(metadata))
+        self.assertEqual(response, Response.NOT_FOUND)
+
+    def test_get_with_version(self):
+        metadata = os.path.join(METADATA_DIR, "2.json")
+        version, _ = asyncio.run(self.storage.get_version(metadata))
+        with open(metadata, "rb") as file:
+            self.assertEqual(asyncio.run(self.storage.get_with_version(metadata)),
+                             ((file.read(), version), HTTPStatus.OK))
+        response = asyncio.run(self.storage.get_with_version(os.path.join(METADATA_DIR, "non-exist.json")))
+        self.assertEqual(response, Response.NOT_FOUND)
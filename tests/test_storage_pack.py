@@ -0,0 +1,96 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from http import HTTPStatus
+from unittest.mock import patch
+
+from module.env import Env
+from module.logger import logger
+from module.response import Response
+from module.schema.storage import StorageType
+from module.storage.main import Storage
+from module.storage.pack import PackWriter
+
+
+class TestStoragePack(unittest.TestCase):
+    files = {1: b'{"name": "first"}', 3: b'{"name": "third"}'}
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "metadata.pack")
+        with PackWriter(self.path, max_token=4) as writer:
+            for token, content in self.files.items():
+                writer.add(token, content)
+        self.patch = patch.object(Env, "METADATA_PACK", self.path)
+        self.patch.start()
+        self.storage = Storage(logger, StorageType.Pack)
+
+    def tearDown(self):
+        asyncio.run(self.storage.close())
+        self.patch.stop()
+        self.directory.cleanup()
+
+    def test_read_file(self):
+        for token, content in self.files.items():
+            response, status = asyncio.run(self.storage.get(f"metadata/{token}.json"))
+            self.assertIsInstance(response, memoryview)
+            self.assertEqual(response, content)
+            self.assertEqual(status, HTTPStatus.OK)
+
+    def test_read_nonexist_file(self):
+        for path in ["metadata/2.json", "metadata/5.json", "metadata/0.json", "metadata/1.txt", "metadata/first.json"]:
+            self.assertEqual(asyncio.run(self.storage.get(path)), Response.NOT_FOUND, path)
+
+    def test_write_file(self):
+        response = asyncio.run(self.storage.put("metadata/2.json", b"{}", overwrite=True))
+        self.assertEqual(response, Response.STORAGE_OPERATION_FAIL)
+
+    def test_check_path_exists(self):
+        self.assertEqual(asyncio.run(self.storage.is_exists("metadata/1.json")), (True, HTTPStatus.OK))
+        self.assertEqual(asyncio.run(self.storage.is_exists("metadata/2.json")), (False, HTTPStatus.NOT_FOUND))
+
+    def test_get_version(self):
+        first, status = asyncio.run(self.storage.get_version("metadata/1.json"))
+        self.assertEqual(status, HTTPStatus.OK)
+        third, _ = asyncio.run(self.storage.get_version("metadata/3.json"))
+        self.assertNotEqual(first, third)
+        self.assertEqual(asyncio.run(self.storage.get_version("metadata/2.json")), Response.NOT_FOUND)
+
+    def test_get_with_version(self):
+        (content, version), status = asyncio.run(self.storage.get_with_version("metadata/1.json"))
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertEqual(content, asyncio.run(self.storage.get("metadata/1.json"))[0])
+        self.assertEqual(version, asyncio.run(self.storage.get_version("metadata/1.json"))[0])
+        self.assertEqual(asyncio.run(self.storage.get_with_version("metadata/2.json")), Response.NOT_FOUND)
+
+    def test_read_rebuilt_pack_after_reconnect(self):
+        asyncio.run(self.storage.connect())
+        with PackWriter(self.path, max_token=4) as writer:
+            writer.add(2, b'{"name": "second"}')
+        self.assertEqual(asyncio.run(self.storage.get("metadata/2.json")), Response.NOT_FOUND)
+        asyncio.run(self.storage.close())
+        response, _ = asyncio.run(self.storage.get("metadata/2.json"))
+        self.assertEqual(response, b'{"name": "second"}')
+
+    def test_close_while_file_is_used(self):
+        response, _ = asyncio.run(self.storage.get("metadata/1.json"))
+        asyncio.run(self.storage.close())
+        self.assertEqual(response, self.files[1])
+
+    def test_invalid_pack(self):
+        with open(self.path, "wb") as file:
+            file.write(b"not a metadata pack")
+        self.assertEqual(asyncio.run(self.storage.get("metadata/1.json")), Response.STORAGE_OPERATION_FAIL)
+
+    def test_nonexist_pack(self):
+        os.remove(self.path)
+        self.assertEqual(asyncio.run(self.storage.get("metadata/1.json")), Response.STORAGE_OPERATION_FAIL)
+
+    def test_discard_pack_on_error(self):
+        with self.assertRaises(ValueError):
+            with PackWriter(self.path, max_token=4) as writer:
+                writer.add(5, b"{}")
+        self.assertEqual(os.listdir(self.directory.name), ["metadata.pack"])
+        response, _ = asyncio.run(self.storage.get("metadata/1.json"))
+        self.assertEqual(response, self.files[1])
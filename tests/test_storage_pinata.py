@@ -7,11 +7,13 @@ from unittest.mock import patch
 
 from aiohttp import ClientSession
 
+from module.env import Env
 from module.logger import logger
 from module.response import Response
 from module.schema.storage import StorageType
 from module.storage.main import Storage
 from tests.mock_class import MockAioHTTP
+from tests.stand_in import PinataStandIn
 
 
 class TestStoragePinata(unittest.TestCase):
@@ -25,6 +27,9 @@ class TestStoragePinata(unittest.TestCase):
         ]
     }
 
+    def setUp(self):
+        self.storage.storage.cid_cache.clear()
+
     @patch.object(ClientSession, "request")
     def test_get_file(self, mock_http):
         expected_return_value = self.ReturnValue(status=200, message=json.dumps(self.response).encode("utf-8"))
@@ -190,3 +195,151 @@ class TestStoragePinata(unittest.TestCase):
         mock_http().__aenter__.return_value = MockAioHTTP(expected_return_value=expected_return_value)
         res = asyncio.run(self.storage.is_exists("3.json"))
         self.assertEqual(res, Response.STORAGE_OPERATION_FAIL)
+
+
+class TestStoragePinataSession(unittest.TestCase):
+    metadata = {"1.json": b'{"name": "NFT #1"}', "2.json": b'{"name": "NFT #2"}'}
+
+    async def _get_files(self, connect: bool) -> PinataStandIn:
+        server = PinataStandIn()
+        await server.start()
+        server.pin_folder("metadata", self.metadata)
+        storage = Storage(logger, StorageType.Pinata, config={"access_key": "test", "secret_key": "test"})
+        storage.storage.api_host = server.api_url
+        storage.storage.host = server.gateway_url
+        if connect:
+            await storage.connect()
+        for _ in range(3):
+            for name, content in self.metadata.items():
+                self.assertEqual(await storage.get(f"metadata/{name}"), (content, HTTPStatus.OK))
+        await storage.close()
+        await server.stop()
+        self.assertIsNone(storage.storage.session)
+        return server
+
+    def test_reuse_connection(self):
+        server = asyncio.run(self._get_files(connect=True))
+        self.assertEqual(server.requests, 7)  # The folder CID is resolved once
+        self.assertEqual(len(server.connections), 1)
+
+    def test_new_connection_without_session(self):
+        server = asyncio.run(self._get_files(connect=False))
+        self.assertEqual(server.requests, 7)
+        self.assertEqual(len(server.connections), 7)
+
+
+class TestStoragePinataCIDCache(unittest.TestCase):
+
+    async def _start(self) -> tuple[PinataStandIn, Storage]:
+        server = PinataStandIn()
+        await server.start()
+        storage = Storage(logger, StorageType.Pinata, config={"access_key": "test", "secret_key": "test"})
+        storage.storage.api_host = server.api_url
+        storage.storage.host = server.gateway_url
+        await storage.connect()
+        return server, storage
+
+    @staticmethod
+    async def _stop(server: PinataStandIn, storage: Storage):
+        await storage.close()
+        await server.stop()
+
+    def test_resolve_folder_cid_once(self):
+        async def run():
+            server, storage = await self._start()
+            server.pin_folder("metadata", {"1.json": b"first", "2.json": b"second"})
+            for _ in range(3):
+                self.assertEqual(await storage.get("metadata/1.json"), (b"first", HTTPStatus.OK))
+                self.assertEqual(await storage.get("metadata/2.json"), (b"second", HTTPStatus.OK))
+            self.assertTrue((await storage.is_exists("metadata/1.json"))[0])
+            await self._stop(server, storage)
+            self.assertEqual(server.requests, 8)  # 1 pinList and 7 gateway requests
+
+        asyncio.run(run())
+
+    def test_cache_missing_file(self):
+        async def run():
+            server, storage = await self._start()
+            self.assertEqual(await storage.get("3.json"), Response.NOT_FOUND)
+            self.assertEqual(await storage.is_exists("3.json"), (False, HTTPStatus.NOT_FOUND))
+            await self._stop(server, storage)
+            self.assertEqual(server.requests, 1)
+
+        asyncio.run(run())
+
+    def test_ping_without_cid_cache(self):
+        async def run():
+            server, storage = await self._start()
+            server.pin_folder("metadata", {"1.json": b"first"})
+            self.assertTrue((await storage.is_exists("metadata/1.json"))[0])
+            for _ in range(2):
+                self.assertEqual(await storage.ping("metadata/1.json"), (True, HTTPStatus.OK))
+            self.assertEqual(await storage.ping("3.json"), (False, HTTPStatus.NOT_FOUND))
+            await self._stop(server, storage)
+            self.assertEqual(server.requests, 5)  # 4 pinList and 1 gateway requests
+
+        asyncio.run(run())
+
+    @patch.object(Env, "PINATA_CID_NEGATIVE_CACHE_TTL", 0)
+    def test_disable_caching_missing_file(self):
+        async def run():
+            server, storage = await self._start()
+            self.assertEqual(await storage.get("3.json"), Response.NOT_FOUND)
+            self.assertEqual(await storage.get("3.json"), Response.NOT_FOUND)
+            await self._stop(server, storage)
+            self.assertEqual(server.requests, 2)
+
+        asyncio.run(run())
+
+    def test_update_cid_on_put(self):
+        async def run():
+            server, storage = await self._start()
+            self.assertEqual(await storage.get("3.json"), Response.NOT_FOUND)
+            self.assertEqual(await storage.put("3.json", b"first"), Response.OK)
+            self.assertEqual(await storage.get("3.json"), (b"first", HTTPStatus.OK))
+            self.assertEqual(await storage.put("3.json", b"second", overwrite=True), Response.OK)
+            self.assertEqual(await storage.get("3.json"), (b"second", HTTPStatus.OK))
+            self.assertEqual(storage.storage.cid_cache.get("3.json")[0], server.pins["3.json"])
+            self.assertEqual(await storage.put_with_version("3.json", b"third", overwrite=True),
+                             (server.pins["3.json"], HTTPStatus.OK))
+            self.assertEqual(await storage.get("3.json"), (b"third", HTTPStatus.OK))
+            await self._stop(server, storage)
+
+        asyncio.run(run())
+
+    def test_resolve_cid_updated_by_another_worker(self):
+        async def run():
+            server, storage = await self._start()
+            other_worker = Storage(logger, StorageType.Pinata, config={"access_key": "test", "secret_key": "test"})
+            other_worker.storage.api_host = server.api_url
+            other_worker.storage.host = server.gateway_url
+            server.pin("3.json", b"first")
+            self.assertEqual(await storage.get("3.json", stamp=2), (b"first", HTTPStatus.OK))
+
+            self.assertEqual(await other_worker.put("3.json", b"second", overwrite=True), Response.OK)
+            self.assertEqual(await storage.get("3.json", stamp=2), (b"first", HTTPStatus.OK))  # The cached CID
+            self.assertEqual(await storage.get("3.json", stamp=4), (b"second", HTTPStatus.OK))
+            self.assertEqual(await storage.get_with_version("3.json", stamp=4),
+                             ((b"second", server.pins["3.json"]), HTTPStatus.OK))
+            self.assertEqual(await storage.get("3.json"), (b"second", HTTPStatus.OK))
+            await self._stop(server, storage)
+            self.assertEqual(server.requests, 10)  # 2 pinList and 5 gateway requests, and 3 for the update
+
+        asyncio.run(run())
+
+    def test_get_version(self):
+        async def run():
+            server, storage = await self._start()
+            cid = server.pin("3.json", b"first")
+            folder_cid = server.pin_folder("metadata", {"1.json": b"first"})
+            self.assertEqual(await storage.get_version("3.json"), (cid, HTTPStatus.OK))
+            self.assertEqual(await storage.get_version("metadata/1.json"), (f"{folder_cid}/1.json", HTTPStatus.OK))
+            self.assertEqual(await storage.get_version("4.json"), Response.NOT_FOUND)
+            self.assertEqual(await storage.get_with_version("3.json"), ((b"first", cid), HTTPStatus.OK))
+            self.assertEqual(await storage.put("3.json", b"second", overwrite=True), Response.OK)
+            self.assertEqual(await storage.get_version("3.json"), (server.pins["3.json"], HTTPStatus.OK))
+            self.assertNotEqual(server.pins["3.json"], cid)
+            await self._stop(server, storage)
+            self.assertEqual(server.requests, 6)  # 3 pinList, 1 gateway, 1 pinFileToIPFS and 1 unpin requests
+
+        asyncio.run(run())
@@ -5,12 +5,14 @@ from unittest.mock import patch
 
 import botocore.exceptions
 
+from module.env import Env
 from module.logger import logger
 from module.response import Response
 from module.schema.storage import StorageType
 from module.storage.main import Storage
 from module.storage.s3 import aioboto3
 from tests.mock_class import MockAioboto3Session, S3Method
+from tests.stand_in import S3StandIn
 
 
 class DummyMetadataFile:
@@ -194,3 +196,54 @@ class TestStorageS3(unittest.TestCase):
         )
         response = asyncio.run(self.storage.is_exists("4.json"))
         self.assertEqual(response, Response.STORAGE_OPERATION_FAIL)
+
+    @patch.object(aioboto3, "Session")
+    def test_get_version(self, mock_boto3):
+        mock_boto3.return_value = MockAioboto3Session(S3Method.head_object,
+                                                      expected_return_value={"ETag": '"0123abcd"'})
+        self.assertEqual(asyncio.run(self.storage.get_version("4.json")), ("0123abcd", HTTPStatus.OK))
+
+        error = botocore.exceptions.ClientError(
+            error_response={"Error": {"Code": "404"}},
+            operation_name="test"
+        )
+        mock_boto3.return_value = MockAioboto3Session(S3Method.head_object, expected_side_effect=error)
+        self.assertEqual(asyncio.run(self.storage.get_version("4.json")), Response.NOT_FOUND)
+
+        mock_boto3.return_value = MockAioboto3Session(S3Method.head_object, expected_side_effect=Exception)
+        self.assertEqual(asyncio.run(self.storage.get_version("4.json")), Response.STORAGE_OPERATION_FAIL)
+
+
+class TestStorageS3Client(unittest.TestCase):
+
+    def test_shared_client(self):
+        async def run():
+            server = S3StandIn()
+            url = await server.start()
+            storage = Storage(logger, StorageType.S3, config={"access_key": "test", "secret_key": "test"})
+            with patch.object(Env, "S3_ENDPOINT_URL", url), patch.object(aioboto3, "Session",
+                                                                          wraps=aioboto3.Session) as mock_session:
+                await storage.connect()
+                self.assertEqual(await storage.put("metadata/1.json", b"content"), Response.OK)
+                self.assertEqual(await storage.put_with_version("metadata/3.json", b"third"),
+                                 (S3StandIn.etag(b"third").strip('"'), HTTPStatus.OK))
+                self.assertEqual(await storage.get("metadata/1.json"), (b"content", HTTPStatus.OK))
+                self.assertEqual(await storage.is_exists("metadata/1.json"), (True, HTTPStatus.OK))
+                self.assertEqual(await storage.get_version("metadata/1.json"),
+                                 (S3StandIn.etag(b"content").strip('"'), HTTPStatus.OK))
+                self.assertEqual(await storage.get_with_version("metadata/1.json"),
+                                 ((b"content", S3StandIn.etag(b"content").strip('"')), HTTPStatus.OK))
+                self.assertEqual(await storage.get_with_version("metadata/2.json"), Response.NOT_FOUND)
+                self.assertEqual(await storage.get("metadata/2.json"), Response.NOT_FOUND)
+                await storage.close()
+            await server.stop()
+            self.assertEqual(mock_session.call_count, 1)
+            self.assertLess(len(server.connections), server.requests)
+            self.assertIsNone(storage.storage.client)
+
+        asyncio.run(run())
+
+    def test_close_without_connect(self):
+        storage = Storage(logger, StorageType.S3)
+        asyncio.run(storage.close())
+        self.assertIsNone(storage.storage.client)
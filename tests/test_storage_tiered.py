@@ -0,0 +1,196 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from http import HTTPStatus
+from unittest.mock import patch
+
+from module.env import Env
+from module.logger import logger
+from module.response import Response
+from module.schema.storage import StorageType
+from module.storage.main import Storage
+
+
+class TestStorageTiered(unittest.TestCase):
+    content = b'{"name": "first"}'
+
+    def setUp(self):
+        self.remote_directory = tempfile.TemporaryDirectory()
+        self.cache_directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.remote_directory.name, "metadata", "1.json")
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "wb") as file:
+            file.write(self.content)
+        self.patches = [patch.object(Env, "TIERED_REMOTE_STORAGE", StorageType.Local),
+                        patch.object(Env, "TIERED_CACHE_DIR", self.cache_directory.name),
+                        patch.object(Env, "TIERED_CACHE_MAX_AGE", 300),
+                        patch.object(Env, "TIERED_CACHE_MAX_SIZE", 1024)]
+        for patcher in self.patches:
+            patcher.start()
+        self.storage = self.create_storage()
+
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+        self.remote_directory.cleanup()
+        self.cache_directory.cleanup()
+
+    def create_storage(self):
+        return Storage(logger, StorageType.Tiered, config={"access_key": "", "secret_key": ""}).storage
+
+    def cached_files(self):
+        return sorted(os.listdir(self.cache_directory.name))
+
+    def test_read_through(self):
+        response, status = asyncio.run(self.storage.get(self.path))
+        self.assertEqual((response, status), (self.content, HTTPStatus.OK))
+        self.assertEqual(len(self.cached_files()), 1)
+
+        os.remove(self.path)
+        self.assertEqual(asyncio.run(self.storage.get(self.path)), (self.content, HTTPStatus.OK))
+
+    def test_fetch_content_and_version_in_one_call(self):
+        remote_version = asyncio.run(self.storage.remote.get_version(self.path))[0]
+        with patch.object(self.storage.remote, "get_version") as remote_get_version, \
+                patch.object(self.storage.remote, "get_with_version",
+                             wraps=self.storage.remote.get_with_version) as remote_get_with_version:
+            self.assertEqual(asyncio.run(self.storage.get_with_version(self.path)),
+                             ((self.content, remote_version), HTTPStatus.OK))
+            self.assertEqual(asyncio.run(self.storage.get_with_version(self.path)),
+                             ((self.content, remote_version), HTTPStatus.OK))
+            remote_get_with_version.assert_called_once()
+            remote_get_version.assert_not_called()
+
+    def test_read_after_restart(self):
+        asyncio.run(self.storage.get(self.path))
+        os.remove(self.path)
+        storage = self.create_storage()
+        asyncio.run(storage.connect())
+        self.assertEqual(storage.size, self.storage.size)
+        self.assertEqual(asyncio.run(storage.get(self.path)), (self.content, HTTPStatus.OK))
+
+    def test_read_nonexist_file(self):
+        path = os.path.join(self.remote_directory.name, "metadata", "2.json")
+        self.assertEqual(asyncio.run(self.storage.get(path)), Response.NOT_FOUND)
+        self.assertEqual(self.cached_files(), [])
+
+    def test_revalidate_stale_file(self):
+        asyncio.run(self.storage.get(self.path))
+        with patch.object(self.storage, "max_age", 0), \
+                patch.object(self.storage.remote, "get_with_version",
+                             wraps=self.storage.remote.get_with_version) as remote_get:
+            self.assertEqual(asyncio.run(self.storage.get(self.path)), (self.content, HTTPStatus.OK))
+            remote_get.assert_not_called()
+
+            with open(self.path, "wb") as file:
+                file.write(b'{"name": "changed"}')
+            os.utime(self.path, ns=(time.time_ns() + 10 ** 9, time.time_ns() + 10 ** 9))
+            self.assertEqual(asyncio.run(self.storage.get(self.path)), (b'{"name": "changed"}', HTTPStatus.OK))
+            remote_get.assert_called_once()
+
+            os.remove(self.path)
+            self.assertEqual(asyncio.run(self.storage.get(self.path)), Response.NOT_FOUND)
+            self.assertEqual(self.cached_files(), [])
+
+    def test_serve_stale_file_if_remote_fails(self):
+        asyncio.run(self.storage.get(self.path))
+        with patch.object(self.storage, "max_age", 0), \
+                patch.object(self.storage.remote, "get_version", return_value=Response.STORAGE_OPERATION_FAIL):
+            self.assertEqual(asyncio.run(self.storage.get(self.path)), (self.content, HTTPStatus.OK))
+
+    def test_write_new_file_through(self):
+        path = os.path.join(self.remote_directory.name, "metadata", "2.json")
+        self.assertEqual(asyncio.run(self.storage.put(path, b'{"name": "second"}')), Response.OK)
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), b'{"name": "second"}')
+        self.assertEqual(len(self.cached_files()), 1)
+
+        with patch.object(self.storage.remote, "get_with_version") as remote_get_with_version:
+            self.assertEqual(asyncio.run(self.storage.get(path)), (b'{"name": "second"}', HTTPStatus.OK))
+            remote_get_with_version.assert_not_called()
+
+    def test_write_through(self):
+        asyncio.run(self.storage.get(self.path))
+        self.assertEqual(len(self.cached_files()), 1)
+        with patch.object(self.storage.remote, "get_version") as remote_get_version:
+            version, status = asyncio.run(self.storage.put_with_version(self.path, b'{"name": "changed"}',
+                                                                        overwrite=True))
+            self.assertEqual(status, HTTPStatus.OK)
+            remote_get_version.assert_not_called()
+        self.assertEqual(version, asyncio.run(self.storage.remote.get_version(self.path))[0])
+        self.assertEqual(len(self.cached_files()), 1)
+        with open(os.path.join(self.cache_directory.name, self.cached_files()[0]), "rb") as file:
+            self.assertEqual(file.read(), version.encode() + b'\n{"name": "changed"}')
+
+        with patch.object(self.storage.remote, "get_with_version") as remote_get_with_version:
+            self.assertEqual(asyncio.run(self.storage.get_with_version(self.path)),
+                             ((b'{"name": "changed"}', version), HTTPStatus.OK))
+            remote_get_with_version.assert_not_called()
+        with patch.object(self.storage, "max_age", 0):
+            self.assertEqual(asyncio.run(self.storage.get(self.path)), (b'{"name": "changed"}', HTTPStatus.OK))
+            self.assertEqual(len(self.cached_files()), 1)  # Revalidated, the versions match
+
+    def test_write_existing_file(self):
+        self.assertEqual(asyncio.run(self.storage.put(self.path, b"{}")), Response.FILE_EXISTS)
+        self.assertEqual(self.cached_files(), [])
+
+    def test_evict_least_recently_used(self):
+        paths = [os.path.join(self.remote_directory.name, "metadata", f"{token}.json") for token in range(2, 5)]
+        for path in paths:
+            with open(path, "wb") as file:
+                file.write(b"x" * 400)
+        for path in [paths[0], paths[1], paths[0], paths[2]]:
+            asyncio.run(self.storage.get(path))
+        self.assertLessEqual(self.storage.size, 1024)
+        self.assertEqual(len(self.cached_files()), 2)
+        self.assertNotIn(self.storage._name(paths[1]), self.cached_files())
+
+    def test_count_files_of_other_processes(self):
+        other = self.create_storage()
+        asyncio.run(other.connect())
+        asyncio.run(self.storage.get(self.path))
+        path = os.path.join(self.remote_directory.name, "metadata", "2.json")
+        with open(path, "wb") as file:
+            file.write(b"x" * 980)
+        asyncio.run(other.get(path))
+        self.assertEqual(len(self.cached_files()), 2)
+
+        with patch.object(self.storage, "scanned_at", 0):  # The rescan interval elapsed
+            asyncio.run(self.storage._index())
+        self.assertLessEqual(self.storage.size, 1024)
+        self.assertEqual(self.cached_files(), [self.storage._name(path)])
+
+    def test_check_path_exists(self):
+        self.assertEqual(asyncio.run(self.storage.is_exists(self.path)), (True, HTTPStatus.OK))
+        path = os.path.join(self.remote_directory.name, "metadata", "2.json")
+        self.assertEqual(asyncio.run(self.storage.is_exists(path)), (False, HTTPStatus.NOT_FOUND))
+
+    def test_ping_remote_storage(self):
+        asyncio.run(self.storage.get(self.path))
+        with patch.object(self.storage.remote, "ping", wraps=self.storage.remote.ping) as remote_ping:
+            self.assertEqual(asyncio.run(self.storage.ping(self.path)), (True, HTTPStatus.OK))
+            remote_ping.assert_called_once()
+        os.remove(self.path)
+        self.assertEqual(asyncio.run(self.storage.ping(self.path)), (False, HTTPStatus.NOT_FOUND))
+
+    def test_get_version(self):
+        remote_version = asyncio.run(self.storage.remote.get_version(self.path))
+        asyncio.run(self.storage.get(self.path))
+        with patch.object(self.storage.remote, "get_version") as remote_get_version:
+            self.assertEqual(asyncio.run(self.storage.get_version(self.path)), remote_version)
+            remote_get_version.assert_not_called()
+
+    def test_remove_interrupted_write(self):
+        interrupted = os.path.join(self.cache_directory.name, "interrupted.tmp")
+        open(interrupted, "wb").close()
+        os.utime(interrupted, (time.time() - 3600, time.time() - 3600))
+        open(os.path.join(self.cache_directory.name, "writing.tmp"), "wb").close()  # By another process
+        asyncio.run(self.storage.connect())
+        self.assertEqual(self.cached_files(), ["writing.tmp"])
+
+    def test_tiered_remote_storage(self):
+        with patch.object(Env, "TIERED_REMOTE_STORAGE", StorageType.Tiered):
+            with self.assertRaises(ValueError):
+                self.create_storage()
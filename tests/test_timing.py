@@ -0,0 +1,71 @@
+import os
+import pstats
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from config import metadata_cache
+from main import app
+from module.env import Env
+from module.timing import TIMINGS, Span, server_timing
+
+
+class TestSpan(unittest.TestCase):
+
+    def test_do_nothing_without_timings(self):
+        with Span("storage") as span:
+            pass
+        self.assertIsNone(span.timings)
+
+    def test_sum_spans(self):
+        timings = {}
+        token = TIMINGS.set(timings)
+        try:
+            for _ in range(2):
+                with Span("storage"):
+                    time.sleep(0.001)
+        finally:
+            TIMINGS.reset(token)
+        self.assertGreaterEqual(timings["storage"], 0.002)
+
+    def test_format_server_timing(self):
+        self.assertEqual(server_timing({"storage": 0.0012, "validate": 0.0004}), "storage;dur=1.2, validate;dur=0.4")
+
+
+class TestTimingMiddleware(unittest.TestCase):
+    client = TestClient(app)
+    identity = {"Accept-Encoding": "identity"}
+
+    def test_server_timing_disabled(self):
+        response = self.client.get("/metadata/2", headers=self.identity)
+        self.assertNotIn("server-timing", response.headers)
+
+    def test_server_timing(self):
+        metadata_cache.clear()
+        with patch.object(Env, "SERVER_TIMING", True):
+            response = self.client.get("/metadata/2", headers=self.identity)
+        spans = dict(entry.split(";dur=") for entry in response.headers["server-timing"].split(", "))
+        self.assertEqual(set(spans), {"storage", "validate", "total"})
+        self.assertGreaterEqual(float(spans["total"]), float(spans["storage"]))
+
+    def test_save_profile_of_slow_request(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(Env, "PROFILE_DIR", directory), \
+                patch.object(Env, "PROFILE_SAMPLE_RATE", 1), \
+                patch.object(Env, "PROFILE_SLOW_REQUESTS", 1e-6):
+            response = self.client.get("/metadata/2", headers=self.identity)
+            profiles = os.listdir(directory)
+            self.assertEqual(len(profiles), 1)
+            self.assertTrue(profiles[0].endswith(f"{response.headers['correlation-id']}.prof"))
+            self.assertTrue(pstats.Stats(os.path.join(directory, profiles[0])).total_calls)
+
+    def test_skip_profile_of_fast_request(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(Env, "PROFILE_DIR", directory), \
+                patch.object(Env, "PROFILE_SAMPLE_RATE", 1), \
+                patch.object(Env, "PROFILE_SLOW_REQUESTS", 60000):
+            self.client.get("/metadata/2", headers=self.identity)
+            self.assertEqual(os.listdir(directory), [])
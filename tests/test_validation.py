@@ -0,0 +1,28 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from pydantic import ValidationError
+
+from module.env import Env
+from module.validation import validate_internal_arguments
+
+
+async def read(path: str, size: int) -> tuple[str, int]:
+    return path, size
+
+
+class TestValidateInternalArguments(unittest.TestCase):
+
+    @patch.object(Env, "VALIDATE_INTERNAL_CALLS", False)
+    def test_skip_validation(self):
+        function = validate_internal_arguments(read)
+        self.assertIs(function, read)
+        self.assertEqual(asyncio.run(function("1.json", "2")), ("1.json", "2"))
+
+    @patch.object(Env, "VALIDATE_INTERNAL_CALLS", True)
+    def test_validate(self):
+        function = validate_internal_arguments(read)
+        self.assertEqual(asyncio.run(function("1.json", "2")), ("1.json", 2))
+        with self.assertRaises(ValidationError):
+            asyncio.run(function("1.json", "legawa"))
@@ -0,0 +1,68 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from config import metadata_cache
+from module import shared_cache, warmup
+from module.shared_cache import SharedCache
+from module.warmup import CacheWarmUp
+from module.logger import logger
+
+
+class TestCacheWarmUp(unittest.TestCase):
+
+    def setUp(self):
+        metadata_cache.clear()
+        self.warm_up = CacheWarmUp(logger)
+
+    def test_warm_up(self):
+        asyncio.run(self.warm_up.run(concurrency=2))
+        self.assertEqual((self.warm_up.total, self.warm_up.loaded, self.warm_up.failed), (5, 3, 2))
+        self.assertFalse(self.warm_up.warming)
+        for token in [1, 2, 3]:
+            self.assertIsNotNone(metadata_cache.get(token))
+
+    def test_skip_disabled_cache(self):
+        with patch.object(metadata_cache, "max_size", 0):
+            asyncio.run(self.warm_up.run(concurrency=2))
+        self.assertEqual(self.warm_up.loaded + self.warm_up.failed, 0)
+        self.assertFalse(self.warm_up.warming)
+
+    def test_warn_when_warmed_up_metadata_expires(self):
+        with patch.object(metadata_cache, "ttl", 60), self.assertLogs(logger, "WARNING") as logs:
+            asyncio.run(self.warm_up.run(concurrency=2))
+        self.assertIn("METADATA_CACHE_TTL=60", logs.output[0])
+
+    @unittest.skipUnless(shared_cache.fcntl, "fcntl is not available")
+    def test_warm_up_shared_cache_in_one_worker(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SharedCache(os.path.join(directory, "cache"), 5, 4096, logger)
+            other_worker = CacheWarmUp(logger)
+            with patch.object(warmup, "shared_metadata_cache", cache):
+                asyncio.run(self.warm_up.run(concurrency=2))
+                asyncio.run(other_worker.run(concurrency=2))
+                self.assertEqual(self.warm_up.loaded, 3)
+                self.assertEqual(other_worker.loaded + other_worker.failed, 0)
+
+                asyncio.run(self.warm_up.stop())  # Releases the warm-up lock
+                asyncio.run(other_worker.run(concurrency=2))
+                self.assertEqual(other_worker.loaded, 3)
+                asyncio.run(other_worker.stop())
+            cache.close()
+
+    def test_count_failed_load(self):
+        with patch("module.warmup.get_metadata_document", side_effect=RuntimeError("failed")):
+            asyncio.run(self.warm_up.run(concurrency=2))
+        self.assertEqual(self.warm_up.failed, 5)
+
+    def test_start_and_stop(self):
+        async def start_and_stop():
+            self.warm_up.start(concurrency=1)
+            self.assertTrue(self.warm_up.warming)
+            await self.warm_up.stop()
+
+        asyncio.run(start_and_stop())
+        self.assertFalse(self.warm_up.warming)
+        self.assertTrue(self.warm_up.task.done())